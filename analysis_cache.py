@@ -0,0 +1,170 @@
+#
+# analysis_cache.py
+# 같은 파일을 여러 사용자가 올릴 때 분석 결과를 한 번만 만들고 모든 세션이 같이 쓰도록 하는 프로세스 공용 메모리 캐시입니다.
+#   - 키는 (업로드 바이트의 content_hash, 공정 키, 필터 조건)이므로 파일 이름이 달라도 내용이 같으면 재사용합니다.
+#   - 항목마다 잡고 있는 메모리를 재서 합계가 상한을 넘으면 가장 오래 사용하지 않은 항목부터 버립니다 (LRU).
+#   - 같은 키를 여러 세션이 동시에 요청하면 한 곳에서만 계산하고 나머지는 그 결과를 기다립니다.
+# 캐시에 넣은 값은 여러 세션이 같은 객체를 가리키므로 읽기 전용으로 취급해야 합니다 (수정이 필요하면 복사본에).
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from data_handle import object_bytes
+
+CACHE_MAX_BYTES = int(os.environ.get('MES_ANALYSIS_CACHE_MAX_MB', '1024')) * 1024 * 1024
+WAIT_POLL_SECONDS = 0.5  # 다른 스레드의 계산을 기다리는 동안 취소/시간 초과를 확인하는 간격
+
+
+def analysis_key(digest, stage_key, **params):
+    """
+    분석 결과 캐시 키를 만드는 함수.
+    Args:
+        digest (str): 업로드 바이트의 content_hash.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        **params: 결과를 바꾸는 조건 (예: start=날짜, end=날짜, jig='PC01', view='base').
+    Returns:
+        tuple: 해시 가능한 키.
+    """
+    return digest, stage_key, tuple(sorted(params.items()))
+
+
+class AnalysisCache:
+    """프로세스에 하나 두고 모든 세션이 같이 쓰는, 메모리 상한이 있는 LRU 캐시 (스레드 안전)"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        """
+        Args:
+            max_bytes (int): 캐시 항목이 잡을 수 있는 메모리 합계 상한(바이트).
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 키 -> (값, 바이트). 뒤쪽일수록 최근에 사용
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # 계산 중인 키 -> {'event': threading.Event, 'done': bool, 'value': 계산 결과}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        캐시된 값을 반환하고 최근 사용으로 표시하는 함수.
+        Returns:
+            캐시된 값. 없으면 None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        값을 캐시에 넣고 메모리 합계를 상한 이하로 맞추는 함수. 값 하나가 상한보다 크면 넣지 않습니다.
+        Returns:
+            bool: 캐시에 넣었으면 True.
+        """
+        # 메모리 계산은 잠금 밖에서 (큰 분석 결과는 시간이 걸린다)
+        nbytes = object_bytes(value)
+        if nbytes > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._bytes -= evicted_bytes
+                self.evictions += 1
+        return True
+
+    def get_or_compute(self, key, compute, timeout=None, cancel_check=None):
+        """
+        캐시에 있으면 그 값을, 없으면 compute()로 만들어 캐시에 넣고 반환하는 함수.
+        다른 스레드가 같은 키를 계산 중이면 끝날 때까지 기다렸다가 그 결과를 씁니다.
+        값이 너무 커서 캐시에 넣지 못해도, 그동안 기다리던 스레드에는 같은 결과를 넘깁니다.
+        Args:
+            key: analysis_key로 만든 키.
+            compute (callable): 인자 없이 값을 만드는 함수. 예외가 나거나 None을 반환하면 캐시에 넣지 않습니다.
+            timeout (float): 다른 스레드의 계산을 기다릴 최대 시간(초). None이면 끝날 때까지 기다립니다.
+            cancel_check (callable): 기다리는 동안 주기적으로 호출하는 함수. 예외를 내면 기다리기를 멈추고
+                그 예외를 그대로 전달합니다 (예: 백그라운드 작업의 job.report).
+        Returns:
+            tuple: (값, 캐시 적중 여부). 다른 스레드가 계산한 결과를 받았으면 적중으로 봅니다.
+        Raises:
+            TimeoutError: timeout 안에 다른 스레드의 계산이 끝나지 않은 경우.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], True
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = {'event': threading.Event(), 'done': False, 'value': None}
+                    break
+            self._wait(pending['event'], deadline, cancel_check)
+            if pending['done']:
+                with self._lock:
+                    self.hits += 1
+                return pending['value'], True
+            # 계산하던 쪽이 실패/취소했으면 다시 돌면서 직접 계산한다
+
+        try:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+                pending['value'] = value
+                pending['done'] = True
+            return value, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending['event'].set()
+
+    @staticmethod
+    def _wait(event, deadline, cancel_check):
+        """event가 설정될 때까지 WAIT_POLL_SECONDS 간격으로 취소/시간 초과를 확인하며 기다리는 함수"""
+        while True:
+            wait_seconds = WAIT_POLL_SECONDS
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("같은 분석을 계산 중인 다른 세션을 기다리다 시간이 초과되었습니다.")
+                wait_seconds = min(wait_seconds, remaining)
+            if event.wait(wait_seconds):
+                return
+            if cancel_check is not None:
+                cancel_check()
+
+    def clear(self):
+        """모든 항목을 버리는 함수"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        캐시 상태를 반환하는 함수 (화면 표시용).
+        Returns:
+            dict: entries(항목 수), bytes(메모리 합계), max_bytes, hits, misses, evictions.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,737 @@
+#
+# analysis_engine.py
+# 모든 공정(PCB, Fw, RfTx, Semi, Batadc)의 analyze_* 함수가 공유하는 불량 분류 엔진입니다.
+# (jig, 날짜) 조합마다 반복문을 돌지 않고, (jig, 날짜, SNumber)별 집계 상태를 groupby로 만든 뒤
+# 그 상태에서 모든 셀을 계산합니다. 집계 상태는 합칠 수 있어 증분 분석에도 그대로 쓰입니다.
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from db_utils import ARROW_STRING_DTYPE, clean_string_columns, decode_stage_datetime
+from profiling import profiled
+from stages import get_stage
+
+SUMMARY_METRICS = ['total_test', 'pass', 'false_defect', 'true_defect', 'fail']
+DETAIL_CATEGORIES = ['pass', 'false_defect', 'true_defect', 'fail']
+
+# 'X'가 없는 SNumber의 first_fail_seq 값
+NO_FAIL_SEQ = np.iinfo('int64').max
+
+# 시간 구간 집계 단위: 시간, 교대, 일, ISO 주(월요일 시작), 월
+TIME_BUCKETS = ('hour', 'shift', 'day', 'week', 'month')
+# 교대 정의: (이름, 시작 시각[시]). 첫 교대 시작 전의 시각은 전날 마지막 교대에 속합니다.
+DEFAULT_SHIFTS = (('주간', 8), ('야간', 20))
+
+
+def _empty_sn_state():
+    return pd.DataFrame({
+        'jig': pd.Series(dtype=object),
+        'date': pd.Series(dtype='datetime64[ns]'),
+        'sn': pd.Series(dtype=object),
+        'total': pd.Series(dtype='int64'),
+        'pass': pd.Series(dtype='int64'),
+        'fail': pd.Series(dtype='int64'),
+        'first_fail_seq': pd.Series(dtype='int64'),
+    })
+
+
+@profiled('groupby.build_sn_state')
+def build_sn_state(df, jig_col, date_col, sn_col='SNumber', status_col='PassStatusNorm', skip_blank_jig=False, seq_offset=0):
+    """
+    (jig, 날짜, SNumber)별 테스트 수, 'O' 수, 'X' 수, 첫 'X' 행의 순번을 모은 집계 상태를 만드는 함수.
+    이 상태는 합칠 수 있으므로(merge_sn_state) 증분/스트리밍 분석의 기본 단위가 됩니다.
+    Args:
+        df (pd.DataFrame): date_col이 datetime으로 변환되고 status_col이 만들어진 DataFrame.
+        jig_col (str): 지그(PC) 컬럼명.
+        date_col (str): 날짜/시간 컬럼명.
+        sn_col (str): SNumber 컬럼명.
+        status_col (str): 'O'/'X'로 정규화된 Pass 상태 컬럼명.
+        skip_blank_jig (bool): True이면 공백 문자열 지그도 결측으로 보고 제외.
+        seq_offset (int): 행 순번의 시작값. 여러 묶음을 이어 붙일 때 앞 묶음의 행 수만큼 넘깁니다.
+    Returns:
+        pd.DataFrame: jig, date, sn, total, pass, fail, first_fail_seq 컬럼. SNumber가 없는 행은 sn이 NaN인 행으로 모입니다.
+    """
+    dates = df[date_col].dt.normalize()
+    jigs = df[jig_col]
+    valid = (dates.notna() & jigs.notna()).to_numpy()
+    if skip_blank_jig:
+        valid = valid & (jigs.astype(str).str.strip() != '').to_numpy()
+    if not valid.any():
+        return _empty_sn_state()
+
+    status = df[status_col].to_numpy()[valid]
+    is_fail = status == 'X'
+    seq = np.arange(seq_offset, seq_offset + len(df), dtype='int64')[valid]
+    frame = pd.DataFrame({
+        'jig': jigs.to_numpy()[valid],
+        'date': dates.to_numpy()[valid],
+        'sn': df[sn_col].to_numpy()[valid],
+        'pass': (status == 'O').astype('int64'),
+        'fail': is_fail.astype('int64'),
+        'fail_seq': np.where(is_fail, seq, NO_FAIL_SEQ),
+    })
+    return frame.groupby(['jig', 'date', 'sn'], sort=False, dropna=False).agg(**{
+        'total': ('pass', 'size'),
+        'pass': ('pass', 'sum'),
+        'fail': ('fail', 'sum'),
+        'first_fail_seq': ('fail_seq', 'min'),
+    }).reset_index()
+
+
+@profiled('groupby.merge_sn_state')
+def merge_sn_state(*states):
+    """
+    여러 집계 상태를 하나로 합치는 함수. 건수는 더하고 첫 'X' 순번은 가장 앞선 값을 씁니다.
+    Returns:
+        pd.DataFrame: build_sn_state와 같은 형식의 상태.
+    """
+    states = [state for state in states if not state.empty]
+    if not states:
+        return _empty_sn_state()
+    if len(states) == 1:
+        return states[0]
+    return pd.concat(states, ignore_index=True).groupby(['jig', 'date', 'sn'], sort=False, dropna=False).agg(**{
+        'total': ('total', 'sum'),
+        'pass': ('pass', 'sum'),
+        'fail': ('fail', 'sum'),
+        'first_fail_seq': ('first_fail_seq', 'min'),
+    }).reset_index()
+
+
+class SNumberListStore:
+    """
+    summarize_sn_state 한 번의 결과에 속한 모든 셀의 SNumber 목록 저장소.
+    고유 SNumber를 한 번만 보관하고, 목록 종류마다 셀 순서로 이어 붙인 SNumber 번호(int32)와
+    셀별 시작 위치만 가지므로 셀마다 문자열 리스트를 만들지 않습니다.
+    """
+
+    def __init__(self, values, codes, offsets):
+        """
+        Args:
+            values: 고유 SNumber 배열.
+            codes (dict): 목록 종류 -> 셀 순서로 이어 붙인 values 위치 배열.
+            offsets (dict): 목록 종류 -> 셀별 시작 위치 배열 (길이 = 셀 수 + 1).
+        """
+        self.values = values
+        self.codes = codes
+        self.offsets = offsets
+
+    def bounds(self, list_key, cell):
+        offsets = self.offsets[list_key]
+        return int(offsets[cell]), int(offsets[cell + 1])
+
+    def take(self, list_key, start, stop, step=1):
+        return self.values.take(self.codes[list_key][start:stop:step]).tolist()
+
+
+class LazySNumberList(Sequence):
+    """
+    셀 하나의 SNumber 목록. 건수만 바로 알 수 있고, 실제 문자열 리스트는 순회하거나 잘라 볼 때 만듭니다.
+    list처럼 len, 인덱싱, 슬라이싱, 순회, == 비교를 지원합니다.
+    """
+    __slots__ = ('_store', '_list_key', '_cell')
+
+    def __init__(self, store, list_key, cell):
+        self._store = store
+        self._list_key = list_key
+        self._cell = cell
+
+    def __len__(self):
+        start, stop = self._store.bounds(self._list_key, self._cell)
+        return stop - start
+
+    def __getitem__(self, item):
+        start, stop = self._store.bounds(self._list_key, self._cell)
+        if isinstance(item, slice):
+            # 요청한 구간만 문자열로 만든다 (페이지 단위 표시용)
+            item_start, item_stop, step = item.indices(stop - start)
+            return self._store.take(self._list_key, start + item_start, start + item_stop, step)
+        if item < 0:
+            item += stop - start
+        if not 0 <= item < stop - start:
+            raise IndexError('SNumber 목록 범위를 벗어났습니다.')
+        return self._store.take(self._list_key, start + item, start + item + 1)[0]
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        start, stop = self._store.bounds(self._list_key, self._cell)
+        return self._store.take(self._list_key, start, stop)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazySNumberList)):
+            return self.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LazySNumberList({len(self)}건)"
+
+
+def _sn_list_store(named, cells, list_rows):
+    """
+    목록 종류별 행(named의 부분집합, 목록에 나올 순서대로 정렬됨)을 셀별 SNumber 번호 배열로 묶는 함수.
+    같은 셀 안에서는 입력 순서를 유지합니다.
+    """
+    codes, uniques = pd.factorize(named['sn'])
+    values = np.asarray(uniques, dtype=object)
+    if ARROW_STRING_DTYPE is not None and pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        # 문자열 SNumber는 Arrow 배열 하나로 보관 (파이썬 문자열 객체를 셀마다 들고 있지 않음)
+        values = pd.array(values, dtype=ARROW_STRING_DTYPE)
+    named_codes = pd.Series(codes.astype(np.int32), index=named.index)
+    named_cells = pd.Series(
+        cells.get_indexer(pd.MultiIndex.from_arrays([named['jig'], named['date']])), index=named.index,
+    )
+
+    list_codes, list_offsets = {}, {}
+    for list_key, rows in list_rows.items():
+        row_cells = named_cells[rows.index].to_numpy()
+        order = np.argsort(row_cells, kind='stable')
+        list_codes[list_key] = named_codes[rows.index].to_numpy()[order]
+        offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row_cells, minlength=len(cells)), out=offsets[1:])
+        list_offsets[list_key] = offsets
+    return SNumberListStore(values, list_codes, list_offsets)
+
+
+@profiled('groupby.summarize_sn_state')
+def summarize_sn_state(state):
+    """
+    집계 상태로부터 summary_data를 만드는 함수.
+    SNumber가 그 (jig, 날짜) 안에서 한 번이라도 'O'였다면 그 SNumber의 'X'는 가성불량,
+    그렇지 않으면 진성불량입니다. SNumber가 없는 행의 'X'는 항상 진성불량입니다.
+    Returns:
+        dict: summary_data[jig]['YYYY-MM-DD'] = 건수, pass_rate, pass_sns/false_defect_sns/true_defect_sns/fail_sns.
+            SNumber 목록은 LazySNumberList이며, 모든 셀이 하나의 SNumberListStore를 공유합니다.
+    """
+    if state.empty:
+        return {}
+
+    ever_passed = _ever_passed(state)
+    counts = _sn_state_counts(state, ever_passed)
+
+    # PASS 목록은 SNumber 순, 불량 목록은 첫 'X'가 나온 순서 (기존 groupby/unique 결과와 동일)
+    named = state[state['sn'].notna()]
+    passed = ever_passed[named.index]
+    failed = named[named['fail'] > 0].sort_values('first_fail_seq', kind='stable')
+    failed_passed = passed[failed.index]
+    store = _sn_list_store(named, counts.index, {
+        'pass_sns': named[passed].sort_values('sn', kind='stable'),
+        'false_defect_sns': failed[failed_passed],
+        'true_defect_sns': failed[~failed_passed],
+        'fail_sns': failed,
+    })
+
+    summary_data = {}
+    for cell_index, ((jig, day), total_test, pass_count, false_count, true_count, fail_count) in enumerate(zip(
+        counts.index,
+        counts['total_test'].tolist(),
+        counts['pass'].tolist(),
+        counts['false_defect'].tolist(),
+        counts['true_defect'].tolist(),
+        counts['fail'].tolist(),
+    )):
+        cell = _summary_cell(total_test, pass_count, false_count, true_count, fail_count)
+        for list_key in store.codes:
+            cell[list_key] = LazySNumberList(store, list_key, cell_index)
+        summary_data.setdefault(jig, {})[day.strftime("%Y-%m-%d")] = cell
+
+    return summary_data
+
+
+def _ever_passed(state):
+    # SNumber가 있고 그 (jig, 날짜) 안에서 한 번이라도 'O'였는지
+    return (state['pass'] > 0) & state['sn'].notna()
+
+
+def _sn_state_counts(state, ever_passed):
+    """집계 상태에서 (jig, 날짜)별 SUMMARY_METRICS 건수 표 (jig, date 인덱스)"""
+    counts = pd.DataFrame({
+        'total_test': state['total'],
+        'pass': state['pass'],
+        'false_defect': state['fail'].where(ever_passed, 0),
+        'true_defect': state['fail'].where(~ever_passed, 0),
+    }).groupby([state['jig'], state['date']], sort=True).sum()
+    counts['fail'] = counts['false_defect'] + counts['true_defect']
+    return counts
+
+
+def _summary_cell(total_test, pass_count, false_count, true_count, fail_count):
+    rate = 100 * pass_count / total_test if total_test > 0 else 0
+    return {
+        'total_test': total_test,
+        'pass': pass_count,
+        'false_defect': false_count,
+        'true_defect': true_count,
+        'fail': fail_count,
+        'pass_rate': f"{rate:.1f}%",
+    }
+
+
+def _table_jig_keys(state):
+    """
+    요약 테이블과 같은 지그 키로 맞춘 집계 상태. Parquet 컬럼은 한 타입이어야 하므로
+    문자열/숫자가 섞인(object) 지그 값은 문자열로 바꿉니다. 숫자만 있는 지그 컬럼은 그대로 둡니다.
+    """
+    if pd.api.types.is_object_dtype(state['jig']):
+        state = state.assign(jig=state['jig'].astype(str))
+    return state
+
+
+def summary_table(df, stage_key):
+    """
+    공정 DataFrame을 (jig, 날짜)별 요약 행으로 집계하는 함수 (SNumber 목록은 만들지 않음).
+    저장소에 미리 계산해 두는 요약 테이블(columnar_store.write_stage_summaries)의 행입니다.
+    Args:
+        df (pd.DataFrame): 공정 DataFrame. 전처리 결과가 제자리에 반영됩니다.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+    Returns:
+        pd.DataFrame: jig, date(datetime64), SUMMARY_METRICS, pass_rate(%, float) 컬럼.
+    """
+    jig_col = prepare_stage_frame(df, stage_key)
+    state = build_sn_state(df, jig_col, get_stage(stage_key)['date_col'], skip_blank_jig=True)
+    if state.empty:
+        return pd.DataFrame(columns=['jig', 'date'] + SUMMARY_METRICS + ['pass_rate'])
+    # 문자열로 바꾼 뒤 같아지는 지그(1과 '1')가 한 행이 되도록 집계 전에 바꾼다
+    state = _table_jig_keys(state)
+    counts = _sn_state_counts(state, _ever_passed(state)).reset_index()
+    counts['pass_rate'] = (100 * counts['pass'] / counts['total_test']).fillna(0.0)
+    return counts[['jig', 'date'] + SUMMARY_METRICS + ['pass_rate']]
+
+
+def summary_details(df, stage_key):
+    """
+    SNumber 목록까지 포함한 summary_data를 요약 테이블(summary_table)과 같은 지그 키로 만드는 함수.
+    요약 테이블로 연 분석에서 한 날짜의 원본 행으로 셀 상세를 채울 때 씁니다.
+    Args:
+        df (pd.DataFrame): 공정 DataFrame. 전처리 결과가 제자리에 반영됩니다.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+    Returns:
+        dict: summarize_sn_state 형식의 summary_data.
+    """
+    jig_col = prepare_stage_frame(df, stage_key)
+    state = build_sn_state(df, jig_col, get_stage(stage_key)['date_col'], skip_blank_jig=True)
+    return summarize_sn_state(_table_jig_keys(state)) if not state.empty else {}
+
+
+def summary_from_table(table):
+    """
+    요약 테이블 행으로 analyze_stage와 같은 (summary_data, all_dates)를 만드는 함수.
+    셀에는 건수와 pass_rate만 있고 SNumber 목록(*_sns)은 없으므로, 목록이 필요하면 그 날짜의 원본 행으로 다시 집계합니다.
+    Args:
+        table (pd.DataFrame): summary_table 형식의 DataFrame.
+    Returns:
+        tuple: (summary_data, all_dates).
+    """
+    summary_data = {}
+    if table is None or table.empty:
+        return summary_data, []
+    dates = pd.to_datetime(table['date'])
+    for jig, day, total_test, pass_count, false_count, true_count, fail_count in zip(
+        table['jig'].tolist(),
+        dates.dt.strftime('%Y-%m-%d').tolist(),
+        *(table[metric].astype('int64').tolist() for metric in SUMMARY_METRICS),
+    ):
+        summary_data.setdefault(jig, {})[day] = _summary_cell(total_test, pass_count, false_count, true_count, fail_count)
+    return summary_data, _all_dates(dates)
+
+
+def _all_dates(date_series):
+    return pd.DatetimeIndex(date_series.dt.normalize().dropna().unique()).sort_values().date.tolist()
+
+
+def summarize_defects(df, jig_col, date_col, sn_col='SNumber', status_col='PassStatusNorm', skip_blank_jig=False):
+    """
+    (jig, 날짜)별 총 테스트/PASS/가성불량/진성불량/FAIL 건수와 SNumber 목록을 한 번에 계산하는 함수.
+    Args:
+        df (pd.DataFrame): date_col이 datetime으로 변환되고 status_col이 만들어진 DataFrame.
+        jig_col (str): 지그(PC) 컬럼명.
+        date_col (str): 날짜/시간 컬럼명.
+        sn_col (str): SNumber 컬럼명.
+        status_col (str): 'O'/'X'로 정규화된 Pass 상태 컬럼명.
+        skip_blank_jig (bool): True이면 공백 문자열 지그도 결측으로 보고 제외.
+    Returns:
+        tuple: (summary_data, all_dates). summary_data 형식은 summarize_sn_state 참고.
+    """
+    state = build_sn_state(df, jig_col, date_col, sn_col, status_col, skip_blank_jig)
+    return summarize_sn_state(state), _all_dates(df[date_col])
+
+
+def _shift_table(shifts):
+    table = sorted((float(start), name) for name, start in shifts)
+    starts = np.array([start for start, _ in table])
+    if len(starts) == 0 or starts[0] < 0 or starts[-1] >= 24 or len(np.unique(starts)) != len(starts):
+        raise ValueError(f"교대 시작 시각은 0 이상 24 미만의 서로 다른 값이어야 합니다: {shifts}")
+    return starts, [name for _, name in table]
+
+
+def bucket_times(times, granularity='day', shifts=DEFAULT_SHIFTS):
+    """
+    시각 Series를 집계 구간의 시작 시각으로 내리는 함수 (행 단위 반복 없이 floor/구간 나누기로 계산).
+    Args:
+        times (pd.Series): datetime Series.
+        granularity (str): 'hour', 'shift', 'day', 'week'(ISO 주, 월요일 시작), 'month'.
+        shifts (tuple): granularity='shift'일 때의 (이름, 시작 시각[시]) 목록.
+    Returns:
+        pd.Series: 각 행이 속한 구간의 시작 시각.
+    """
+    if granularity not in TIME_BUCKETS:
+        raise ValueError(f"알 수 없는 집계 단위입니다: {granularity}")
+    if granularity == 'hour':
+        return times.dt.floor('h')
+    day = times.dt.normalize()
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - pd.to_timedelta(day.dt.dayofweek, unit='D')
+    if granularity == 'month':
+        return day - pd.to_timedelta(day.dt.day - 1, unit='D')
+
+    # 교대: 하루 중 시각(시)이 어느 교대 시작 시각 구간에 드는지 찾는다
+    starts, _ = _shift_table(shifts)
+    hours = ((times - day) / pd.Timedelta(hours=1)).to_numpy()
+    slot = np.searchsorted(starts, hours, side='right') - 1
+    previous_day = slot < 0
+    slot[previous_day] = len(starts) - 1
+    offset = pd.to_timedelta(starts[slot], unit='h') - pd.to_timedelta(previous_day.astype('int64'), unit='D')
+    return day + offset
+
+
+def _bucket_labels(buckets, granularity, shifts):
+    if granularity == 'hour':
+        return buckets.dt.strftime('%Y-%m-%d %H시')
+    if granularity == 'shift':
+        starts, names = _shift_table(shifts)
+        hours = (buckets - buckets.dt.normalize()) / pd.Timedelta(hours=1)
+        shift_names = pd.Series(names, index=starts)
+        return buckets.dt.strftime('%Y-%m-%d ') + shift_names.reindex(hours.to_numpy()).to_numpy()
+    if granularity == 'week':
+        iso = buckets.dt.isocalendar()
+        return iso['year'].astype(str) + '-W' + iso['week'].astype(str).str.zfill(2)
+    if granularity == 'month':
+        return buckets.dt.strftime('%Y-%m')
+    return buckets.dt.strftime('%Y-%m-%d')
+
+
+@profiled('groupby.rollup_by_time')
+def rollup_by_time(df, jig_col, date_col, granularity='day', shifts=DEFAULT_SHIFTS, sn_col='SNumber',
+                   status_col='PassStatusNorm', skip_blank_jig=False):
+    """
+    (jig, 시간 구간)별 총 테스트/PASS/가성불량/진성불량/FAIL 건수를 계산하는 함수.
+    가성/진성 구분은 일별 리포트와 같이 (jig, 날짜) 안에서 그 SNumber가 'O'였는지로 정하므로,
+    시간/교대 구간을 더하면 일별 리포트의 건수와 같습니다.
+    Args:
+        df (pd.DataFrame): date_col이 datetime으로 변환되고 status_col이 만들어진 DataFrame.
+        jig_col (str): 지그(PC) 컬럼명.
+        date_col (str): 날짜/시간 컬럼명.
+        granularity (str): 집계 단위 (TIME_BUCKETS).
+        shifts (tuple): 교대 정의 (DEFAULT_SHIFTS 형식).
+        sn_col (str): SNumber 컬럼명.
+        status_col (str): 'O'/'X'로 정규화된 Pass 상태 컬럼명.
+        skip_blank_jig (bool): True이면 공백 문자열 지그도 결측으로 보고 제외.
+    Returns:
+        pd.DataFrame: jig, bucket(구간 시작 시각), label(표시용 구간 이름), SUMMARY_METRICS, pass_rate 컬럼의
+            긴 형식 표 (jig, bucket 순). Altair 차트에 바로 넘길 수 있습니다.
+    """
+    times = df[date_col]
+    jigs = df[jig_col]
+    valid = (times.notna() & jigs.notna()).to_numpy()
+    if skip_blank_jig:
+        valid = valid & (jigs.astype(str).str.strip() != '').to_numpy()
+
+    times = times[valid]
+    status = df[status_col].to_numpy()[valid]
+    frame = pd.DataFrame({
+        'jig': jigs.to_numpy()[valid],
+        'day': times.dt.normalize().to_numpy(),
+        'sn': df[sn_col].to_numpy()[valid],
+        'pass': status == 'O',
+        'fail': status == 'X',
+    })
+    # SNumber가 그날 그 지그에서 한 번이라도 'O'였는지 (SNumber가 없는 행은 항상 진성불량)
+    ever_passed = frame.groupby(['jig', 'day', 'sn'], sort=False, dropna=False)['pass'].transform('max').to_numpy()
+    ever_passed = ever_passed & frame['sn'].notna().to_numpy()
+
+    counts = pd.DataFrame({
+        'jig': frame['jig'],
+        'bucket': bucket_times(times, granularity, shifts).to_numpy(),
+        'total_test': 1,
+        'pass': frame['pass'].astype('int64'),
+        'false_defect': (frame['fail'].to_numpy() & ever_passed).astype('int64'),
+        'true_defect': (frame['fail'].to_numpy() & ~ever_passed).astype('int64'),
+    }).groupby(['jig', 'bucket'], sort=True).sum().reset_index()
+    counts['fail'] = counts['false_defect'] + counts['true_defect']
+    counts['pass_rate'] = (100 * counts['pass'] / counts['total_test']).round(1)
+    counts.insert(2, 'label', _bucket_labels(counts['bucket'], granularity, shifts))
+    return counts
+
+
+def _jig_rank(df, stage):
+    """지그 컬럼 후보 중 값이 있는 첫 컬럼의 순위(jig_cols 위치). 없으면 None"""
+    for rank, jig_col in enumerate(stage['jig_cols']):
+        if jig_col in df.columns and not df[jig_col].isna().all():
+            return rank
+    return None
+
+
+def resolve_jig_column(df, stage):
+    """
+    공정 정의의 지그 컬럼 후보 중 실제로 값이 있는 첫 컬럼을 고르는 함수.
+    쓸 수 있는 컬럼이 없으면 첫 후보 컬럼을 default_jig 값으로 채웁니다.
+    Args:
+        df (pd.DataFrame): 분석할 DataFrame. 필요하면 지그 컬럼이 추가/교체됩니다.
+        stage (dict): stages.STAGES의 공정 정의.
+    Returns:
+        str: 사용할 지그 컬럼명.
+    """
+    rank = _jig_rank(df, stage)
+    if rank is not None:
+        return stage['jig_cols'][rank]
+
+    jig_col = stage['jig_cols'][0]
+    df[jig_col] = stage['default_jig']
+    return jig_col
+
+
+def normalize_pass_status(series):
+    """
+    Pass 컬럼을 앞뒤 공백을 지운 대문자 문자열('O', 'X' 등)로 정규화하는 함수. 결측값은 ''가 됩니다.
+    Args:
+        series (pd.Series): Pass 컬럼. category로 압축된 컬럼도 받습니다.
+    Returns:
+        pd.Series: 정규화된 문자열 Series.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # 압축된 컬럼은 값 목록에 없는 ''로 채울 수 없으므로 먼저 일반 문자열로 되돌린다
+        series = series.astype(object)
+    return series.fillna('').astype(str).str.strip().str.upper()
+
+
+@profiled('prepare_stage_frame')
+def prepare_stage_frame(df, stage_key, jig_col=None, resolve_jig=True):
+    """
+    공정 정의에 따라 문자열 정리, 날짜 변환, PassStatusNorm 생성을 제자리에서 수행하는 함수.
+    Args:
+        df (pd.DataFrame): 공정 CSV에서 읽은 DataFrame.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        jig_col (str): 이미 정해 둔 지그 컬럼. DataFrame에 있으면 후보 탐색 없이 그대로 사용.
+        resolve_jig (bool): False이면 지그 컬럼을 고르지 않고(기본값도 채우지 않고) None을 반환.
+    Returns:
+        str: 분석에 사용할 지그 컬럼명.
+    """
+    stage = get_stage(stage_key)
+    if stage is None:
+        raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+
+    required_columns = ['SNumber', stage['date_col'], stage['pass_col']]
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"필수 컬럼이 없습니다: {missing_columns}")
+
+    # '="..."' 등으로 감싼 값을 열 단위로 한 번에 정리
+    clean_string_columns(df)
+
+    if not pd.api.types.is_datetime64_any_dtype(df[stage['date_col']]):
+        # 해석하지 못한 날짜 행 수는 화면에서 알릴 수 있도록 DataFrame에 남긴다
+        df[stage['date_col']], df.attrs['date_unparsed'] = decode_stage_datetime(df[stage['date_col']], stage['date_format'])
+    df['PassStatusNorm'] = normalize_pass_status(df[stage['pass_col']])
+
+    if not resolve_jig:
+        return None
+    if jig_col is not None and jig_col in df.columns:
+        return jig_col
+    return resolve_jig_column(df, stage)
+
+
+@profiled('analyze_stage')
+def analyze_stage(df, stage_key):
+    """
+    공정 레지스트리 정의를 따라 DataFrame을 전처리하고 (jig, 날짜)별 불량 분류를 계산하는 함수.
+    Args:
+        df (pd.DataFrame): 공정 CSV에서 읽은 DataFrame. 전처리 결과가 제자리에 반영됩니다.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+    Returns:
+        tuple: (summary_data, all_dates). 형식은 summarize_defects와 동일.
+    """
+    jig_col = prepare_stage_frame(df, stage_key)
+    stage = get_stage(stage_key)
+    return summarize_defects(df, jig_col, stage['date_col'], skip_blank_jig=True)
+
+
+def analyze_stage_timeseries(df, stage_key, granularity='day', shifts=DEFAULT_SHIFTS):
+    """
+    공정 데이터를 시간 구간별로 집계하는 함수. 아직 전처리하지 않은 DataFrame이면 analyze_stage와 같이 전처리합니다.
+    Args:
+        df (pd.DataFrame): 공정 DataFrame (analyze_stage를 거친 DataFrame도 가능).
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        granularity (str): 집계 단위 (TIME_BUCKETS).
+        shifts (tuple): 교대 정의 (DEFAULT_SHIFTS 형식).
+    Returns:
+        pd.DataFrame: rollup_by_time 결과.
+    """
+    stage = get_stage(stage_key)
+    if stage is None:
+        raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+    if 'PassStatusNorm' in df.columns and pd.api.types.is_datetime64_any_dtype(df[stage['date_col']]):
+        jig_col = resolve_jig_column(df, stage)
+    else:
+        jig_col = prepare_stage_frame(df, stage_key)
+    return rollup_by_time(df, jig_col, stage['date_col'], granularity, shifts, skip_blank_jig=True)
+
+
+class IncrementalAnalyzer:
+    """
+    새로 들어온 행이 있는 날짜만 다시 계산하는 공정 분석기.
+    날짜별 (jig, 날짜, SNumber) 집계 상태를 보관하므로, 며칠치 데이터에 하루치 파일을 추가해도
+    전체를 다시 분석하지 않고 그 날짜의 셀만 summary_data에 덮어씁니다.
+    결과는 analyze_stage(전체 행)와 같습니다.
+    """
+
+    def __init__(self, stage_key, pin_jig_col=False):
+        """
+        Args:
+            stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+            pin_jig_col (bool): True이면 지금까지 넣은 행 전체를 한 DataFrame으로 본 것처럼 지그 컬럼을 고름.
+                한 파일을 chunk로 나눠 append로 넣을 때 chunk마다 다른 후보 컬럼이 골라지지 않게 합니다.
+        """
+        if get_stage(stage_key) is None:
+            raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+        self.stage_key = stage_key
+        self.pin_jig_col = pin_jig_col
+        self.jig_col = None
+        self._jig_rank = None
+        self.summary_data = {}
+        self._day_states = {}
+        self._dates = set()
+        self._pending = set()
+        self._next_seq = 0
+
+    @property
+    def all_dates(self):
+        return sorted(self._dates)
+
+    def result(self):
+        """analyze_stage와 같은 (summary_data, all_dates) 튜플을 반환"""
+        return self.summary_data, self.all_dates
+
+    def update(self, df, mode='replace', summarize=True):
+        """
+        새 행을 반영하고 영향을 받은 날짜의 셀만 다시 계산하는 함수.
+        Args:
+            df (pd.DataFrame): 공정 CSV에서 읽은 새 행. 전처리 결과가 제자리에 반영됩니다.
+            mode (str): 'replace'이면 새 행에 있는 날짜의 기존 데이터를 새 행으로 교체(같은 날짜 파일을 다시 올린 경우),
+                'append'이면 기존 데이터에 더합니다(같은 날짜의 추가 로그).
+            summarize (bool): False이면 집계 상태만 갱신하고 셀 계산은 다음 refresh()까지 미룹니다.
+        Returns:
+            list: 새 행에 있는 날짜(datetime.date) 목록.
+        """
+        if mode not in ('replace', 'append'):
+            raise ValueError(f"알 수 없는 mode입니다: {mode}")
+
+        if self.pin_jig_col:
+            jig_col, frame = self._pinned_jig_frame(df)
+        else:
+            jig_col = prepare_stage_frame(df, self.stage_key)
+            frame = df
+        date_col = get_stage(self.stage_key)['date_col']
+        new_state = build_sn_state(frame, jig_col, date_col, skip_blank_jig=True, seq_offset=self._next_seq)
+        self._next_seq += len(df)
+
+        affected = _all_dates(df[date_col])
+        new_days = {day: state for day, state in new_state.groupby('date', sort=False)}
+        for day in affected:
+            key = pd.Timestamp(day)
+            state = new_days.get(key, _empty_sn_state())
+            if mode == 'append' and key in self._day_states:
+                state = merge_sn_state(self._day_states[key], state)
+            if state.empty:
+                self._day_states.pop(key, None)
+            else:
+                self._day_states[key] = state.reset_index(drop=True)
+
+        self._dates.update(affected)
+        self._pending.update(affected)
+        if summarize:
+            self.refresh()
+        return affected
+
+    def _pinned_jig_frame(self, df):
+        """
+        지금까지 들어온 행 전체에서 analyze_stage(resolve_jig_column)가 고를 지그 컬럼과 집계에 쓸 DataFrame을 반환.
+        값이 있는 후보 중 가장 앞선 컬럼을 쓰고, 더 앞선 후보에 처음 값이 나타나면 그때까지의 집계를 버립니다
+        (이전 행은 그 컬럼이 비어 있으므로 전체 분석에서도 제외되는 행). 아직 값이 있는 후보가 없으면
+        기본 지그로 집계하되 chunk에는 기본값을 쓰지 않습니다.
+        """
+        stage = get_stage(self.stage_key)
+        prepare_stage_frame(df, self.stage_key, resolve_jig=False)
+        rank = _jig_rank(df, stage)
+        if rank is not None and (self._jig_rank is None or rank < self._jig_rank):
+            self._jig_rank = rank
+            self._day_states.clear()
+            self.summary_data = {}
+            self._pending.update(self._dates)
+
+        if self._jig_rank is None:
+            jig_col = stage['jig_cols'][0]
+            self.jig_col = jig_col
+            return jig_col, df.assign(**{jig_col: stage['default_jig']})
+        jig_col = stage['jig_cols'][self._jig_rank]
+        self.jig_col = jig_col
+        if jig_col not in df.columns:
+            # 이 chunk에는 지그 컬럼이 없으므로 전체 분석에서처럼 모든 행이 제외된다
+            return jig_col, df.assign(**{jig_col: None})
+        return jig_col, df
+
+    def refresh(self):
+        """ 아직 셀을 다시 계산하지 않은 날짜를 summary_data에 반영 """
+        if self._pending:
+            self._patch_summary(sorted(self._pending))
+            self._pending.clear()
+
+    def _patch_summary(self, affected):
+        day_strs = {day.strftime("%Y-%m-%d") for day in affected}
+        for jig in list(self.summary_data):
+            cells = self.summary_data[jig]
+            for day_str in day_strs & cells.keys():
+                del cells[day_str]
+            if not cells:
+                del self.summary_data[jig]
+
+        # 날짜 단위로 계산해 중간 결과가 한 날짜 크기를 넘지 않게 한다
+        for key in map(pd.Timestamp, affected):
+            if key not in self._day_states:
+                continue
+            for jig, cells in summarize_sn_state(self._day_states[key]).items():
+                self.summary_data.setdefault(jig, {}).update(cells)
+
+        # summarize_sn_state와 같은 jig/날짜 정렬 순서를 유지
+        self.summary_data = {
+            jig: dict(sorted(self.summary_data[jig].items()))
+            for jig in sorted(self.summary_data)
+        }
+
+
+def analyze_stage_chunks(chunks, stage_key, on_chunk=None):
+    """
+    DataFrame chunk를 하나씩 전처리해 집계 상태에 더하는 스트리밍 분석 함수.
+    chunk는 처리 후 바로 버리므로 메모리에는 chunk 하나와 (jig, 날짜, SNumber) 집계 상태만 남습니다.
+    지그 컬럼은 전체 행을 한 번에 분석할 때(analyze_stage)와 같은 컬럼을 고릅니다.
+    Args:
+        chunks (iterable): DataFrame chunk (db_utils.iter_stage_csv_chunks, db_source.iter_stage_chunks 등).
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        on_chunk (callable): 전처리가 끝난 chunk마다 chunk 번호와 함께 호출 (예: 저장소 적재).
+    Returns:
+        tuple: (summary_data, all_dates, row_count). summary_data, all_dates는 analyze_stage와 동일.
+    """
+    analyzer = IncrementalAnalyzer(stage_key, pin_jig_col=True)
+    row_count = 0
+    for index, chunk in enumerate(chunks):
+        analyzer.update(chunk, mode='append', summarize=False)
+        row_count += len(chunk)
+        if on_chunk is not None:
+            on_chunk(index, chunk)
+    analyzer.refresh()
+    summary_data, all_dates = analyzer.result()
+    return summary_data, all_dates, row_count
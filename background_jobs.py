@@ -0,0 +1,123 @@
+#
+# background_jobs.py
+# 오래 걸리는 파싱/분석을 Streamlit 스크립트 밖의 스레드 풀에서 실행하는 작업 실행기입니다.
+#   - JobRunner는 프로세스에 하나만 만들어 두고(streamlit_app에서 st.cache_resource) 재실행과 상관없이 작업을 이어갑니다.
+#   - 작업 함수는 첫 인자로 Job을 받아 처리한 행 수를 job.report()로 알리고, 그때 취소 요청이 있으면 JobCancelled로 멈춥니다.
+#   - 작업 함수는 session_state를 건드리지 않고 결과를 반환만 합니다. 결과 반영은 재실행 중인 스크립트가 합니다.
+#   - 성능 측정(profiling.collect) 중에 시작한 작업은 작업 스레드에서도 구간을 모아 job.spans에 남깁니다
+#     (ContextVar는 스레드 풀로 넘어가지 않으므로). 결과를 반영할 때 profiling.add_spans(job.spans)로 표에 더합니다.
+
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import profiling
+
+DEFAULT_WORKERS = 2
+
+
+class JobCancelled(Exception):
+    """사용자가 취소한 작업에서 발생하는 예외"""
+
+
+class Job:
+    """백그라운드 작업 하나의 진행 상황, 취소 요청, 결과"""
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): 화면에 표시할 작업 이름.
+        """
+        self.name = name
+        self.rows = 0
+        self.phase = '대기 중'
+        self.started = time.time()
+        self.finished = None
+        self.future = None
+        self.spans = []
+        self._cancel = threading.Event()
+
+    def report(self, rows=None, phase=None):
+        """
+        작업 함수가 진행 상황을 알리는 함수. 취소 요청이 있으면 JobCancelled를 발생시킵니다.
+        Args:
+            rows (int): 지금까지 처리한 행 수.
+            phase (str): 현재 단계 (예: '파싱', '분석', '적재').
+        """
+        if rows is not None:
+            self.rows = rows
+        if phase is not None:
+            self.phase = phase
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        """취소를 요청하는 함수. 시작 전이면 바로 취소되고, 실행 중이면 다음 report()에서 멈춥니다."""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.finished = time.time()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    @property
+    def status(self):
+        """'queued', 'running', 'done', 'cancelled', 'failed' 중 하나"""
+        if self.future is None or not self.future.done():
+            return 'running' if self.future is not None and self.future.running() else 'queued'
+        if self.future.cancelled():
+            return 'cancelled'
+        error = self.future.exception()
+        if isinstance(error, JobCancelled):
+            return 'cancelled'
+        return 'failed' if error is not None else 'done'
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    def result(self):
+        """작업 함수의 반환값. 실패했으면 그 예외를, 취소됐으면 JobCancelled를 발생시킵니다."""
+        try:
+            return self.future.result()
+        except CancelledError:
+            raise JobCancelled() from None
+
+
+class JobRunner:
+    """스레드 풀 위에서 Job을 실행하는 실행기. 여러 세션이 하나를 같이 씁니다."""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        func(job, *args, **kwargs)를 백그라운드에서 실행하는 함수.
+        Args:
+            name (str): 화면에 표시할 작업 이름.
+            func (callable): 작업 함수. 첫 인자로 Job을 받습니다.
+        Returns:
+            Job: 진행 상황을 보거나 취소할 때 쓰는 객체 (session_state에 보관).
+        """
+        job = Job(name)
+        job.future = self._executor.submit(self._run, job, func, args, kwargs, profiling.collecting())
+        return job
+
+    @staticmethod
+    def _run(job, func, args, kwargs, collect_log):
+        job.started = time.time()
+        try:
+            job.report(phase='시작')
+            if collect_log is None:
+                return func(job, *args, **kwargs)
+            with profiling.collect(log=collect_log) as spans:
+                job.spans = spans
+                with profiling.span('job', job=job.name):
+                    return func(job, *args, **kwargs)
+        finally:
+            job.finished = time.time()
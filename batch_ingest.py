@@ -0,0 +1,131 @@
+#
+# batch_ingest.py
+# 여러 공정 파일을 한 번에 받아 프로세스 풀에서 동시에 파싱/분석/저장소 적재를 수행합니다.
+# 공정마다 독립적인 CPU 작업이므로 파일 5개를 차례로 처리하는 대신 병렬로 처리하고,
+# 끝나는 순서대로 결과와 단계별 소요 시간을 돌려줍니다.
+
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analysis_engine import analyze_stage
+from columnar_store import STORE_DIR, ingest_stage_frame, write_stage_summaries
+from db_utils import HEADER_SAMPLE_BYTES, find_header_offset
+from dtype_optimizer import optimize_stage_frame
+from parsed_cache import CACHE_DIR, content_hash, read_stage_csv_cached
+from stages import STAGES
+
+
+def detect_stage(raw_bytes):
+    """
+    파일 앞부분의 헤더 키워드로 어느 공정 파일인지 판별하는 함수.
+    Args:
+        raw_bytes (bytes): 업로드 파일의 원시 바이트.
+    Returns:
+        str: 공정 키. 어느 공정과도 맞지 않으면 None 반환.
+    """
+    sample = raw_bytes[:HEADER_SAMPLE_BYTES]
+    for stage_key, stage in STAGES.items():
+        for encoding in stage['encodings']:
+            try:
+                offset = find_header_offset(sample, stage['keywords'], encoding,
+                                            stage['header_rows'], stage['partial_match'])
+            except (UnicodeError, LookupError):
+                continue
+            if offset is not None:
+                return stage_key
+    return None
+
+
+def ingest_stage_file(stage_key, file_name, raw_bytes, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+    """
+    공정 파일 하나를 파싱(디스크 캐시 사용), 분석, 저장소 적재까지 처리하는 함수. 프로세스 풀의 작업 단위입니다.
+    Args:
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        file_name (str): 원본 파일 이름 (표시용).
+        raw_bytes (bytes): 업로드 파일의 원시 바이트.
+        cache_dir (str): 파싱 결과 캐시 디렉터리.
+        store_dir (str): Parquet 저장소 디렉터리.
+    Returns:
+        dict: stage_key, file_name, df, analysis(summary_data, all_dates), dtype_report, timings(단계별 초), error.
+            실패하면 df와 analysis는 None이고 error에 메시지가 들어갑니다.
+    """
+    result = {'stage_key': stage_key, 'file_name': file_name, 'df': None, 'analysis': None,
+              'dtype_report': None, 'timings': {}, 'error': None}
+    timings = result['timings']
+    started = time.perf_counter()
+    try:
+        step = time.perf_counter()
+        digest = content_hash(raw_bytes)
+        df = read_stage_csv_cached(io.BytesIO(raw_bytes), stage_key, cache_dir, digest=digest)
+        timings['parse'] = time.perf_counter() - step
+        if df is None:
+            result['error'] = f"{stage_key.upper()} 데이터 파일을 읽을 수 없습니다. 파일 형식을 확인해주세요."
+            return result
+
+        step = time.perf_counter()
+        analysis = analyze_stage(df, stage_key)
+        timings['analyze'] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        written = ingest_stage_frame(df, stage_key, digest, store_dir)
+        write_stage_summaries(stage_key, written, store_dir)
+        timings['store'] = time.perf_counter() - step
+
+        # dtype을 압축해 두면 메인 프로세스로 돌려보내는 데이터도 줄어든다
+        step = time.perf_counter()
+        result['dtype_report'] = optimize_stage_frame(df, stage_key)
+        timings['compact'] = time.perf_counter() - step
+
+        result['df'], result['analysis'] = df, analysis
+    except Exception as e:
+        result['error'] = f"분석 중 오류 발생: {e}"
+    finally:
+        timings['total'] = time.perf_counter() - started
+    return result
+
+
+def ingest_stages_parallel(files, max_workers=None, cache_dir=CACHE_DIR, store_dir=STORE_DIR):
+    """
+    여러 공정 파일을 프로세스 풀에서 동시에 처리하고, 끝나는 순서대로 결과를 돌려주는 제너레이터.
+    Streamlit 서버는 여러 스레드를 쓰므로 fork 대신 spawn으로 작업 프로세스를 만듭니다.
+    Args:
+        files (dict): 공정 키 -> (파일 이름, 원시 바이트).
+        max_workers (int): 작업 프로세스 수. None이면 min(파일 수, CPU 수).
+        cache_dir (str): 파싱 결과 캐시 디렉터리.
+        store_dir (str): Parquet 저장소 디렉터리.
+    Yields:
+        dict: ingest_stage_file의 결과. timings에 대기 시간을 포함한 'wall'(요청부터 완료까지 초)이 추가됩니다.
+    """
+    if not files:
+        return
+    if max_workers is None:
+        max_workers = min(len(files), os.cpu_count() or 1)
+
+    submitted = time.perf_counter()
+    if max_workers <= 1:
+        # 작업 프로세스를 하나만 쓸 수 있으면 프로세스 생성/결과 전송 비용 없이 현재 프로세스에서 처리
+        for stage_key, (file_name, raw_bytes) in files.items():
+            result = ingest_stage_file(stage_key, file_name, raw_bytes, cache_dir, store_dir)
+            result['timings']['wall'] = time.perf_counter() - submitted
+            yield result
+        return
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(ingest_stage_file, stage_key, file_name, raw_bytes, cache_dir, store_dir): stage_key
+            for stage_key, (file_name, raw_bytes) in files.items()
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # 작업 프로세스가 비정상 종료한 경우
+                stage_key = futures[future]
+                result = {'stage_key': stage_key, 'file_name': files[stage_key][0], 'df': None, 'analysis': None,
+                          'dtype_report': None, 'timings': {}, 'error': f"분석 중 오류 발생: {e}"}
+            result['timings']['wall'] = time.perf_counter() - submitted
+            yield result
@@ -0,0 +1,62 @@
+# bench_clean.py
+# db_utils.clean_string_format(셀 단위 apply)과
+# db_utils.clean_string_columns(열 단위 문자열 연산)의 넓은 DataFrame 처리 시간을 비교합니다.
+# 무작위 입력에 대한 결과 동일성은 tests/test_db_utils.py에서 pytest로 확인합니다.
+#
+# 사용법: python benchmarks/bench_clean.py --rows 200000 --cols 40
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_utils import clean_string_format, clean_string_columns
+
+
+def make_wide_frame(rows, cols):
+    frame = {}
+    for c in range(cols):
+        if c % 4 == 0:
+            frame[f'col{c}'] = [f'="{i:08d}"' for i in range(rows)]
+        elif c % 4 == 1:
+            frame[f'col{c}'] = ['O' if i % 13 else 'X' for i in range(rows)]
+        elif c % 4 == 2:
+            frame[f'col{c}'] = [f'"PC{i % 40}"' for i in range(rows)]
+        else:
+            frame[f'col{c}'] = np.arange(rows, dtype=float)
+    return pd.DataFrame(frame).astype({f'col{c}': object for c in range(cols) if c % 4 != 3})
+
+
+def main():
+    parser = argparse.ArgumentParser(description='clean_string_format 벡터화 시간 비교')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--cols', type=int, default=40)
+    args = parser.parse_args()
+
+    df = make_wide_frame(args.rows, args.cols)
+    object_cols = [c for c in df.columns if df[c].dtype == object]
+
+    start = time.perf_counter()
+    legacy = df.copy()
+    for col in object_cols:
+        legacy[col] = legacy[col].apply(clean_string_format)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = clean_string_columns(df.copy())
+    vector_time = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(legacy[object_cols].astype(object), vectorized[object_cols].astype(object))
+    print(f"rows={args.rows:,} cols={args.cols}")
+    print(f"apply      : {legacy_time:.3f}s")
+    print(f"vectorized : {vector_time:.3f}s")
+    print(f"speedup    : {legacy_time / vector_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# bench_encoding.py
+# 인코딩이 다른 합성 SemiAssy 파일(cp949, euc-kr, utf-8, utf-8-sig)을 db_utils.read_stage_csv로 읽는 시간과
+# 전체 파싱(read_csv) 횟수를 잽니다. 비교용으로 인코딩 후보마다 파일 전체를 파싱해 보던 이전 방식(legacy)도 함께 잽니다.
+#
+# 사용법: python benchmarks/bench_encoding.py --rows 1000000 --encodings cp949 utf-8
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import profiling
+from db_utils import _has_stage_columns, _tidy_stage_columns, read_csv_from_header, read_stage_csv
+from mes_synth import stage_csv_bytes
+from stages import STAGES
+
+STAGE_KEY = 'semi'
+DEFAULT_ENCODINGS = ['cp949', 'euc-kr', 'utf-8', 'utf-8-sig']
+
+
+class _Upload:
+    """Streamlit UploadedFile처럼 getvalue()로 파일 전체 바이트를 돌려주는 객체"""
+    def __init__(self, data):
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+
+def legacy_read_stage_csv(uploaded_file, stage_key):
+    """인코딩 후보를 순서대로 하나씩 골라 파일 전체를 파싱해 보던 이전 방식"""
+    stage = STAGES[stage_key]
+    for encoding in stage['encodings']:
+        try:
+            with profiling.span('read_csv', encoding=encoding):
+                df = read_csv_from_header(uploaded_file, stage['keywords'], encoding=encoding,
+                                          max_rows=stage['header_rows'], partial_match=stage['partial_match'],
+                                          **stage['read_options'])
+        except Exception:
+            continue
+        if df is None:
+            continue
+        df = _tidy_stage_columns(df)
+        if _has_stage_columns(df, stage):
+            return df
+    return None
+
+
+def bench(reader, upload, repeat):
+    """best 시간(초)과 한 번 읽을 때의 read_csv 시도(인코딩) 목록을 반환"""
+    best, attempts = None, []
+    for _ in range(repeat):
+        with profiling.collect() as spans:
+            start = time.perf_counter()
+            df = reader(upload, STAGE_KEY)
+            seconds = time.perf_counter() - start
+        if df is None:
+            raise RuntimeError('파일을 읽지 못했습니다.')
+        best = seconds if best is None else min(best, seconds)
+        attempts = [record['encoding'] for record in spans if record['name'] == 'read_csv']
+    return best, attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='공정 CSV 인코딩 판정/로딩 벤치마크')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--encodings', nargs='+', default=DEFAULT_ENCODINGS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'encoding':<10} {'reader':<8} {'best s':>8} {'parses':>7}  attempts")
+    for encoding in args.encodings:
+        upload = _Upload(stage_csv_bytes(STAGE_KEY, args.rows, args.seed, encoding=encoding))
+        for label, reader in (('legacy', legacy_read_stage_csv), ('current', read_stage_csv)):
+            best, attempts = bench(reader, upload, args.repeat)
+            print(f"{encoding:<10} {label:<8} {best:>8.3f} {len(attempts):>7}  {', '.join(attempts)}")
+
+
+if __name__ == '__main__':
+    main()
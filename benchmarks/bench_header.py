@@ -0,0 +1,94 @@
+# bench_header.py
+# 기존 방식(100줄 선파싱 + iterrows + 전체 재파싱)과
+# 바이트 단위 헤더 탐색 + 단일 read_csv 방식의 로딩 시간을 비교합니다.
+#
+# 사용법: python benchmarks/bench_header.py --rows 1000000
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_utils import read_csv_from_header
+
+KEYWORDS = ['SNumber', 'FwStamp', 'FwPC', 'FwPass']
+
+
+class _Upload:
+    """Streamlit UploadedFile처럼 getvalue()만 제공하는 객체"""
+    def __init__(self, data):
+        self._data = data
+
+    def getvalue(self):
+        return self._data
+
+
+def make_synthetic_csv(rows):
+    """헤더 앞에 잡음 줄이 있는 Fw 형식의 CSV 바이트를 생성하는 함수"""
+    lines = [
+        'MES Export,,,,',
+        'Exported at,2024-01-01 00:00:00,,,',
+        ',,,,',
+        'SNumber,FwStamp,FwPC,FwPass,FwVersion',
+    ]
+    for i in range(rows):
+        lines.append(
+            f'="SN{i:08d}",2024-01-{i % 28 + 1:02d} {i % 24:02d}:00:00,PC{i % 40:02d},{"X" if i % 17 == 0 else "O"},1.{i % 9}'
+        )
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def legacy_read(uploaded_file, keywords):
+    """기존 read_csv_with_dynamic_header_for_* 구현 (비교용)"""
+    file_content = io.BytesIO(uploaded_file.getvalue())
+    df_temp = pd.read_csv(file_content, header=None, nrows=100, encoding='utf-8')
+
+    header_row = None
+    for i, row in df_temp.iterrows():
+        row_values = [str(x).strip() for x in row.values if pd.notna(x)]
+        if all(keyword in row_values for keyword in keywords):
+            header_row = i
+            break
+
+    if header_row is None:
+        return None
+    file_content.seek(0)
+    return pd.read_csv(file_content, header=header_row, encoding='utf-8')
+
+
+def time_it(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='헤더 탐색 방식별 CSV 로딩 시간 비교')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    upload = _Upload(make_synthetic_csv(args.rows))
+    print(f"rows={args.rows:,} size={len(upload.getvalue()) / 1e6:.1f} MB")
+
+    old_time, old_df = time_it(lambda: legacy_read(upload, KEYWORDS), args.repeat)
+    new_time, new_df = time_it(lambda: read_csv_from_header(upload, KEYWORDS), args.repeat)
+
+    pd.testing.assert_frame_equal(old_df, new_df)
+    print(f"legacy   : {old_time:.3f}s")
+    print(f"sniffer  : {new_time:.3f}s")
+    print(f"speedup  : {old_time / new_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# bench_stream_memory.py
+# 전체 로딩(read_stage_csv + analyze_stage)과 chunk 스트리밍(iter_stage_csv_chunks + analyze_stage_chunks)의
+# 최대 메모리(RSS)와 시간을 파일 크기별로 비교합니다.
+# 각 측정은 별도 프로세스에서 실행하므로 서로의 메모리 사용량이 섞이지 않습니다.
+# 스트리밍 방식의 최대 메모리는 파일 크기가 커져도 거의 늘지 않아야 합니다.
+#
+# 사용법: python benchmarks/bench_stream_memory.py --rows 200000 1000000 3000000
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STAGE_KEY = 'fw'
+BLOCK_ROWS = 100000
+MEASURE_COLS = 20
+
+
+class _FileUpload:
+    """Streamlit UploadedFile처럼 getvalue()로 파일 전체 바이트를 돌려주는 객체"""
+    def __init__(self, path):
+        self._path = path
+
+    def getvalue(self):
+        with open(self._path, 'rb') as f:
+            return f.read()
+
+
+def write_synthetic_csv(path, rows):
+    """
+    헤더 앞에 잡음 줄이 있는 Fw 형식 CSV를 BLOCK_ROWS 행씩 파일에 쓰는 함수.
+    실제 MES 내보내기처럼 시간 순서로 28일에 걸쳐 있고, SNumber마다 재검사 포함 3번 테스트하며,
+    측정값 컬럼 MEASURE_COLS개가 붙어 있습니다.
+    """
+    measure_header = ','.join(f'FwMeasure{m:02d}' for m in range(MEASURE_COLS))
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('MES Export,,,,\nExported at,2024-01-01 00:00:00,,,\n,,,,\n')
+        f.write(f'SNumber,FwStamp,FwPC,FwPass,FwVersion,{measure_header}\n')
+        for start in range(0, rows, BLOCK_ROWS):
+            lines = []
+            for i in range(start, min(start + BLOCK_ROWS, rows)):
+                seconds = i * (28 * 86400) // rows
+                day, hour, minute = seconds // 86400 + 1, seconds // 3600 % 24, seconds // 60 % 60
+                measures = ','.join(f'{(i * 7 + m) % 1000 / 10:.1f}' for m in range(MEASURE_COLS))
+                lines.append(
+                    f'="SN{i // 3:08d}",2024-01-{day:02d} {hour:02d}:{minute:02d}:00,'
+                    f'PC{i // 3 % 40:02d},{"O" if i % 3 == 2 else "X"},1.{i % 9},{measures}\n'
+                )
+            f.write(''.join(lines))
+
+
+def _peak_rss_mb():
+    # Linux의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, path, chunksize):
+    """한 가지 방식으로 분석하고 'mode 시간 최대RSS 셀수'를 출력 (자식 프로세스에서 실행)"""
+    from analysis_engine import analyze_stage, analyze_stage_chunks
+    from db_utils import iter_stage_csv_chunks, read_stage_csv
+
+    start = time.perf_counter()
+    if mode == 'full':
+        df = read_stage_csv(_FileUpload(path), STAGE_KEY)
+        summary_data, _ = analyze_stage(df, STAGE_KEY)
+    else:
+        summary_data, _, _ = analyze_stage_chunks(iter_stage_csv_chunks(path, STAGE_KEY, chunksize), STAGE_KEY)
+    elapsed = time.perf_counter() - start
+
+    cells = sum(len(dates) for dates in summary_data.values())
+    print(f"{mode} {elapsed:.3f} {_peak_rss_mb():.1f} {cells}")
+
+
+def measure(mode, path, chunksize):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode, '--path', path, '--chunksize', str(chunksize)],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(output[1]), float(output[2]), int(output[3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전체 로딩과 chunk 스트리밍의 최대 메모리 비교')
+    parser.add_argument('--rows', type=int, nargs='+', default=[200_000, 1_000_000, 3_000_000])
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--child', choices=['full', 'stream'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_mode(args.child, args.path, args.chunksize)
+        return
+
+    print(f"{'rows':>12} {'file MB':>9} {'full s':>8} {'full MB':>9} {'stream s':>9} {'stream MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            path = os.path.join(tmp_dir, f'fw_{rows}.csv')
+            write_synthetic_csv(path, rows)
+            full_time, full_rss, full_cells = measure('full', path, args.chunksize)
+            stream_time, stream_rss, stream_cells = measure('stream', path, args.chunksize)
+            assert full_cells == stream_cells
+            size_mb = os.path.getsize(path) / 1e6
+            print(f"{rows:>12,} {size_mb:>9.1f} {full_time:>8.2f} {full_rss:>9.1f} {stream_time:>9.2f} {stream_rss:>10.1f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
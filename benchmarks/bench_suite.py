@@ -0,0 +1,178 @@
+# bench_suite.py
+# 공정별 리더(read_csv_with_dynamic_header*), process_uploaded_csv, analyze_* 함수의 처리 시간을
+# 합성 MES 파일(mes_synth.py)로 행 수별로 측정하고 결과를 JSON으로 저장합니다.
+# 이전 결과 JSON을 --baseline으로 주면 항목별 시간 비율을 출력하고, 기준보다 느려진 항목이 있으면 종료 코드 1을 반환합니다.
+#
+# 사용법: python benchmarks/bench_suite.py --rows 10000 100000 1000000 10000000 --output results.json
+#         python benchmarks/bench_suite.py --rows 100000 --stages fw semi --baseline results.json
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import csv2
+import csv_Batadc
+import csv_Fw
+import csv_RfTx
+import csv_Semi
+from db_utils import process_uploaded_csv
+from mes_synth import write_stage_csv
+from stages import STAGES
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+# 이 행 수를 넘으면 반복 없이 한 번만 측정
+SINGLE_RUN_ROWS = 1_000_000
+
+# 공정 키 -> (리더 함수, 분석 함수)
+STAGE_FUNCTIONS = {
+    'pcb': (csv2.read_csv_with_dynamic_header, csv2.analyze_data),
+    'fw': (csv_Fw.read_csv_with_dynamic_header_for_Fw, csv_Fw.analyze_Fw_data),
+    'rftx': (csv_RfTx.read_csv_with_dynamic_header_for_RfTx, csv_RfTx.analyze_RfTx_data),
+    'semi': (csv_Semi.read_csv_with_dynamic_header_for_Semi, csv_Semi.analyze_Semi_data),
+    'func': (csv_Batadc.read_csv_with_dynamic_header_for_Batadc, csv_Batadc.analyze_Batadc_data),
+}
+
+
+class _Upload:
+    """Streamlit UploadedFile처럼 getvalue()로 파일 전체 바이트를 돌려주는 객체"""
+    def __init__(self, data, name):
+        self._data = data
+        self.name = name
+
+    def getvalue(self):
+        return self._data
+
+
+def _timed_runs(func, repeat, setup=None):
+    """func을 repeat번 실행해 각 실행 시간(초) 목록을 반환. setup 결과가 있으면 인자로 넘기며, setup 시간은 빼고 잰다"""
+    runs = []
+    for _ in range(repeat):
+        args = (setup(),) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def bench_stage(stage_key, rows, path, repeat):
+    """공정 하나, 행 수 하나에 대해 리더/process_uploaded_csv/분석 시간을 측정"""
+    reader, analyzer = STAGE_FUNCTIONS[stage_key]
+    with open(path, 'rb') as f:
+        upload = _Upload(f.read(), os.path.basename(path))
+    parsed = reader(upload)
+
+    cases = [
+        ('read', reader.__module__ + '.' + reader.__name__, lambda: reader(upload), None),
+        ('process', 'db_utils.process_uploaded_csv', lambda: process_uploaded_csv(upload, stage_key), None),
+        # 분석 함수는 DataFrame을 제자리에서 전처리하므로 매번 새 복사본을 넘긴다 (복사 시간은 제외)
+        ('analyze', analyzer.__module__ + '.' + analyzer.__name__, analyzer, parsed.copy),
+    ]
+    results = []
+    for benchmark, function, func, setup in cases:
+        runs = _timed_runs(func, repeat, setup)
+        results.append({
+            'stage': stage_key,
+            'benchmark': benchmark,
+            'function': function,
+            'rows': rows,
+            'file_mb': round(len(upload.getvalue()) / 1e6, 2),
+            'best_s': round(min(runs), 4),
+            'mean_s': round(float(np.mean(runs)), 4),
+            'runs_s': [round(run, 4) for run in runs],
+        })
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment():
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _result_key(result):
+    return result['stage'], result['benchmark'], result['rows']
+
+
+def compare(results, baseline_path, threshold):
+    """기준 결과와 항목별 best 시간 비율을 출력하고, threshold 넘게 느려진 항목 수를 반환"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {_result_key(result): result for result in json.load(f)['results']}
+    regressions = 0
+    print(f"\n{'stage':<6} {'benchmark':<9} {'rows':>12} {'base s':>9} {'now s':>9} {'ratio':>7}")
+    for result in results:
+        base = baseline.get(_result_key(result))
+        if base is None:
+            continue
+        ratio = result['best_s'] / base['best_s'] if base['best_s'] > 0 else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = '  <- 느려짐'
+        print(f"{result['stage']:<6} {result['benchmark']:<9} {result['rows']:>12,} {base['best_s']:>9.3f} {result['best_s']:>9.3f} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='공정별 리더/분석 함수 벤치마크 (JSON 결과 저장)')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help=f'{SINGLE_RUN_ROWS:,}행 이하에서 반복 측정 횟수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='결과 JSON 경로 (기본: benchmarks/results/bench-<시각>.json)')
+    parser.add_argument('--baseline', help='비교할 이전 결과 JSON')
+    parser.add_argument('--threshold', type=float, default=0.2, help='이 비율 넘게 느려지면 회귀로 판단 (기본 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'stage':<6} {'benchmark':<9} {'rows':>12} {'file MB':>8} {'best s':>9} {'rows/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            repeat = args.repeat if rows <= SINGLE_RUN_ROWS else 1
+            for stage_key in args.stages:
+                path = write_stage_csv(os.path.join(tmp_dir, f'{stage_key}_{rows}.csv'), stage_key, rows, args.seed)
+                for result in bench_stage(stage_key, rows, path, repeat):
+                    results.append(result)
+                    print(f"{result['stage']:<6} {result['benchmark']:<9} {rows:>12,} {result['file_mb']:>8.1f} "
+                          f"{result['best_s']:>9.3f} {rows / max(result['best_s'], 1e-9):>12,.0f}")
+                os.remove(path)
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results', f"bench-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': _environment(), 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+# mes_synth.py
+# 벤치마크용 합성 MES 공정 CSV 생성기입니다. stages.py 레지스트리의 공정 정의를 따라 실제 내보내기 파일과 같은 모양을 만듭니다.
+#   - 헤더 앞의 잡음 줄(한글 제목, 조회 기간, 빈 줄)
+#   - '="SN00000001"'처럼 감싼 값, 한글 비고/작업자 컬럼, 측정값 컬럼
+#   - 여러 지그(PC), 시간 순서로 여러 날에 걸친 행
+#   - 재검사 패턴: 한 번에 PASS / X 후 재검사 PASS(가성불량) / 끝까지 X(진성불량), 가끔 빈 Pass 값
+# 행은 block_rows씩 NumPy로 만들어 파일에 이어 쓰므로 천만 행도 메모리를 많이 쓰지 않습니다.
+#
+# 사용법: python benchmarks/mes_synth.py --stage fw --rows 1000000 --out fw_1m.csv
+
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stages import STAGES
+
+# 제품(SNumber) 하나의 테스트 결과 순서와 비율
+RETEST_PATTERNS = [
+    (('O',), 0.80),
+    (('X', 'O'), 0.09),
+    (('X', 'X', 'O'), 0.03),
+    (('X',), 0.04),
+    (('X', 'X'), 0.03),
+    (('',), 0.01),
+]
+REMARKS = np.array(['정상', '재검사', '불량 확인', '외관 점검', '펌웨어 재기록', ''], dtype=object)
+WORKERS = np.array(['김민수', '이서연', '박지훈', '최유진', '정하늘'], dtype=object)
+MEASURE_COLS = 4
+# 셀 값에 쓰지 않는 문자를 quotechar로 주어 '="..."' 값이 그대로(따옴표 이스케이프 없이) 기록되게 한다
+_RAW_QUOTECHAR = '\x07'
+
+
+def default_encoding(stage_key):
+    """공정 파일의 기본 인코딩. 여러 인코딩을 시도하는 공정(semi)은 실제 파일처럼 cp949로 쓴다"""
+    return 'cp949' if 'cp949' in STAGES[stage_key]['encodings'] else STAGES[stage_key]['encodings'][0]
+
+
+def stage_columns(stage_key):
+    """합성 파일의 컬럼 순서: SNumber, 날짜, 지그 후보, Pass, 버전, 측정값, 작업자, 비고"""
+    stage = STAGES[stage_key]
+    name = stage['name']
+    columns = ['SNumber', stage['date_col']]
+    columns += [col for col in stage['jig_cols'] if col not in columns]
+    columns.append(stage['pass_col'])
+    columns.append(f'{name}Version')
+    columns += [f'{name}Measure{m:02d}' for m in range(MEASURE_COLS)]
+    columns += ['작업자', '비고']
+    return columns
+
+
+def _preamble(stage_key, column_count, start, days):
+    blank = ',' * (column_count - 1)
+    end = start + pd.Timedelta(days=days - 1)
+    return [
+        f"MES 생산 이력 조회 - {STAGES[stage_key]['table']}" + blank,
+        f"조회 기간: {start:%Y-%m-%d} ~ {end:%Y-%m-%d}" + blank,
+        blank,
+    ]
+
+
+def _unit_tests(rng, unit_count):
+    """제품마다 재검사 패턴을 골라 (제품 번호, 테스트 결과) 행으로 펼친다"""
+    patterns = [pattern for pattern, _ in RETEST_PATTERNS]
+    weights = np.array([weight for _, weight in RETEST_PATTERNS])
+    choice = rng.choice(len(patterns), size=unit_count, p=weights / weights.sum())
+    lengths = np.array([len(pattern) for pattern in patterns])[choice]
+    units = np.repeat(np.arange(unit_count), lengths)
+    # 제품 안에서 몇 번째 테스트인지
+    attempt = np.arange(len(units)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    flat = np.array([result for pattern in patterns for result in pattern], dtype=object)
+    pattern_starts = np.cumsum([0] + [len(pattern) for pattern in patterns[:-1]])
+    results = flat[pattern_starts[choice[units]] + attempt]
+    return units, results
+
+
+def _block_frame(stage_key, rng, first_unit, unit_count, first_row, total_rows, start, days, jigs):
+    stage = STAGES[stage_key]
+    units, results = _unit_tests(rng, unit_count)
+    rows = len(units)
+    row_index = first_row + np.arange(rows)
+    # 행 순서가 곧 시간 순서가 되도록 전체 기간에 고르게 배치하고, 같은 제품은 같은 지그에서 재검사
+    seconds = row_index * (days * 86400) // max(total_rows, 1)
+    stamps = start + pd.to_timedelta(seconds, unit='s')
+    if stage['date_format'] is not None:
+        stamp_text = stamps.strftime(stage['date_format'])
+    else:
+        stamp_text = stamps.strftime('%Y-%m-%d %H:%M:%S')
+    unit_ids = first_unit + units
+    jig_names = np.char.add('PC', np.char.zfill((unit_ids % jigs).astype(str), 2))
+
+    frame = {
+        'SNumber': np.char.add(np.char.add('="SN', np.char.zfill(unit_ids.astype(str), 8)), '"'),
+        stage['date_col']: np.asarray(stamp_text, dtype=object),
+    }
+    for position, jig_col in enumerate(col for col in stage['jig_cols'] if col not in frame):
+        # 첫 지그 후보에만 값이 있고 나머지 후보는 비어 있다
+        frame[jig_col] = jig_names if position == 0 else ''
+    frame[stage['pass_col']] = results
+    frame[f"{stage['name']}Version"] = np.char.add('="1.', np.char.add((unit_ids % 9).astype(str), '"'))
+    for m in range(MEASURE_COLS):
+        frame[f"{stage['name']}Measure{m:02d}"] = np.round(rng.normal(3.0 + m, 0.2, rows), 3)
+    frame['작업자'] = WORKERS[rng.integers(0, len(WORKERS), rows)]
+    frame['비고'] = np.where(results == 'O', '정상', REMARKS[rng.integers(0, len(REMARKS), rows)])
+
+    block = pd.DataFrame(frame, columns=stage_columns(stage_key))
+    # 내보내기 중 끊긴 값처럼 날짜가 빠진 행을 드물게 섞는다
+    block.loc[rng.random(rows) < 0.001, stage['date_col']] = ''
+    return block
+
+
+def write_stage_csv(path, stage_key, rows, seed=0, jigs=40, days=28, encoding=None, block_rows=200_000):
+    """
+    합성 공정 CSV를 파일로 쓰는 함수.
+    Args:
+        path (str): 저장할 파일 경로.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        rows (int): 데이터 행 수 (헤더/잡음 줄 제외).
+        seed (int): 난수 시드. 같은 인자면 같은 파일이 만들어집니다.
+        jigs (int): 지그(PC) 수.
+        days (int): 데이터가 걸쳐 있는 날 수.
+        encoding (str): 파일 인코딩. None이면 default_encoding(stage_key).
+        block_rows (int): 한 번에 만들어 쓸 행 수.
+    Returns:
+        str: path.
+    """
+    if stage_key not in STAGES:
+        raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+    encoding = encoding or default_encoding(stage_key)
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01')
+    columns = stage_columns(stage_key)
+
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write('\n'.join(_preamble(stage_key, len(columns), start, days) + [','.join(columns)]) + '\n')
+        written, next_unit = 0, 0
+        while written < rows:
+            # 제품당 평균 테스트 수가 1.2회 남짓이므로 행 수보다 약간 적은 제품을 만들고 넘치는 행은 자른다
+            unit_count = max(1, int(min(block_rows, rows - written) / 1.15))
+            block = _block_frame(stage_key, rng, next_unit, unit_count, written, rows, start, days, jigs)
+            block = block.iloc[:rows - written]
+            block.to_csv(f, header=False, index=False, quoting=csv.QUOTE_NONE, quotechar=_RAW_QUOTECHAR, lineterminator='\n')
+            written += len(block)
+            next_unit += unit_count
+    return path
+
+
+def stage_csv_bytes(stage_key, rows, seed=0, **kwargs):
+    """write_stage_csv와 같은 내용을 바이트로 반환 (작은 파일/업로드 흉내용)"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = write_stage_csv(os.path.join(tmp_dir, f'{stage_key}.csv'), stage_key, rows, seed, **kwargs)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 MES 공정 CSV 생성')
+    parser.add_argument('--stage', choices=list(STAGES), required=True)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jigs', type=int, default=40)
+    parser.add_argument('--days', type=int, default=28)
+    parser.add_argument('--encoding', default=None)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    write_stage_csv(args.out, args.stage, args.rows, args.seed, args.jigs, args.days, args.encoding)
+    print(f"{args.out}: {args.rows:,} rows, {os.path.getsize(args.out) / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#
+# columnar_store.py
+# 정리된 공정 DataFrame을 공정/날짜별로 나눈 Parquet 파일로 적재하는 저장소입니다.
+#
+#   {STORE_DIR}/stage={공정 키}/date={YYYY-MM-DD}/part-{원본 해시}.parquet
+#   {STORE_DIR}/stage={공정 키}/date={YYYY-MM-DD}/part-{원본 해시}-{chunk 번호}.parquet   (chunk 스트리밍 적재)
+#   {STORE_DIR}/summary/stage={공정 키}.parquet   (원본, jig, 날짜)별 요약 행
+#
+# 분석과 조회는 필요한 날짜 파티션과 컬럼만 읽으므로, 몇 달치 데이터가 쌓여도
+# 매 세션마다 CSV 전체를 다시 파싱할 필요가 없습니다.
+# 같은 원본 파일을 다시 적재하면 (전체/chunk 어느 방식이든) 그 원본의 이전 part 파일을 지우고 쓰므로 행이 중복되지 않습니다.
+# 기간이 겹치는 다른 원본을 적재하면 겹친 날짜는 가장 나중에 적재한 원본의 행만 읽습니다
+# (IncrementalAnalyzer의 'replace'와 같음). 이전 원본의 part 파일은 지우지 않으므로 그 원본을 다시 적재하면 되돌아갑니다.
+# 요약 테이블은 적재할 때 바뀐 날짜만 다시 계산하므로, 대시보드는 원본 행 대신 요약 행만 읽으면 됩니다.
+# 적재와 요약 갱신은 공정별 파일 잠금 안에서 하므로 여러 프로세스/스레드가 동시에 적재해도 서로의 행을 잃지 않습니다.
+
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analysis_engine import summary_table
+from stages import get_stage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+STORE_DIR = os.environ.get('MES_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.mes_store'))
+UNKNOWN_DATE = 'unknown'
+
+# part-{원본}.parquet 또는 part-{원본}-{chunk 번호 5자리}.parquet
+_PART_NAME = re.compile(r'^part-(.+?)(?:-\d{5})?\.parquet$')
+# 같은 프로세스 안의 스레드끼리도 잠금이 겹치지 않게 (fcntl이 없는 환경에서는 이것만 사용)
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _stage_dir(stage_key, store_dir):
+    return os.path.join(store_dir, f"stage={stage_key}")
+
+
+def _partition_dir(stage_key, date_str, store_dir):
+    return os.path.join(_stage_dir(stage_key, store_dir), f"date={date_str}")
+
+
+@contextmanager
+def _stage_lock(stage_key, store_dir):
+    """공정 하나의 저장소 쓰기(part 적재, 요약 테이블 갱신)를 한 번에 하나만 하도록 잠그는 함수 (프로세스/스레드 간)"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, f".stage={stage_key}.lock")
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(os.path.abspath(path), threading.Lock())
+    with thread_lock, open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _part_name(source_id, chunk=None):
+    return f"part-{source_id}.parquet" if chunk is None else f"part-{source_id}-{chunk:05d}.parquet"
+
+
+def _part_source(name):
+    """part 파일 이름의 원본 식별값. part 파일이 아니면 None"""
+    match = _PART_NAME.match(name)
+    return match.group(1) if match else None
+
+
+def _partition_sources(part_dir):
+    """
+    날짜 파티션의 part 파일을 원본별로 묶는 함수.
+    Returns:
+        dict: 원본 -> (마지막 적재 시각(파일 수정 시각 최댓값), 경로 목록).
+    """
+    sources = {}
+    for name in sorted(os.listdir(part_dir)):
+        source_id = _part_source(name)
+        if source_id is None:
+            continue
+        path = os.path.join(part_dir, name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        latest, paths = sources.get(source_id, (mtime, []))
+        paths.append(path)
+        sources[source_id] = (max(latest, mtime), paths)
+    return sources
+
+
+def _current_source(sources):
+    """날짜 파티션에서 읽을 원본 (가장 나중에 적재한 원본). part 파일이 없으면 None"""
+    if not sources:
+        return None
+    return max(sources, key=lambda source_id: (sources[source_id][0], source_id))
+
+
+def remove_source_parts(stage_key, source_id, store_dir=STORE_DIR):
+    """
+    원본 하나의 part 파일을 모든 날짜 파티션에서 지우는 함수 (다시 적재하기 전에 호출).
+    Returns:
+        list: part 파일을 지운 날짜 파티션 목록 ('YYYY-MM-DD' 또는 'unknown'). 요약을 다시 계산해야 하는 날짜입니다.
+    """
+    stage_dir = _stage_dir(stage_key, store_dir)
+    if not os.path.isdir(stage_dir):
+        return []
+    removed = []
+    for dir_name in sorted(os.listdir(stage_dir)):
+        if not dir_name.startswith('date='):
+            continue
+        part_dir = os.path.join(stage_dir, dir_name)
+        names = [name for name in os.listdir(part_dir) if _part_source(name) == source_id]
+        for name in names:
+            os.remove(os.path.join(part_dir, name))
+        if names:
+            removed.append(dir_name[len('date='):])
+    return removed
+
+
+def ingest_stage_frame(df, stage_key, source_id, store_dir=STORE_DIR, chunk=None):
+    """
+    정리된 공정 DataFrame을 날짜 파티션별 Parquet 파일로 저장하는 함수.
+    전체 적재(chunk=None)나 첫 chunk(chunk=0)를 쓰기 전에 같은 원본의 이전 part 파일을 지우므로,
+    같은 파일을 전체/chunk 방식으로 번갈아 적재해도 행이 중복되지 않습니다.
+    Args:
+        df (pd.DataFrame): clean_string_columns와 날짜 변환이 끝난 DataFrame.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        source_id (str): 원본을 식별하는 값 (예: 업로드 바이트의 content_hash). part 파일 이름이 됩니다.
+        store_dir (str): 저장소 디렉터리.
+        chunk (int): chunk 스트리밍 적재일 때 chunk 번호 (0부터). None이면 원본 전체를 한 번에 적재.
+    Returns:
+        list: 기록하거나 이전 part를 지운 날짜 파티션 목록 ('YYYY-MM-DD' 또는 'unknown').
+    """
+    stage = get_stage(stage_key)
+    if stage is None:
+        return []
+    with _stage_lock(stage_key, store_dir):
+        removed = remove_source_parts(stage_key, source_id, store_dir) if chunk in (None, 0) else []
+        if df is None or df.empty:
+            return removed
+
+        date_col = stage['date_col']
+        # 분석 시 다시 만들어지는 파생 컬럼은 저장하지 않는다
+        frame = df.drop(columns=['PassStatusNorm'], errors='ignore')
+        partition_keys = frame[date_col].dt.strftime('%Y-%m-%d').fillna(UNKNOWN_DATE)
+
+        written = []
+        for date_str, part in frame.groupby(partition_keys, sort=True):
+            part_dir = _partition_dir(stage_key, date_str, store_dir)
+            os.makedirs(part_dir, exist_ok=True)
+            _write_parquet(part, os.path.join(part_dir, _part_name(source_id, chunk)))
+            written.append(date_str)
+    return sorted(set(written) | set(removed))
+
+
+def _write_parquet(frame, path):
+    # 쓰는 도중의 파일을 다른 세션이 읽지 않도록 임시 파일에 쓴 뒤 교체 (임시 파일 이름은 프로세스/스레드마다 다르게)
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def list_partitions(stage_key, store_dir=STORE_DIR):
+    """
+    저장소에 적재된 공정의 날짜 파티션 목록을 반환하는 함수.
+    Returns:
+        list: 정렬된 datetime.date 목록 (날짜 없는 'unknown' 파티션은 제외).
+    """
+    stage_dir = _stage_dir(stage_key, store_dir)
+    if not os.path.isdir(stage_dir):
+        return []
+
+    dates = []
+    for name in os.listdir(stage_dir):
+        if not name.startswith('date=') or name == f"date={UNKNOWN_DATE}":
+            continue
+        try:
+            dates.append(pd.Timestamp(name[len('date='):]).date())
+        except ValueError:
+            continue
+    return sorted(dates)
+
+
+def _partition_files(stage_key, start_date, end_date, store_dir):
+    """기간의 날짜 파티션마다 가장 나중에 적재한 원본의 part 파일 경로 목록"""
+    files = []
+    for day in list_partitions(stage_key, store_dir):
+        if start_date is not None and day < start_date:
+            continue
+        if end_date is not None and day > end_date:
+            continue
+        sources = _partition_sources(_partition_dir(stage_key, day.strftime('%Y-%m-%d'), store_dir))
+        current = _current_source(sources)
+        if current is not None:
+            files.extend(sources[current][1])
+    return files
+
+
+def _read_parts(paths, columns=None):
+    """part 파일들을 읽어 하나의 DataFrame으로. 파일에 없는 컬럼은 건너뛰고, 파일이 없으면 None"""
+    frames = []
+    for path in paths:
+        if columns is None:
+            frames.append(pd.read_parquet(path))
+        else:
+            available = set(pq.read_schema(path).names)
+            frames.append(pd.read_parquet(path, columns=[c for c in columns if c in available]))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def stage_columns(stage_key, store_dir=STORE_DIR):
+    """저장소에 적재된 공정 데이터의 전체 컬럼명을 (처음 등장한 순서대로) 반환하는 함수"""
+    columns = []
+    for path in _partition_files(stage_key, None, None, store_dir):
+        for name in pq.read_schema(path).names:
+            if name not in columns:
+                columns.append(name)
+    return columns
+
+
+def load_stage(stage_key, start_date=None, end_date=None, columns=None, store_dir=STORE_DIR):
+    """
+    필요한 날짜 파티션과 컬럼만 읽어 공정 DataFrame을 만드는 함수.
+    Args:
+        stage_key (str): 공정 키.
+        start_date (datetime.date): 시작 날짜 (포함). None이면 처음부터.
+        end_date (datetime.date): 종료 날짜 (포함). None이면 끝까지.
+        columns (list): 읽을 컬럼. None이면 전체. 파일에 없는 컬럼은 건너뜁니다.
+        store_dir (str): 저장소 디렉터리.
+    Returns:
+        pd.DataFrame: 읽은 DataFrame. 해당 파티션이 없으면 None 반환.
+            날짜마다 가장 나중에 적재한 원본의 행만 읽습니다.
+    """
+    return _read_parts(_partition_files(stage_key, start_date, end_date, store_dir), columns)
+
+
+def analysis_columns(stage_key):
+    """analyze_stage에 필요한 최소 컬럼 목록 (SNumber, 날짜, Pass, 지그 후보)"""
+    stage = get_stage(stage_key)
+    return ['SNumber', stage['date_col'], stage['pass_col']] + stage['jig_cols']
+
+
+def _summary_path(stage_key, store_dir):
+    return os.path.join(store_dir, 'summary', f"stage={stage_key}.parquet")
+
+
+def _read_summary(stage_key, store_dir):
+    path = _summary_path(stage_key, store_dir)
+    if not os.path.exists(path):
+        return None
+    table = pd.read_parquet(path)
+    # 원본 컬럼이 없는 이전 형식의 요약 테이블은 없는 것으로 보고 다시 계산하게 한다
+    return table if 'source_id' in table.columns else None
+
+
+def write_stage_summaries(stage_key, dates, store_dir=STORE_DIR):
+    """
+    적재한 날짜 파티션의 (원본, jig, 날짜)별 요약 행을 다시 계산해 요약 테이블에 반영하는 함수.
+    날짜마다 파티션에 있는 원본별로 계산하고 그 날짜의 기존 행을 모두 교체하므로, 같은 원본을 다시 적재하면 이전 행이 바뀝니다.
+    요약 테이블을 읽고 고쳐 쓰는 동안 공정 잠금을 잡아 동시에 적재한 다른 작업의 행을 잃지 않습니다.
+    Args:
+        stage_key (str): 공정 키.
+        dates (list): 다시 계산할 날짜 ('YYYY-MM-DD' 또는 datetime.date). ingest_stage_frame의 반환값을 그대로 넘기면 됩니다.
+        store_dir (str): 저장소 디렉터리.
+    Returns:
+        pd.DataFrame: 갱신된 공정 요약 테이블 전체 (source_id, summary_table 컬럼).
+    """
+    days = sorted({pd.Timestamp(day).date() for day in dates if day != UNKNOWN_DATE})
+    with _stage_lock(stage_key, store_dir):
+        fresh = []
+        for day in days:
+            part_dir = _partition_dir(stage_key, day.strftime('%Y-%m-%d'), store_dir)
+            if not os.path.isdir(part_dir):
+                continue
+            for source_id, (_, paths) in _partition_sources(part_dir).items():
+                rows = _read_parts(paths, analysis_columns(stage_key))
+                if rows is not None and not rows.empty:
+                    fresh.append(summary_table(rows, stage_key).assign(source_id=source_id))
+
+        table = _read_summary(stage_key, store_dir)
+        if table is not None:
+            # 다시 계산한 날짜의 기존 행은 (원본이 지워졌어도) 새 행으로 교체
+            table = table[~table['date'].dt.date.isin(days)]
+        frames = [frame for frame in [table] + fresh if frame is not None and not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=['source_id', 'jig', 'date'])
+        table = pd.concat(frames, ignore_index=True).sort_values(['date', 'jig', 'source_id'], kind='stable', ignore_index=True)
+
+        path = _summary_path(stage_key, store_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_parquet(table, path)
+    return table
+
+
+def load_stage_summaries(stage_key, start_date=None, end_date=None, store_dir=STORE_DIR):
+    """
+    요약 테이블에서 기간의 (jig, 날짜)별 요약 행을 읽는 함수. 원본 행은 읽지 않습니다.
+    요약 테이블이 생기기 전에 적재한 날짜처럼 원본 파티션만 있는 날짜는 이때 한 번 계산해 채워 넣습니다.
+    날짜마다 가장 나중에 적재한 원본의 행만 돌려주므로 load_stage로 읽은 원본 행과 건수가 같습니다.
+    Args:
+        stage_key (str): 공정 키.
+        start_date (datetime.date): 시작 날짜 (포함). None이면 처음부터.
+        end_date (datetime.date): 종료 날짜 (포함). None이면 끝까지.
+        store_dir (str): 저장소 디렉터리.
+    Returns:
+        pd.DataFrame: analysis_engine.summary_table 형식. 해당 날짜가 없으면 None 반환.
+    """
+    table = _read_summary(stage_key, store_dir)
+    summarized = set() if table is None else set(table['date'].dt.date)
+    missing = [
+        day for day in list_partitions(stage_key, store_dir)
+        if day not in summarized and (start_date is None or day >= start_date) and (end_date is None or day <= end_date)
+    ]
+    if missing:
+        table = write_stage_summaries(stage_key, missing, store_dir)
+    if table is None or table.empty:
+        return None
+
+    days = table['date'].dt.date
+    in_range = pd.Series(True, index=table.index)
+    if start_date is not None:
+        in_range &= days >= start_date
+    if end_date is not None:
+        in_range &= days <= end_date
+    table = table[in_range]
+    if table.empty:
+        return None
+
+    # 날짜마다 그 날짜 파티션에서 현재 읽는 원본의 행만 남긴다
+    current = {}
+    for day in table['date'].dt.date.unique():
+        part_dir = _partition_dir(stage_key, day.strftime('%Y-%m-%d'), store_dir)
+        current[day] = _current_source(_partition_sources(part_dir)) if os.path.isdir(part_dir) else None
+    table = table[[current[day] == source_id for day, source_id in zip(table['date'].dt.date, table['source_id'])]]
+    table = table.drop(columns='source_id')
+    return None if table.empty else table.reset_index(drop=True)
@@ -0,0 +1,158 @@
+#
+# data_handle.py
+# 적재한 공정 DataFrame 하나를 여러 화면/필터가 복사 없이 같이 쓰도록 하는 보기(view) 계층입니다.
+#   - DataHandle: 원본 DataFrame(읽기 전용으로 취급) + 선택된 행 위치 배열. 필터는 새 위치 배열만 만듭니다.
+#   - 실제 DataFrame은 화면에 표시하거나 분석할 때 필요한 컬럼만 꺼냅니다 (frame/column).
+#   - session_memory_report: session_state가 잡고 있는 메모리를 항목별로 보고 (같은 원본은 한 번만 계산)
+#   - object_bytes: 객체 하나(분석 결과 등)가 잡고 있는 메모리 추정
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+def enable_copy_on_write():
+    """
+    pandas 2.x에서 Copy-on-Write를 켜는 함수 (pandas 3부터는 항상 켜져 있어 아무것도 하지 않음).
+    켜 두면 컬럼 선택/행 선택/assign 결과가 원본 데이터를 공유하고, 수정할 때만 복사되므로
+    방어용 .copy() 없이도 원본이 바뀌지 않습니다.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+class DataHandle:
+    """
+    원본 DataFrame 하나와 그중 선택된 행 위치(np.ndarray)로 이루어진 보기.
+    원본은 읽기 전용으로 취급하며, 필터/검색은 위치 배열만 새로 만들어 새 DataHandle을 반환합니다.
+    """
+
+    def __init__(self, base, rows=None):
+        """
+        Args:
+            base (pd.DataFrame): 적재한 원본 DataFrame. 이후 수정하지 않아야 합니다.
+            rows (np.ndarray): 선택된 행의 위치(base.iloc 기준). None이면 전체 행.
+        """
+        self.base = base
+        self.rows = None if rows is None else np.asarray(rows, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.base) if self.rows is None else len(self.rows)
+
+    @property
+    def empty(self):
+        return len(self) == 0 or len(self.base.columns) == 0
+
+    @property
+    def columns(self):
+        return self.base.columns
+
+    def positions(self):
+        """선택된 행의 원본 위치 배열"""
+        return np.arange(len(self.base), dtype=np.int64) if self.rows is None else self.rows
+
+    def column(self, name):
+        """선택된 행의 컬럼 하나 (전체 행이면 원본 컬럼을 그대로 반환)"""
+        series = self.base[name]
+        return series if self.rows is None else series.iloc[self.rows]
+
+    def filter(self, mask):
+        """
+        현재 보기에서 mask가 True인 행만 남긴 새 DataHandle을 반환하는 함수.
+        Args:
+            mask (pd.Series | np.ndarray): 현재 보기의 행 순서와 같은 길이의 bool 배열 (결측값은 False).
+        """
+        if isinstance(mask, pd.Series):
+            mask = mask.fillna(False).to_numpy(dtype=bool)
+        return DataHandle(self.base, self.positions()[np.asarray(mask, dtype=bool)])
+
+    def take(self, positions):
+        """현재 보기 기준 위치(예: 검색 결과)의 행만 남긴 새 DataHandle을 반환"""
+        return DataHandle(self.base, self.positions()[np.asarray(positions, dtype=np.int64)])
+
+    def intersect(self, base_rows):
+        """원본 위치 배열(예: 원본 전체에 만든 인덱스의 검색 결과) 중 현재 보기에 있는 행만 남긴 새 DataHandle을 반환"""
+        base_rows = np.asarray(base_rows, dtype=np.int64)
+        if self.rows is None:
+            return DataHandle(self.base, base_rows)
+        return DataHandle(self.base, base_rows[np.isin(base_rows, self.rows)])
+
+    def frame(self, columns=None):
+        """
+        선택된 행과 컬럼을 DataFrame으로 꺼내는 함수. 전체 행/전체 컬럼이면 원본을 그대로 반환합니다.
+        Args:
+            columns (list): 꺼낼 컬럼. None이면 모든 컬럼.
+        """
+        df = self.base if columns is None else self.base[[col for col in columns if col in self.base.columns]]
+        return df if self.rows is None else df.iloc[self.rows]
+
+    def nbytes(self):
+        """보기가 따로 잡고 있는 메모리 (위치 배열). 원본 메모리는 포함하지 않음"""
+        return 0 if self.rows is None else int(self.rows.nbytes)
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _object_bytes(value, seen):
+    """value가 잡고 있는 메모리. 이미 센 DataFrame/배열(seen의 id)은 다시 세지 않는다"""
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, DataHandle):
+        return value.nbytes() + _object_bytes(value.base, seen)
+    if isinstance(value, pd.DataFrame):
+        return _frame_bytes(value)
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (np.ndarray, pd.api.extensions.ExtensionArray)):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(_object_bytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple, set)):
+        # 긴 목록(SNumber 목록 등)은 요소 크기까지 포함
+        return sys.getsizeof(value) + sum(_object_bytes(item, seen) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        # 분석기/인덱스 같은 상태 객체는 속성을 따라간다
+        return _object_bytes(vars(value), seen)
+    if hasattr(type(value), '__slots__') and not isinstance(value, (str, bytes)):
+        return sys.getsizeof(value) + sum(
+            _object_bytes(getattr(value, name), seen) for name in type(value).__slots__ if hasattr(value, name)
+        )
+    return sys.getsizeof(value)
+
+
+def object_bytes(value):
+    """
+    value가 잡고 있는 메모리(바이트)를 추정하는 함수. DataFrame/배열/dict/목록/상태 객체를 따라가며 셉니다.
+    Args:
+        value: 분석 결과 tuple, DataFrame, DataHandle 등.
+    Returns:
+        int: 바이트 수. 같은 객체를 여러 곳에서 가리키면 한 번만 셉니다.
+    """
+    return _object_bytes(value, set())
+
+
+def session_memory_report(state):
+    """
+    session_state 항목별로 잡고 있는 메모리를 계산하는 함수.
+    여러 항목이 같은 원본 DataFrame을 가리키면 처음 나온 항목에만 원본 크기를 넣으므로, 합계가 실제 사용량입니다.
+    Args:
+        state (Mapping): st.session_state 또는 dict.
+    Returns:
+        pd.DataFrame: 항목, 메모리(MB) 컬럼. 메모리가 큰 순서이며 첫 행은 합계.
+    """
+    seen = set()
+    rows = []
+    for key in list(state.keys()):
+        rows.append({'항목': str(key), '메모리(MB)': _object_bytes(state[key], seen) / 1e6})
+
+    report = pd.DataFrame(rows, columns=['항목', '메모리(MB)'])
+    report = report.sort_values('메모리(MB)', ascending=False, kind='stable')
+    total = pd.DataFrame([{'항목': '(합계)', '메모리(MB)': report['메모리(MB)'].sum()}])
+    report = pd.concat([total, report], ignore_index=True)
+    report['메모리(MB)'] = report['메모리(MB)'].round(2)
+    return report
@@ -0,0 +1,239 @@
+#
+# db_source.py
+# MES DB(MySQL)의 공정 테이블(Pcb_Process, Fw_Process, RfTx_Process, SemiAssy_Process, Func_Process)에서
+# 직접 데이터를 읽어 오는 데이터 소스입니다.
+# - 연결은 ConnectionPool로 재사용합니다 (Streamlit 앱에서는 st.cache_resource로 한 번만 생성).
+# - 날짜/지그 필터는 SQL WHERE 절로 서버에서 처리합니다.
+# - 결과는 서버 측 커서로 chunk 단위로 받아 analyze_stage_chunks에 넘깁니다 (전체 결과를 메모리에 합치지 않음).
+# 로컬 확인용으로 MES_DB_SQLITE_PATH를 지정하면 같은 스키마의 SQLite 파일을 대신 사용합니다.
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+import pandas as pd
+
+from stages import get_stage
+
+try:
+    import pymysql
+    import pymysql.cursors
+except ImportError:
+    pymysql = None
+
+DEFAULT_CHUNKSIZE = 50000
+
+
+def load_db_config():
+    """
+    환경 변수에서 DB 접속 정보를 읽는 함수.
+    MES_DB_SQLITE_PATH가 있으면 SQLite, MES_DB_HOST가 있으면 MySQL 설정을 반환합니다.
+    Returns:
+        dict: 접속 정보. 설정이 없으면 None 반환.
+    """
+    sqlite_path = os.environ.get('MES_DB_SQLITE_PATH')
+    if sqlite_path:
+        return {'dialect': 'sqlite', 'path': sqlite_path}
+
+    host = os.environ.get('MES_DB_HOST')
+    if not host:
+        return None
+    return {
+        'dialect': 'mysql',
+        'host': host,
+        'port': int(os.environ.get('MES_DB_PORT', '3306')),
+        'user': os.environ.get('MES_DB_USER', ''),
+        'password': os.environ.get('MES_DB_PASSWORD', ''),
+        'database': os.environ.get('MES_DB_NAME', ''),
+        'pool_size': int(os.environ.get('MES_DB_POOL_SIZE', '4')),
+    }
+
+
+class ConnectionPool:
+    """
+    DB-API 연결을 최대 pool_size개까지 만들어 재사용하는 간단한 연결 풀.
+    connection() 컨텍스트 매니저로 빌린 연결은 블록이 끝나면 풀로 돌아갑니다.
+    """
+
+    def __init__(self, factory, dialect, pool_size=4):
+        self._factory = factory
+        self.dialect = dialect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @classmethod
+    def from_config(cls, config):
+        """load_db_config 형식의 설정으로 풀을 만드는 함수"""
+        if config['dialect'] == 'sqlite':
+            path = config['path']
+            return cls(lambda: sqlite3.connect(path, check_same_thread=False), 'sqlite', config.get('pool_size', 4))
+
+        if pymysql is None:
+            raise ImportError("MySQL 연결에는 pymysql 패키지가 필요합니다.")
+
+        def connect():
+            return pymysql.connect(
+                host=config['host'], port=config['port'], user=config['user'],
+                password=config['password'], database=config['database'],
+                charset='utf8mb4', autocommit=True,
+            )
+        return cls(connect, 'mysql', config.get('pool_size', 4))
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                if self.dialect == 'mysql':
+                    # 유휴 중 끊긴 연결은 다시 연결
+                    conn.ping(reconnect=True)
+            except queue.Empty:
+                conn = self._factory()
+            yield conn
+        except Exception:
+            # 상태를 알 수 없는 연결은 풀에 돌려놓지 않는다
+            if conn is not None:
+                _close_quietly(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+def _quote(identifier, dialect):
+    if dialect == 'mysql':
+        return '`' + identifier.replace('`', '``') + '`'
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _date_bound(day, date_format):
+    """WHERE 절에 넣을 날짜 경계값. 고정 형식 문자열 컬럼이면 같은 형식 문자열로 비교"""
+    bound = datetime.combine(day, dt_time.min)
+    if date_format is not None:
+        return bound.strftime(date_format)
+    return bound.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def build_stage_query(stage_key, dialect, start_date=None, end_date=None, jigs=None, columns=None):
+    """
+    공정 테이블에서 날짜 범위/지그 조건을 서버에서 거르는 SELECT 문을 만드는 함수.
+    Args:
+        stage_key (str): 공정 키.
+        dialect (str): 'mysql' 또는 'sqlite'.
+        start_date (datetime.date): 시작 날짜 (포함).
+        end_date (datetime.date): 종료 날짜 (포함).
+        jigs (list): 지그 값 목록. 비어 있으면 전체.
+        columns (list): 조회할 컬럼. None이면 전체(*).
+    Returns:
+        tuple: (sql, params)
+    """
+    stage = get_stage(stage_key)
+    placeholder = '%s' if dialect == 'mysql' else '?'
+    date_col = _quote(stage['date_col'], dialect)
+
+    select_cols = ', '.join(_quote(c, dialect) for c in columns) if columns else '*'
+    sql = f"SELECT {select_cols} FROM {_quote(stage['table'], dialect)}"
+    conditions, params = [], []
+
+    if start_date is not None:
+        conditions.append(f"{date_col} >= {placeholder}")
+        params.append(_date_bound(start_date, stage['date_format']))
+    if end_date is not None:
+        conditions.append(f"{date_col} < {placeholder}")
+        params.append(_date_bound(end_date + timedelta(days=1), stage['date_format']))
+    if jigs:
+        jig_col = _quote(stage['jig_cols'][0], dialect)
+        conditions.append(f"{jig_col} IN ({', '.join([placeholder] * len(jigs))})")
+        params.extend(jigs)
+
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    return sql, params
+
+
+def iter_stage_chunks(pool, stage_key, start_date=None, end_date=None, jigs=None, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    공정 테이블 조회 결과를 chunk 단위 DataFrame으로 돌려주는 제너레이터.
+    MySQL에서는 서버 측 커서(SSCursor)를 사용해 전체 결과를 클라이언트 메모리에 올리지 않습니다.
+    """
+    if columns is not None:
+        available = table_columns(pool, stage_key)
+        columns = [c for c in columns if c in available]
+    sql, params = build_stage_query(stage_key, pool.dialect, start_date, end_date, jigs, columns)
+    with pool.connection() as conn:
+        if pool.dialect == 'mysql':
+            cursor = conn.cursor(pymysql.cursors.SSCursor)
+        else:
+            cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            names = [desc[0] for desc in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield pd.DataFrame.from_records(rows, columns=names)
+        finally:
+            cursor.close()
+
+
+def read_stage_from_db(pool, stage_key, start_date=None, end_date=None, jigs=None, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    공정 테이블을 chunk 단위로 읽어 하나의 DataFrame으로 합치는 함수.
+    결과 전체가 메모리에 올라가므로 하루치 원본 조회처럼 범위가 좁을 때 사용하고, 분석은 iter_stage_chunks로 합니다.
+    Returns:
+        pd.DataFrame: 조회 결과. 행이 없으면 None 반환.
+    """
+    chunks = list(iter_stage_chunks(pool, stage_key, start_date, end_date, jigs, columns, chunksize))
+    if not chunks:
+        return None
+    return pd.concat(chunks, ignore_index=True)
+
+
+def table_columns(pool, stage_key):
+    """공정 테이블의 컬럼명 목록을 (행을 읽지 않고) 조회하는 함수"""
+    stage = get_stage(stage_key)
+    sql = f"SELECT * FROM {_quote(stage['table'], pool.dialect)} LIMIT 0"
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            cursor.fetchall()
+            return [desc[0] for desc in cursor.description]
+        finally:
+            cursor.close()
+
+
+def list_stage_jigs(pool, stage_key):
+    """공정 테이블의 지그(첫 번째 지그 컬럼) 값 목록을 DISTINCT로 조회하는 함수"""
+    stage = get_stage(stage_key)
+    jig_col = _quote(stage['jig_cols'][0], pool.dialect)
+    sql = f"SELECT DISTINCT {jig_col} FROM {_quote(stage['table'], pool.dialect)} WHERE {jig_col} IS NOT NULL"
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            return sorted(str(row[0]) for row in cursor.fetchall())
+        finally:
+            cursor.close()
@@ -1,5 +1,23 @@
 import pandas as pd
 import io
+import os
+import csv
+import codecs
+from contextlib import contextmanager
+
+from profiling import span
+from stages import get_stage
+from timestamp_decoder import decode_timestamps
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    ARROW_STRING_DTYPE = None
+
+# 스트리밍 읽기에서 한 번에 읽을 행 수와 헤더 탐색용 앞부분 크기
+DEFAULT_CHUNK_ROWS = 200000
+HEADER_SAMPLE_BYTES = 1024 * 1024
 
 def clean_string_format(value):
     """다양한 형태의 문자열 포맷을 정리하는 함수"""
@@ -22,6 +40,138 @@ def clean_string_format(value):
     
     return value_str
 
+def clean_string_series(series):
+    """
+    clean_string_format과 동일한 규칙을 Series 전체에 열 단위 문자열 연산으로 적용하는 함수.
+    pyarrow 문자열로 변환해 C 수준에서 처리하며, pyarrow가 없으면 셀 단위 map으로 대체합니다.
+    Args:
+        series (pd.Series): 정리할 Series.
+    Returns:
+        pd.Series: 정리된 Series. 바꿀 값이 없으면 입력 Series를 그대로 반환.
+    """
+    if ARROW_STRING_DTYPE is None:
+        return series.map(clean_string_format)
+
+    mask = series.notna()
+    if not mask.any():
+        return series
+
+    values = series[mask]
+    all_str = pd.api.types.infer_dtype(values, skipna=True) == 'string'
+    # str(value)와 같은 문자열을 만든 뒤 Arrow 문자열로 변환
+    text = (values if all_str else values.astype(str)).astype(ARROW_STRING_DTYPE)
+    stripped = text.str.strip()
+
+    # 감싸는 따옴표도, 앞뒤 공백도 없으면 손대지 않는다
+    if all_str and not text.str.contains('"', regex=False).any() and (stripped == text).all():
+        return series
+
+    ends_q = stripped.str.endswith('"')
+    # ="값" / ""값"" / "값" 순서로 적용 (앞 규칙이 우선)
+    eq_wrapped = stripped.str.startswith('="') & ends_q
+    dq_wrapped = ~eq_wrapped & stripped.str.startswith('""') & stripped.str.endswith('""')
+    q_wrapped = ~eq_wrapped & ~dq_wrapped & stripped.str.startswith('"') & ends_q & (stripped.str.len() > 2)
+
+    cleaned = stripped
+    if eq_wrapped.any():
+        cleaned = cleaned.mask(eq_wrapped, stripped.str.slice(2, -1))
+    if dq_wrapped.any():
+        cleaned = cleaned.mask(dq_wrapped, stripped.str.slice(2, -2))
+    if q_wrapped.any():
+        cleaned = cleaned.mask(q_wrapped, stripped.str.slice(1, -1))
+
+    cleaned = cleaned.astype(object)
+    if mask.all():
+        return cleaned.rename(series.name)
+    result = series.astype(object)
+    result[mask] = cleaned
+    return result
+
+def clean_string_columns(df):
+    """
+    DataFrame의 문자열(object) 컬럼에만 clean_string_series를 적용하는 함수.
+    숫자/날짜 컬럼은 감싸는 문자열이 있을 수 없으므로 건너뜁니다.
+    Args:
+        df (pd.DataFrame): 정리할 DataFrame. 변경이 필요한 컬럼만 제자리에서 교체됩니다.
+    Returns:
+        pd.DataFrame: 입력과 같은 DataFrame 객체.
+    """
+    with span('clean_strings', rows=len(df)) as timer:
+        cleaned_count = 0
+        for col in df.columns:
+            if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
+                column = df[col]
+                cleaned = clean_string_series(column)
+                if cleaned is not column:
+                    df[col] = cleaned
+                    cleaned_count += 1
+        timer.set(columns=cleaned_count)
+    return df
+
+def find_header_offset(raw_bytes, keywords, encoding='utf-8', max_rows=100, partial_match=False):
+    """
+    원시 바이트를 줄 단위로 훑어 키워드가 모두 포함된 헤더 줄의 시작 위치를 찾는 함수.
+    pandas로 미리 파싱하지 않으므로 파일 전체를 두 번 읽지 않습니다.
+    Args:
+        raw_bytes (bytes): 업로드된 파일의 원시 바이트.
+        keywords (list): 헤더를 식별하기 위한 키워드 리스트.
+        encoding (str): 헤더 줄을 디코딩할 인코딩.
+        max_rows (int): 검사할 최대 (빈 줄 제외) 줄 수.
+        partial_match (bool): True이면 키워드가 셀 값의 일부로만 포함되어도 일치로 간주.
+    Returns:
+        int: 헤더 줄이 시작하는 바이트 오프셋. 찾지 못하면 None 반환.
+    """
+    # utf-8-sig는 키워드마다 BOM을 붙이므로 키워드 바이트는 utf-8로 만든다
+    keyword_encoding = 'utf-8' if encoding.lower().replace('_', '-') == 'utf-8-sig' else encoding
+    keyword_bytes = [kw.encode(keyword_encoding) for kw in keywords]
+
+    pos = 0
+    rows_seen = 0
+    length = len(raw_bytes)
+    while pos < length and rows_seen < max_rows:
+        end = raw_bytes.find(b'\n', pos)
+        if end == -1:
+            end = length
+        line = raw_bytes[pos:end]
+
+        if line.strip():
+            rows_seen += 1
+            # 바이트 단위로 먼저 걸러내고, 후보 줄만 CSV 규칙으로 분해한다
+            if all(kw in line for kw in keyword_bytes):
+                text = line.decode(encoding, errors='replace').lstrip('\ufeff')
+                row_values = [v.strip() for v in next(csv.reader([text]), []) if v.strip() != '']
+                if partial_match:
+                    matched = all(any(kw in v for v in row_values) for kw in keywords)
+                else:
+                    matched = all(kw in row_values for kw in keywords)
+                if matched:
+                    return pos
+        pos = end + 1
+
+    return None
+
+def read_csv_from_header(uploaded_file, keywords, encoding='utf-8', max_rows=100, partial_match=False, **read_kwargs):
+    """
+    헤더 위치를 바이트 단위로 찾은 뒤, 그 위치부터 한 번의 read_csv로 DataFrame을 로드하는 함수.
+    Args:
+        uploaded_file: Streamlit의 file_uploader를 통해 업로드된 파일 객체.
+        keywords (list): 헤더를 식별하기 위한 키워드 리스트.
+        encoding (str): 파일 인코딩.
+        max_rows (int): 헤더를 찾기 위해 검사할 최대 줄 수.
+        partial_match (bool): 키워드 부분 일치 허용 여부.
+        **read_kwargs: pd.read_csv에 그대로 전달할 추가 인자.
+    Returns:
+        pd.DataFrame: 헤더를 찾아서 로드한 DataFrame. 헤더가 없으면 None 반환.
+    """
+    raw_bytes = uploaded_file.getvalue()
+    offset = find_header_offset(raw_bytes, keywords, encoding, max_rows, partial_match)
+    if offset is None:
+        return None
+
+    file_content = io.BytesIO(raw_bytes)
+    file_content.seek(offset)
+    return pd.read_csv(file_content, encoding=encoding, **read_kwargs)
+
 def read_csv_with_dynamic_header(uploaded_file, keywords):
     """
     업로드된 파일에서 동적으로 헤더를 찾아 DataFrame을 로드하는 함수.
@@ -32,25 +182,174 @@ def read_csv_with_dynamic_header(uploaded_file, keywords):
         pd.DataFrame: 헤더를 찾아서 로드한 DataFrame. 실패 시 None 반환.
     """
     try:
-        file_content = io.BytesIO(uploaded_file.getvalue())
-        df_temp = pd.read_csv(file_content, header=None, nrows=100)
-        
-        header_row = None
-        for i, row in df_temp.iterrows():
-            row_values = [str(x).strip() for x in row.values if pd.notna(x)]
-            if all(keyword in row_values for keyword in keywords):
-                header_row = i
-                break
-        
-        if header_row is not None:
-            file_content.seek(0)
-            df = pd.read_csv(file_content, header=header_row)
-            return df
-        else:
-            return None
+        return read_csv_from_header(uploaded_file, keywords)
     except Exception:
         return None
 
+def _decodes_cleanly(data, encoding):
+    # 샘플 끝에서 잘린 멀티바이트 문자는 오류로 보지 않는다
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(data, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def _is_utf8_sig(encoding):
+    return encoding.lower().replace('_', '-') == 'utf-8-sig'
+
+def detect_encodings(sample, encodings):
+    """
+    파일 앞부분 바이트만 보고 쓸 수 있는 인코딩 후보를 고르는 함수.
+    UTF-8 BOM이 있으면 utf-8-sig를 맨 앞에 두고, BOM이 없으면 utf-8-sig는 utf-8과 같으므로 utf-8로 대신합니다.
+    나머지는 sample을 오류 없이 디코딩하는 후보만 원래 순서대로 남깁니다.
+    Args:
+        sample (bytes): 파일 앞부분 (예: HEADER_SAMPLE_BYTES).
+        encodings (list): 공정에 정의된 인코딩 후보 (stages.py의 encodings).
+    Returns:
+        list: 시도할 인코딩 목록. 보통 첫 후보로 한 번만 파싱하면 됩니다.
+    """
+    has_bom = sample.startswith(codecs.BOM_UTF8)
+    candidates = []
+    for encoding in encodings:
+        if _is_utf8_sig(encoding) and not has_bom:
+            encoding = 'utf-8'
+        if encoding not in candidates:
+            candidates.append(encoding)
+    if has_bom:
+        candidates.sort(key=lambda encoding: not _is_utf8_sig(encoding))
+
+    return [encoding for encoding in candidates if _decodes_cleanly(sample, encoding)]
+
+def _stage_headers(sample, stage):
+    """sample로 고른 인코딩 후보마다 헤더 위치를 찾아 (인코딩, 헤더 오프셋)을 돌려주는 제너레이터"""
+    for encoding in detect_encodings(sample, stage['encodings']):
+        try:
+            offset = find_header_offset(sample, stage['keywords'], encoding,
+                                        stage['header_rows'], stage['partial_match'])
+        except (UnicodeError, LookupError):
+            continue
+        if offset is not None:
+            yield encoding, offset
+
+def read_stage_csv(uploaded_file, stage_key):
+    """
+    stages.py 레지스트리에 정의된 공정 형식대로 업로드 파일을 로드하는 함수.
+    인코딩과 헤더 위치는 파일 앞부분(HEADER_SAMPLE_BYTES)만 보고 정하므로 보통 파일 전체는 한 번만 파싱합니다.
+    앞부분 이후에서 디코딩이 실패할 때만 다음 인코딩 후보로 다시 읽습니다.
+    Args:
+        uploaded_file: Streamlit의 file_uploader를 통해 업로드된 파일 객체.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+    Returns:
+        pd.DataFrame: 로드한 DataFrame. 실패 시 None 반환.
+    """
+    stage = get_stage(stage_key)
+    if stage is None or uploaded_file is None:
+        return None
+
+    with span('read_stage_csv', stage=stage_key):
+        raw_bytes = uploaded_file.getvalue()
+        for encoding, offset in _stage_headers(raw_bytes[:HEADER_SAMPLE_BYTES], stage):
+            file_content = io.BytesIO(raw_bytes)
+            file_content.seek(offset)
+            try:
+                with span('read_csv', encoding=encoding):
+                    df = pd.read_csv(file_content, encoding=encoding, **stage['read_options'])
+            except Exception:
+                continue
+
+            df = _tidy_stage_columns(df)
+            if _has_stage_columns(df, stage):
+                return df
+
+    return None
+
+def _tidy_stage_columns(df):
+    df.columns = df.columns.str.strip()
+    if df.columns[0] == '' or pd.isna(df.columns[0]):
+        df = df.iloc[:, 1:].copy()
+    return df
+
+def _has_stage_columns(df, stage):
+    return all(col in df.columns for col in stage['keywords'])
+
+@contextmanager
+def _open_binary(source):
+    """ 파일 경로는 열고 닫으며, 파일 객체는 처음으로 되감아 그대로 사용 """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as stream:
+            yield stream
+    else:
+        source.seek(0)
+        yield source
+
+def iter_stage_csv_chunks(source, stage_key, chunksize=DEFAULT_CHUNK_ROWS):
+    """
+    공정 CSV를 chunksize 행씩 읽어 돌려주는 제너레이터.
+    헤더 탐색과 인코딩 확인은 파일 앞부분(HEADER_SAMPLE_BYTES)만 보고 하므로,
+    파일 크기와 상관없이 한 번에 메모리에 올라가는 행은 chunksize개로 제한됩니다.
+    Args:
+        source: 파일 경로 또는 seek/read를 지원하는 파일 객체 (Streamlit UploadedFile 포함).
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        chunksize (int): 한 번에 읽을 행 수.
+    Yields:
+        pd.DataFrame: read_stage_csv와 같은 방식으로 컬럼명을 정리한 chunk.
+    Raises:
+        ValueError: 공정을 알 수 없거나, 어떤 인코딩으로도 헤더를 찾지 못한 경우.
+    """
+    stage = get_stage(stage_key)
+    if stage is None:
+        raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+
+    with _open_binary(source) as stream:
+        sample = stream.read(HEADER_SAMPLE_BYTES)
+        # 중간 chunk에서 디코딩이 실패하면 다른 인코딩으로 되돌아갈 수 없으므로 샘플을 디코딩할 수 있는 후보만 쓴다
+        for encoding, offset in _stage_headers(sample, stage):
+            stream.seek(offset)
+            try:
+                reader = pd.read_csv(stream, encoding=encoding, chunksize=chunksize, **stage['read_options'])
+                first = next(reader, None)
+            except (UnicodeError, pd.errors.ParserError, pd.errors.EmptyDataError):
+                continue
+            if first is not None:
+                first = _tidy_stage_columns(first)
+            if first is None or not _has_stage_columns(first, stage):
+                reader.close()
+                continue
+
+            yield first
+            with reader:
+                for chunk in reader:
+                    yield _tidy_stage_columns(chunk)
+            return
+
+    raise ValueError(f"{stage_key.upper()} 파일에서 헤더를 찾을 수 없습니다.")
+
+def decode_stage_datetime(series, date_format=None):
+    """
+    공정의 날짜 컬럼을 datetime으로 변환하고, 해석하지 못한 행 수를 함께 반환하는 함수.
+    형식이 없으면 표본으로 한 번 판정한 뒤 컬럼 전체를 같은 형식으로 해석합니다 (timestamp_decoder 참고).
+    고정 형식(예: %Y%m%d%H%M%S)이 숫자로 읽힌 경우에도 정수 문자열로 바꿔 변환합니다.
+    Args:
+        series (pd.Series): 날짜 컬럼.
+        date_format (str): 날짜 형식. None이면 표본으로 판정.
+    Returns:
+        tuple: (datetime64 Series (변환 실패 값은 NaT), 값이 있었는데 해석하지 못한 행 수).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series, 0
+    with span('to_datetime', rows=len(series)) as timer:
+        result, info = decode_timestamps(series, date_format)
+        timer.set(**info)
+    return result, info['unparsed']
+
+def to_stage_datetime(series, date_format=None):
+    """
+    공정의 날짜 컬럼을 datetime으로 변환하는 함수 (decode_stage_datetime에서 변환 결과만 반환).
+    Returns:
+        pd.Series: datetime64 Series. 변환 실패 값은 NaT.
+    """
+    return decode_stage_datetime(series, date_format)[0]
+
 def process_uploaded_csv(uploaded_file, tab_key):
     """
     업로드된 CSV 파일을 탭별로 처리하여 DataFrame을 반환하는 메인 함수.
@@ -60,48 +359,21 @@ def process_uploaded_csv(uploaded_file, tab_key):
     Returns:
         pd.DataFrame: 처리된 DataFrame. 실패 시 None 반환.
     """
-    if uploaded_file is None:
-        return None
-    
-    # 탭별로 필요한 키워드 및 날짜 컬럼 정보 정의
-    configs = {
-        'pcb': {
-            'keywords': ['SNumber', 'PcbStartTime', 'PcbMaxIrPwr', 'PcbPass'],
-            'date_col': 'PcbStartTime'
-        },
-        'fw': {
-            'keywords': ['SNumber', 'FwStamp', 'FwPC', 'FwPass'],
-            'date_col': 'FwStamp'
-        },
-        'rftx': {
-            'keywords': ['SNumber', 'RfTxStamp', 'RfTxPC', 'RfTxPass'],
-            'date_col': 'RfTxStamp'
-        },
-        'semi': {
-            'keywords': ['SNumber', 'SemiAssyStartTime', 'SemiAssyMaxBatVolt', 'SemiAssyPass'],
-            'date_col': 'SemiAssyStartTime'
-        },
-        'func': {
-            'keywords': ['SNumber', 'BatadcStamp', 'BatadcPC', 'BatadcPass'],
-            'date_col': 'BatadcStamp'
-        }
-    }
-    
-    config = configs.get(tab_key)
-    if not config:
+    stage = get_stage(tab_key)
+    if uploaded_file is None or stage is None:
         return None
 
-    # 동적 헤더 로딩
-    df = read_csv_with_dynamic_header(uploaded_file, config['keywords'])
-    
-    if df is None:
-        return None
+    with span('process_uploaded_csv', stage=tab_key):
+        # 공정 레지스트리 기준으로 동적 헤더 로딩
+        df = read_stage_csv(uploaded_file, tab_key)
+        if df is None:
+            return None
+
+        # 데이터 전처리
+        df = clean_string_columns(df)
+
+        # 날짜 컬럼을 datetime으로 변환
+        df[stage['date_col']], unparsed = decode_stage_datetime(df[stage['date_col']], stage['date_format'])
+        df.attrs['date_unparsed'] = unparsed
 
-    # 데이터 전처리
-    df.columns = df.columns.str.strip()
-    df = df.applymap(clean_string_format)
-    
-    # 날짜 컬럼을 datetime으로 변환
-    df[config['date_col']] = pd.to_datetime(df[config['date_col']], errors='coerce')
-    
     return df
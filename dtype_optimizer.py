@@ -0,0 +1,113 @@
+#
+# dtype_optimizer.py
+# 적재한 공정 DataFrame의 컬럼을 메모리를 적게 쓰는 dtype으로 바꾸고, 컬럼별 절감량을 보고합니다.
+#   - 지그/Pass 컬럼, PassStatusNorm, 값 종류가 적은 문자열 컬럼 -> category (int8 코드 + 값 목록)
+#   - SNumber 등 값 종류가 많은 문자열 컬럼 -> Arrow 문자열 (pyarrow가 있을 때)
+#   - 정수 측정값 -> 가장 작은 정수형, 실수 측정값 -> 값이 그대로 보존될 때만 float32
+# 값 자체는 바뀌지 않으므로 분석 결과는 변환 전과 같습니다.
+
+import numpy as np
+import pandas as pd
+
+from db_utils import ARROW_STRING_DTYPE
+from stages import get_stage
+
+# 고유값 비율이 이 값 이하인 문자열 컬럼은 category로 변환
+CATEGORY_RATIO = 0.5
+# 고유값 비율을 먼저 가늠할 표본 행 수 (값 종류가 많은 컬럼에서 전체 nunique를 피함)
+_SAMPLE_ROWS = 10000
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)
+
+
+def _low_cardinality(series, ratio):
+    sample = series.iloc[:_SAMPLE_ROWS]
+    if sample.nunique(dropna=True) > max(1, len(sample) * ratio):
+        return False
+    return series.nunique(dropna=True) <= max(1, len(series) * ratio)
+
+
+def _compact_column(series, force_category, ratio):
+    """컬럼 하나를 더 작은 dtype으로 바꾼 Series를 반환. 바꿀 것이 없으면 원래 Series를 그대로 반환"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype) \
+            or pd.api.types.is_datetime64_any_dtype(dtype):
+        return series
+
+    if _is_text(series):
+        if force_category or _low_cardinality(series, ratio):
+            return series.astype('category')
+        # 문자열만 들어 있는 object 컬럼만 Arrow 문자열로 (숫자가 섞이면 값이 문자열로 바뀌므로 제외)
+        if ARROW_STRING_DTYPE is not None and pd.api.types.is_object_dtype(dtype) \
+                and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+            return series.astype(ARROW_STRING_DTYPE)
+        return series
+
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+        return pd.to_numeric(series, downcast='unsigned' if dtype.kind == 'u' or series.min() >= 0 else 'integer')
+
+    if isinstance(dtype, np.dtype) and dtype.kind == 'f' and dtype.itemsize > 4:
+        narrowed = series.astype(np.float32)
+        values, restored = series.to_numpy(), narrowed.to_numpy().astype(dtype)
+        if np.array_equal(values, restored, equal_nan=True):
+            return narrowed
+    return series
+
+
+def optimize_stage_frame(df, stage_key=None, category_ratio=CATEGORY_RATIO):
+    """
+    DataFrame의 컬럼 dtype을 제자리에서 압축하고 컬럼별 메모리 변화를 반환하는 함수.
+    Args:
+        df (pd.DataFrame): 적재/분석이 끝난 공정 DataFrame. 컬럼이 제자리에서 교체됩니다.
+        stage_key (str): 공정 키. 주면 공정의 지그/Pass 컬럼은 고유값 비율과 상관없이 category로 바꿉니다.
+        category_ratio (float): 고유값 비율이 이 값 이하인 문자열 컬럼을 category로 변환.
+    Returns:
+        pd.DataFrame: column, before_dtype, after_dtype, before_bytes, after_bytes, saved_bytes 컬럼의 보고서
+            (절감량이 큰 순서).
+    """
+    stage = get_stage(stage_key) if stage_key is not None else None
+    category_cols = {'PassStatusNorm'}
+    if stage is not None:
+        category_cols.update(stage['jig_cols'])
+        category_cols.add(stage['pass_col'])
+
+    rows = []
+    for col in df.columns:
+        series = df[col]
+        before_bytes = int(series.memory_usage(deep=True, index=False))
+        compacted = _compact_column(series, col in category_cols, category_ratio)
+        if compacted is not series:
+            df[col] = compacted
+        after_bytes = int(compacted.memory_usage(deep=True, index=False))
+        rows.append({
+            'column': col,
+            'before_dtype': str(series.dtype),
+            'after_dtype': str(compacted.dtype),
+            'before_bytes': before_bytes,
+            'after_bytes': after_bytes,
+            'saved_bytes': before_bytes - after_bytes,
+        })
+
+    report = pd.DataFrame(rows, columns=['column', 'before_dtype', 'after_dtype', 'before_bytes', 'after_bytes', 'saved_bytes'])
+    return report.sort_values('saved_bytes', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def format_memory_report(report):
+    """optimize_stage_frame 보고서를 MB 단위 표로 바꾸는 함수 (화면 표시용)"""
+    total = pd.DataFrame([{
+        'column': '(합계)',
+        'before_dtype': '',
+        'after_dtype': '',
+        'before_bytes': report['before_bytes'].sum(),
+        'after_bytes': report['after_bytes'].sum(),
+        'saved_bytes': report['saved_bytes'].sum(),
+    }])
+    table = pd.concat([total, report], ignore_index=True)
+    for col in ['before_bytes', 'after_bytes', 'saved_bytes']:
+        table[col] = (table[col] / 1e6).round(2)
+    return table.rename(columns={
+        'column': '컬럼', 'before_dtype': '변환 전 dtype', 'after_dtype': '변환 후 dtype',
+        'before_bytes': '변환 전(MB)', 'after_bytes': '변환 후(MB)', 'saved_bytes': '절감(MB)',
+    })
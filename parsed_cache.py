@@ -0,0 +1,144 @@
+#
+# parsed_cache.py
+# 업로드 파일을 파싱한 DataFrame을 디스크에 Parquet으로 저장해 두는 캐시입니다.
+# 키는 업로드 바이트의 SHA-256 해시 + 공정 키이므로, 같은 파일을 다시 올리면
+# 재배포/재시작 후에도 CSV를 다시 파싱하지 않고 바로 불러옵니다.
+# 전체 캐시 크기가 상한을 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다 (LRU).
+
+import hashlib
+import os
+import time
+
+import pandas as pd
+
+from db_utils import read_stage_csv
+from profiling import span
+
+CACHE_DIR = os.environ.get('MES_PARSED_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.parsed_cache'))
+CACHE_MAX_BYTES = int(os.environ.get('MES_PARSED_CACHE_MAX_MB', '2048')) * 1024 * 1024
+
+
+def content_hash(raw_bytes):
+    """업로드 바이트의 SHA-256 해시(16진수 문자열)를 반환하는 함수"""
+    return hashlib.sha256(raw_bytes).hexdigest()
+
+
+def _cache_path(digest, stage_key, cache_dir):
+    return os.path.join(cache_dir, f"{stage_key}-{digest}.parquet")
+
+
+def load_parsed(digest, stage_key, cache_dir=CACHE_DIR):
+    """
+    캐시에 저장된 파싱 결과를 불러오는 함수. 읽을 때마다 사용 시각을 갱신합니다.
+    Args:
+        digest (str): 업로드 바이트의 content_hash.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        cache_dir (str): 캐시 디렉터리.
+    Returns:
+        pd.DataFrame: 캐시된 DataFrame. 없거나 읽을 수 없으면 None 반환.
+    """
+    path = _cache_path(digest, stage_key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        # 손상된 캐시 파일은 지우고 다시 파싱하게 한다
+        _remove_quietly(path)
+        return None
+    now = time.time()
+    os.utime(path, (now, now))
+    return df
+
+
+def store_parsed(df, digest, stage_key, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    파싱 결과를 Parquet으로 저장하고 캐시 전체 크기를 상한 이하로 맞추는 함수.
+    Parquet으로 저장할 수 없는 DataFrame(혼합 타입 컬럼 등)은 조용히 건너뜁니다.
+    Args:
+        df (pd.DataFrame): 저장할 DataFrame.
+        digest (str): 업로드 바이트의 content_hash.
+        stage_key (str): 공정 키.
+        cache_dir (str): 캐시 디렉터리.
+        max_bytes (int): 캐시 전체 크기 상한(바이트).
+    Returns:
+        bool: 저장에 성공하면 True.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(digest, stage_key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        _remove_quietly(tmp_path)
+        return False
+    evict_lru(cache_dir, max_bytes)
+    return True
+
+
+def evict_lru(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    """
+    캐시 파일의 총 크기가 max_bytes를 넘으면 사용 시각이 오래된 파일부터 삭제하는 함수.
+    Returns:
+        int: 삭제한 파일 수.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.parquet'):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if _remove_quietly(path):
+            total -= size
+            removed += 1
+    return removed
+
+
+def read_stage_csv_cached(uploaded_file, stage_key, cache_dir=CACHE_DIR, digest=None):
+    """
+    디스크 캐시를 먼저 확인하고, 없으면 read_stage_csv로 파싱한 뒤 캐시에 저장하는 함수.
+    Args:
+        uploaded_file: Streamlit의 file_uploader를 통해 업로드된 파일 객체.
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+        cache_dir (str): 캐시 디렉터리.
+        digest (str): 호출한 쪽에서 이미 계산한 content_hash. None이면 여기서 계산합니다.
+    Returns:
+        pd.DataFrame: 로드한 DataFrame. 실패 시 None 반환.
+    """
+    if uploaded_file is None:
+        return None
+
+    with span('read_stage_csv_cached', stage=stage_key) as timer:
+        if digest is None:
+            digest = content_hash(uploaded_file.getvalue())
+        df = load_parsed(digest, stage_key, cache_dir)
+        timer.set(hit=df is not None)
+        if df is not None:
+            return df
+
+        df = read_stage_csv(uploaded_file, stage_key)
+        if df is not None:
+            store_parsed(df, digest, stage_key, cache_dir)
+    return df
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,209 @@
+#
+# profiling.py
+# 처리 구간(파싱, 문자열 정리, 날짜 변환, groupby 집계, 화면 구간)의 소요 시간과 메모리(RSS)를 재는 가벼운 계측 계층입니다.
+#   - span('이름'): with 블록 하나를 한 구간으로 기록. 중첩하면 부모 구간이 함께 기록됩니다.
+#   - collect(): 현재 실행(Streamlit 재실행 한 번 등)에서 기록된 구간을 목록으로 모읍니다. 세션/스레드마다 따로 모입니다.
+#     백그라운드 작업 스레드에서 모은 구간은 add_spans()로 결과를 반영하는 실행의 목록에 더합니다.
+#   - MES_PROFILE=1 이면 모든 구간을 구조화 로그(JSON Lines, MES_PROFILE_LOG)에 남깁니다.
+# 수집 중이 아니고 로그도 꺼져 있으면 span()은 아무 일도 하지 않는 공용 객체를 돌려주므로 부담이 거의 없습니다.
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_LOG = os.environ.get('MES_PROFILE_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.mes_profile.jsonl'))
+
+_enabled = os.environ.get('MES_PROFILE', '') not in ('', '0')
+_log_lock = threading.Lock()
+# 현재 실행에서 구간을 모으는 곳: {'spans': [...], 'log': bool}
+_collector = ContextVar('profiling_collector', default=None)
+_current = ContextVar('profiling_current', default=None)
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def set_enabled(enabled, log_path=None):
+    """프로세스 전체의 구간 로그 기록을 켜거나 끄는 함수 (환경 변수 MES_PROFILE과 같은 효과)"""
+    global _enabled, PROFILE_LOG
+    _enabled = bool(enabled)
+    if log_path is not None:
+        PROFILE_LOG = log_path
+
+
+def is_active():
+    """지금 구간을 기록해야 하는지 (프로세스 로그가 켜져 있거나 현재 실행에서 수집 중)"""
+    return _enabled or _collector.get() is not None
+
+
+def _rss_bytes():
+    """현재 프로세스의 RSS. /proc이 없으면 최대 RSS로 대신하고, 둘 다 없으면 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+def _write_log(record):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        with open(PROFILE_LOG, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+class _NoopSpan:
+    """계측이 꺼져 있을 때 쓰는 빈 구간"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'fields', '_start', '_wall', '_rss', '_token', 'depth', 'parent')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        """구간이 끝나기 전에 기록할 값을 더하는 함수 (예: 처리한 행 수)"""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.parent = parent.name if parent is not None else None
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self._token = _current.set(self)
+        self._rss = _rss_bytes()
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        _current.reset(self._token)
+        rss = _rss_bytes()
+        record = {
+            'name': self.name,
+            'parent': self.parent,
+            'depth': self.depth,
+            'start': self._wall,
+            'seconds': seconds,
+            'rss_mb': rss / 1e6 if rss is not None else None,
+            'rss_delta_mb': (rss - self._rss) / 1e6 if rss is not None and self._rss is not None else None,
+            'error': exc_type.__name__ if exc_type is not None else None,
+            'thread': threading.current_thread().name,
+        }
+        record.update(self.fields)
+
+        collector = _collector.get()
+        if collector is not None:
+            collector['spans'].append(record)
+        if _enabled or (collector is not None and collector['log']):
+            _write_log(record)
+        return False
+
+
+def span(name, **fields):
+    """
+    with 블록 하나를 계측 구간으로 기록하는 함수.
+    Args:
+        name (str): 구간 이름 (예: 'read_csv', 'display.chart').
+        **fields: 함께 기록할 값 (예: stage='fw', rows=1000).
+    Returns:
+        context manager. 계측이 꺼져 있으면 아무것도 하지 않는 공용 객체.
+    """
+    if not _enabled and _collector.get() is None:
+        return _NOOP
+    return _Span(name, fields)
+
+
+def profiled(name=None):
+    """함수 호출 전체를 구간으로 기록하는 데코레이터. 이름을 주지 않으면 '모듈.함수' 이름을 사용"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and _collector.get() is None:
+                return func(*args, **kwargs)
+            with _Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def collect(log=False):
+    """
+    블록 안에서 기록된 구간을 모으는 함수. Streamlit 재실행 한 번을 감싸 '성능' 표를 만드는 데 씁니다.
+    Args:
+        log (bool): True이면 모은 구간을 구조화 로그 파일(PROFILE_LOG)에도 기록.
+    Yields:
+        list: 구간 기록(dict) 목록. 구간이 끝나는 순서로 추가됩니다.
+    """
+    collector = {'spans': [], 'log': log}
+    token = _collector.set(collector)
+    try:
+        yield collector['spans']
+    finally:
+        _collector.reset(token)
+
+
+def collecting():
+    """
+    현재 실행에서 구간을 모으는 중인지 확인하는 함수. 다른 스레드에서 같은 설정으로 collect()를 열 때 씁니다.
+    Returns:
+        bool: 모으는 중이면 로그 파일 기록 여부, 아니면 None.
+    """
+    collector = _collector.get()
+    return None if collector is None else collector['log']
+
+
+def add_spans(spans):
+    """다른 스레드(백그라운드 작업)에서 모은 구간 기록을 현재 실행의 수집 목록에 더하는 함수. 모으는 중이 아니면 무시"""
+    collector = _collector.get()
+    if collector is not None:
+        collector['spans'].extend(spans)
+
+
+def spans_table(spans):
+    """
+    구간 기록 목록을 화면 표시용 표로 바꾸는 함수. 시작 순서로 정렬하고 중첩 깊이만큼 이름을 들여씁니다.
+    Returns:
+        list: dict 목록 (구간, 시간(ms), RSS(MB), RSS 변화(MB), 기타 값).
+    """
+    base_keys = {'name', 'parent', 'depth', 'start', 'seconds', 'rss_mb', 'rss_delta_mb', 'error', 'thread'}
+    rows = []
+    for record in sorted(spans, key=lambda item: item['start']):
+        extra = {key: value for key, value in record.items() if key not in base_keys}
+        rows.append({
+            '구간': '  ' * record['depth'] + record['name'],
+            '시간(ms)': round(record['seconds'] * 1000, 1),
+            'RSS(MB)': round(record['rss_mb'], 1) if record['rss_mb'] is not None else None,
+            'RSS 변화(MB)': round(record['rss_delta_mb'], 1) if record['rss_delta_mb'] is not None else None,
+            '값': ', '.join(f"{key}={value}" for key, value in extra.items()),
+            '오류': record['error'] or '',
+        })
+    return rows
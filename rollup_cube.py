@@ -0,0 +1,130 @@
+#
+# rollup_cube.py
+# 분석 결과(summary_data)를 (jig, 날짜, 지표) 3차원 NumPy 배열로 펼쳐 두고, 날짜 축 누적합으로
+# 지그 선택/날짜 범위 합계를 dict 순회 없이 배열 슬라이스로 계산합니다.
+# 분석이 바뀔 때 한 번만 만들면 되므로, 위젯을 바꿀 때마다 일어나는 재실행에서는 조회만 합니다.
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import SUMMARY_METRICS
+
+
+class RollupCube:
+    """
+    values[jig, date, metric] 건수 배열과 날짜 축 누적합.
+    jig 축은 summary_data의 지그 순서(정렬), date 축은 all_dates, metric 축은 SUMMARY_METRICS 순서입니다.
+    """
+
+    def __init__(self, jigs, dates, values):
+        """
+        Args:
+            jigs (list): 지그 목록.
+            dates (list): 날짜(datetime.date) 목록, 오름차순.
+            values (np.ndarray): (len(jigs), len(dates), len(SUMMARY_METRICS)) int64 건수 배열.
+        """
+        self.jigs = list(jigs)
+        self.dates = np.array(dates, dtype='datetime64[D]')
+        self.values = values
+        self._jig_pos = {jig: i for i, jig in enumerate(self.jigs)}
+        # 지그를 모두 더한 평면은 '전체' 선택에서 매번 쓰므로 미리 만들어 둔다
+        self._total = values.sum(axis=0)
+        self._prefix = self._with_prefix(values, axis=1)
+        self._total_prefix = self._with_prefix(self._total, axis=0)
+
+    @staticmethod
+    def _with_prefix(values, axis):
+        # 앞에 0을 붙인 누적합: prefix[hi] - prefix[lo]가 [lo, hi) 구간 합
+        shape = list(values.shape)
+        shape[axis] = 1
+        return np.concatenate([np.zeros(shape, dtype=values.dtype), np.cumsum(values, axis=axis)], axis=axis)
+
+    def _date_bounds(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right'))
+        return lo, max(lo, hi)
+
+    def _jig_rows(self, jigs):
+        return [self._jig_pos[jig] for jig in jigs if jig in self._jig_pos]
+
+    def _daily(self, jigs):
+        """선택한 지그의 (날짜, 지표) 평면. None이면 전체 지그 합"""
+        if jigs is None:
+            return self._total
+        rows = self._jig_rows(jigs)
+        if len(rows) == 1:
+            return self.values[rows[0]]
+        return self.values[rows].sum(axis=0)
+
+    def range_total(self, jigs=None, start=None, end=None):
+        """
+        선택한 지그의 [start, end] 기간 지표 합계. 지그 하나 또는 전체 지그면 누적합 두 개의 차이로 계산합니다.
+        Args:
+            jigs (list): 지그 목록. None이면 전체 지그.
+            start, end (datetime.date): 기간 (양 끝 포함). None이면 처음/끝까지.
+        Returns:
+            dict: 지표 -> 건수.
+        """
+        lo, hi = self._date_bounds(start, end)
+        if jigs is None:
+            totals = self._total_prefix[hi] - self._total_prefix[lo]
+        else:
+            rows = self._jig_rows(jigs)
+            totals = (self._prefix[rows, hi] - self._prefix[rows, lo]).sum(axis=0)
+        return dict(zip(SUMMARY_METRICS, totals.tolist()))
+
+    def day_total(self, jigs=None, day=None):
+        """하루치 지표 합계. 그 날짜가 분석 결과에 없으면 None"""
+        lo, hi = self._date_bounds(day, day)
+        if lo == hi:
+            return None
+        return dict(zip(SUMMARY_METRICS, self._daily(jigs)[lo].tolist()))
+
+    def daily_frame(self, jigs=None, start=None, end=None):
+        """
+        선택한 지그의 일별 지표 표.
+        Returns:
+            pd.DataFrame: 날짜(datetime.date) 인덱스, SUMMARY_METRICS 컬럼.
+        """
+        lo, hi = self._date_bounds(start, end)
+        index = pd.Index(self.dates[lo:hi].astype(object), name='date')
+        return pd.DataFrame(self._daily(jigs)[lo:hi], index=index, columns=SUMMARY_METRICS)
+
+
+def build_rollup_cube(summary_data, all_dates):
+    """
+    summary_data를 RollupCube로 펼치는 함수. 분석 결과에 없는 (jig, 날짜) 칸은 0입니다.
+    Args:
+        summary_data (dict): summary_data[jig]['YYYY-MM-DD'] = 지표 dict.
+        all_dates (list): 분석한 모든 날짜(datetime.date), 오름차순.
+    Returns:
+        RollupCube
+    """
+    jigs = sorted(summary_data)
+    date_pos = {day.strftime('%Y-%m-%d'): i for i, day in enumerate(all_dates)}
+    values = np.zeros((len(jigs), len(all_dates), len(SUMMARY_METRICS)), dtype=np.int64)
+    for jig_index, jig in enumerate(jigs):
+        for date_iso, cell in summary_data[jig].items():
+            date_index = date_pos.get(date_iso)
+            if date_index is not None:
+                values[jig_index, date_index] = [cell.get(metric, 0) for metric in SUMMARY_METRICS]
+    return RollupCube(jigs, all_dates, values)
+
+
+def get_rollup_cube(cache, cache_key, analysis_data):
+    """
+    cache에 보관한 RollupCube를 재사용하고, 분석 결과 객체가 바뀌었을 때만 다시 만드는 함수.
+    Args:
+        cache (dict): 큐브를 보관할 dict (예: st.session_state의 항목).
+        cache_key: 분석 결과를 구분하는 키 (예: 공정 키).
+        analysis_data (tuple): (summary_data, all_dates) 분석 결과.
+    Returns:
+        RollupCube
+    """
+    entry = cache.get(cache_key)
+    if entry is not None and entry['source'] is analysis_data:
+        return entry['cube']
+    summary_data, all_dates = analysis_data[:2]
+    cube = build_rollup_cube(summary_data, all_dates)
+    cache[cache_key] = {'source': analysis_data, 'cube': cube}
+    return cube
@@ -0,0 +1,201 @@
+#
+# sn_index.py
+# SNumber 검색용 인덱스입니다. 데이터셋마다 한 번 만들어 두면 검색할 때마다 전체 행을 훑지 않습니다.
+#   - 완전 일치: 고유 SNumber의 해시 인덱스 (pd.Index)
+#   - 앞부분 일치: 정렬된 고유 SNumber 배열에서 이진 탐색 (np.searchsorted)
+#   - 부분 일치: 3-gram 역인덱스로 후보 SNumber를 좁힌 뒤 후보만 직접 확인
+# 검색은 대소문자를 구분하지 않는 문자열 일치(정규식 아님)이며, 결과는 원본 행 위치 배열입니다.
+
+import hashlib
+import weakref
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+SEARCH_MODES = ('contains', 'prefix', 'exact')
+
+# 3-gram 하나를 int64 하나로 만들 때 문자 하나에 쓰는 비트 수 (유니코드 코드 포인트 최대 21비트)
+_CODE_BITS = 21
+# 3-gram 추출 시 한 번에 처리할 고유 SNumber 수
+_BUILD_BLOCK = 200000
+
+
+def _normalize(series):
+    return series.astype(str).str.upper()
+
+
+def _gram_codes(codepoints, start):
+    """(n, 길이) 코드 포인트 배열에서 start 위치의 3-gram 코드를 계산"""
+    code = np.zeros(len(codepoints), dtype=np.int64)
+    for offset in range(NGRAM):
+        code = (code << _CODE_BITS) | codepoints[:, start + offset].astype(np.int64)
+    return code
+
+
+class SNumberIndex:
+    """
+    한 DataFrame의 SNumber 컬럼에 대한 검색 인덱스.
+    고유 SNumber를 정렬해 두고, 각 SNumber에 해당하는 행 위치를 연속 구간으로 모아 둡니다.
+    """
+
+    def __init__(self, sn_series):
+        """
+        Args:
+            sn_series (pd.Series): SNumber 컬럼. 결측값은 어떤 검색에도 걸리지 않습니다.
+        """
+        self.row_count = len(sn_series)
+        present = sn_series.notna().to_numpy()
+        rows = np.flatnonzero(present)
+        codes, uniques = pd.factorize(_normalize(sn_series[present]), sort=True)
+
+        self._keys = np.asarray(uniques, dtype=object)
+        self._lookup = pd.Index(self._keys)
+        # 해시 테이블은 첫 조회 때 만들어지므로 인덱스를 만들 때 미리 만들어 둔다
+        self._lookup.get_indexer(self._keys[:1])
+        # 고유 SNumber 순서로 행 위치를 모으고, 각 SNumber의 구간 시작점을 기록
+        self._rows = rows[np.argsort(codes, kind='stable')]
+        self._starts = np.zeros(len(self._keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(self._keys)), out=self._starts[1:])
+        self._build_ngrams()
+
+    def _build_ngrams(self):
+        gram_parts, group_parts = [], []
+        for block_start in range(0, len(self._keys), _BUILD_BLOCK):
+            block = np.array(self._keys[block_start:block_start + _BUILD_BLOCK], dtype=str)
+            width = block.dtype.itemsize // 4
+            if width < NGRAM:
+                continue
+            lengths = np.char.str_len(block)
+            codepoints = block.view(np.uint32).reshape(len(block), width)
+            groups = np.arange(block_start, block_start + len(block), dtype=np.int64)
+            for start in range(width - NGRAM + 1):
+                valid = lengths >= start + NGRAM
+                if not valid.any():
+                    break
+                gram_parts.append(_gram_codes(codepoints[valid], start))
+                group_parts.append(groups[valid])
+
+        if not gram_parts:
+            self._gram_codes = np.empty(0, dtype=np.int64)
+            self._gram_starts = np.zeros(1, dtype=np.int64)
+            self._gram_groups = np.empty(0, dtype=np.int64)
+            return
+
+        grams = np.concatenate(gram_parts)
+        groups = np.concatenate(group_parts)
+        order = np.lexsort((groups, grams))
+        grams, groups = grams[order], groups[order]
+        # 같은 SNumber 안에서 반복되는 3-gram은 한 번만 남긴다
+        keep = np.ones(len(grams), dtype=bool)
+        keep[1:] = (grams[1:] != grams[:-1]) | (groups[1:] != groups[:-1])
+        grams, groups = grams[keep], groups[keep]
+
+        self._gram_codes, first = np.unique(grams, return_index=True)
+        self._gram_starts = np.append(first, len(grams)).astype(np.int64)
+        self._gram_groups = groups
+
+    def __len__(self):
+        return self.row_count
+
+    def _rows_for_groups(self, groups):
+        """고유 SNumber 번호 목록에 해당하는 모든 행 위치 (원본 순서로 정렬)"""
+        if len(groups) == 0:
+            return np.empty(0, dtype=np.int64)
+        starts = self._starts[groups]
+        counts = self._starts[groups + 1] - starts
+        # 각 구간 [start, start + count)를 반복문 없이 이어 붙인다
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = offsets + np.arange(counts.sum())
+        return np.sort(self._rows[positions])
+
+    def _exact_groups(self, key):
+        group = self._lookup.get_indexer([key])[0]
+        return np.array([group] if group >= 0 else [], dtype=np.int64)
+
+    def _prefix_groups(self, key):
+        lo = np.searchsorted(self._keys, key, side='left')
+        hi = np.searchsorted(self._keys, key + '\U0010ffff', side='left')
+        return np.arange(lo, hi, dtype=np.int64)
+
+    def _contains_groups(self, key):
+        if len(key) < NGRAM:
+            # 3-gram을 만들 수 없는 짧은 검색어는 고유 SNumber만 훑는다 (행 전체보다 훨씬 적음)
+            matched = pd.Series(self._keys, dtype=object).str.contains(key, regex=False).to_numpy()
+            return np.flatnonzero(matched)
+
+        codepoints = np.frombuffer(key.encode('utf-32-le'), dtype=np.uint32).reshape(1, -1)
+        postings = []
+        for start in range(len(key) - NGRAM + 1):
+            code = _gram_codes(codepoints, start)[0]
+            slot = np.searchsorted(self._gram_codes, code)
+            if slot == len(self._gram_codes) or self._gram_codes[slot] != code:
+                return np.empty(0, dtype=np.int64)
+            postings.append(self._gram_groups[self._gram_starts[slot]:self._gram_starts[slot + 1]])
+
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        if len(key) == NGRAM:
+            return candidates
+        # 3-gram이 모두 들어 있어도 순서가 다를 수 있으므로 후보만 직접 확인
+        matched = pd.Series(self._keys[candidates], dtype=object).str.contains(key, regex=False).to_numpy()
+        return candidates[matched]
+
+    def search(self, query, mode='contains'):
+        """
+        SNumber를 검색해 일치하는 행 위치를 반환하는 함수.
+        Args:
+            query (str): 검색어. 앞뒤 공백은 무시하고 대소문자를 구분하지 않습니다.
+            mode (str): 'contains'(부분 일치), 'prefix'(앞부분 일치), 'exact'(완전 일치).
+        Returns:
+            np.ndarray: 일치하는 행의 위치(df.iloc용), 오름차순.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"알 수 없는 검색 방식입니다: {mode}")
+        key = str(query).strip().upper()
+        if not key:
+            return np.empty(0, dtype=np.int64)
+        if mode == 'exact':
+            groups = self._exact_groups(key)
+        elif mode == 'prefix':
+            groups = self._prefix_groups(key)
+        else:
+            groups = self._contains_groups(key)
+        return self._rows_for_groups(groups)
+
+
+def _fingerprint(sn_series):
+    """행 순서까지 반영한 SNumber 컬럼 지문 (같은 값이 다른 순서로 오면 행 위치가 달라지므로 다른 지문)"""
+    hashes = pd.util.hash_pandas_object(sn_series, index=False).to_numpy()
+    return len(sn_series), hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+def get_sn_index(cache, cache_key, df, sn_col='SNumber'):
+    """
+    cache에 보관한 SNumber 인덱스를 재사용하고, 데이터가 바뀌었을 때만 다시 만드는 함수.
+    같은 DataFrame 객체면 바로 재사용하고, 다른 객체면 SNumber 컬럼의 (행 순서를 반영한) 해시를 비교합니다.
+    객체는 약한 참조로 기억하므로, 지워진 DataFrame의 id를 새 객체가 물려받아도 잘못 재사용하지 않습니다.
+    Args:
+        cache (dict): 인덱스를 보관할 dict (예: st.session_state의 항목).
+        cache_key: 데이터셋을 구분하는 키 (예: 공정 키).
+        df (pd.DataFrame): 검색할 DataFrame.
+        sn_col (str): SNumber 컬럼명.
+    Returns:
+        SNumberIndex: df의 행 위치 기준 인덱스.
+    """
+    entry = cache.get(cache_key)
+    if entry is not None and entry['frame']() is df and len(entry['index']) == len(df):
+        return entry['index']
+
+    fingerprint = _fingerprint(df[sn_col])
+    if entry is not None and entry['fingerprint'] == fingerprint:
+        entry['frame'] = weakref.ref(df)
+        return entry['index']
+
+    index = SNumberIndex(df[sn_col])
+    cache[cache_key] = {'frame': weakref.ref(df), 'fingerprint': fingerprint, 'index': index}
+    return index
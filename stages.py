@@ -0,0 +1,115 @@
+#
+# stages.py
+# 공정(테스트 스테이션)별 CSV 형식을 선언적으로 정의한 레지스트리입니다.
+# 리더(db_utils.read_stage_csv)와 분석기(analysis_engine.analyze_stage)는 모두 이 정의만 보고 동작하므로,
+# 새 공정을 추가할 때는 STAGES에 항목 하나만 추가하면 됩니다.
+#
+# 각 항목의 키:
+#   name        : 공정 이름 (컬럼 접두어)
+#   table       : MES DB 테이블명
+#   tab_label   : 탭 제목
+#   header      : 탭 안의 헤더 문구
+#   keywords    : 헤더 줄을 찾기 위한 키워드
+#   date_col    : 날짜/시간 컬럼
+#   date_format : 날짜 형식 (None이면 표본으로 판정, timestamp_decoder.KNOWN_FORMATS 참고)
+#   jig_cols    : 지그(PC) 컬럼 후보. 앞에서부터 값이 있는 첫 컬럼을 사용
+#   default_jig : 지그 컬럼을 하나도 쓸 수 없을 때 첫 후보 컬럼에 채울 값
+#   pass_col    : 'O'/'X' Pass 컬럼
+#   encodings   : 순서대로 시도할 파일 인코딩
+#   header_rows : 헤더를 찾기 위해 검사할 최대 줄 수
+#   partial_match : 키워드가 셀 값의 일부로만 포함되어도 헤더로 인정할지 여부
+#   read_options  : pd.read_csv에 추가로 넘길 인자
+
+STAGES = {
+    'pcb': {
+        'name': 'Pcb',
+        'table': 'Pcb_Process',
+        'tab_label': "파일 PCB 분석",
+        'header': "파일 PCB (Pcb_Process)",
+        'keywords': ['SNumber', 'PcbStartTime', 'PcbMaxIrPwr', 'PcbPass'],
+        'date_col': 'PcbStartTime',
+        'date_format': None,
+        'jig_cols': ['PcbMaxIrPwr'],
+        'default_jig': 'DefaultJig',
+        'pass_col': 'PcbPass',
+        'encodings': ['utf-8'],
+        'header_rows': 100,
+        'partial_match': False,
+        'read_options': {},
+    },
+    'fw': {
+        'name': 'Fw',
+        'table': 'Fw_Process',
+        'tab_label': "파일 Fw 분석",
+        'header': "파일 Fw (Fw_Process)",
+        'keywords': ['SNumber', 'FwStamp', 'FwPC', 'FwPass'],
+        'date_col': 'FwStamp',
+        'date_format': None,
+        'jig_cols': ['FwPC'],
+        'default_jig': 'DefaultJig',
+        'pass_col': 'FwPass',
+        'encodings': ['utf-8'],
+        'header_rows': 100,
+        'partial_match': False,
+        'read_options': {},
+    },
+    'rftx': {
+        'name': 'RfTx',
+        'table': 'RfTx_Process',
+        'tab_label': "파일 RfTx 분석",
+        'header': "파일 RfTx (RfTx_Process)",
+        'keywords': ['SNumber', 'RfTxStamp', 'RfTxPC', 'RfTxPass'],
+        'date_col': 'RfTxStamp',
+        'date_format': None,
+        'jig_cols': ['RfTxPC'],
+        'default_jig': 'DefaultJig',
+        'pass_col': 'RfTxPass',
+        'encodings': ['utf-8'],
+        'header_rows': 100,
+        'partial_match': False,
+        'read_options': {},
+    },
+    'semi': {
+        'name': 'SemiAssy',
+        'table': 'SemiAssy_Process',
+        'tab_label': "파일 Semi 분석",
+        'header': "파일 Semi (SemiAssy_Process)",
+        'keywords': ['SNumber', 'SemiAssyStartTime', 'SemiAssyPass'],
+        'date_col': 'SemiAssyStartTime',
+        'date_format': '%Y%m%d%H%M%S',
+        'jig_cols': ['SemiAssyMaxSolarVolt', 'BatadcPC', 'SemiAssyMaxBatVolt'],
+        'default_jig': 'SemiAssy_JIG',
+        'pass_col': 'SemiAssyPass',
+        'encodings': ['utf-8-sig', 'utf-8', 'cp949', 'euc-kr', 'latin-1'],
+        'header_rows': 20,
+        'partial_match': True,
+        'read_options': {'skipinitialspace': True},
+    },
+    'func': {
+        'name': 'Batadc',
+        'table': 'Func_Process',
+        'tab_label': "파일 Func 분석",
+        'header': "파일 Func (Func_Process)",
+        'keywords': ['SNumber', 'BatadcStamp', 'BatadcPC', 'BatadcPass'],
+        'date_col': 'BatadcStamp',
+        'date_format': None,
+        'jig_cols': ['BatadcPC'],
+        'default_jig': 'DefaultJig',
+        'pass_col': 'BatadcPass',
+        'encodings': ['utf-8'],
+        'header_rows': 100,
+        'partial_match': False,
+        'read_options': {},
+    },
+}
+
+
+def get_stage(stage_key):
+    """
+    공정 키로 레지스트리 항목을 찾는 함수.
+    Args:
+        stage_key (str): 공정 키 (pcb, fw, rftx, semi, func).
+    Returns:
+        dict: 공정 정의. 없는 키이면 None 반환.
+    """
+    return STAGES.get(stage_key)
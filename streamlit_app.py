@@ -1,18 +1,117 @@
+import copy
+import io
+import math
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import altair as alt
 
-# 각 CSV 분석 모듈 불러오기
-from csv2 import read_csv_with_dynamic_header, analyze_data
-from csv_Fw import read_csv_with_dynamic_header_for_Fw, analyze_Fw_data
-from csv_RfTx import read_csv_with_dynamic_header_for_RfTx, analyze_RfTx_data
-from csv_Semi import read_csv_with_dynamic_header_for_Semi, analyze_Semi_data
-from csv_Batadc import read_csv_with_dynamic_header_for_Batadc, analyze_Batadc_data
+# 공정 레지스트리와 공통 리더/분석 파이프라인 불러오기
+from stages import STAGES
+from parsed_cache import read_stage_csv_cached, content_hash
+from db_source import ConnectionPool, load_db_config, iter_stage_chunks, read_stage_from_db, list_stage_jigs, table_columns
+from columnar_store import (ingest_stage_frame, list_partitions, load_stage, load_stage_summaries, stage_columns,
+                            analysis_columns, write_stage_summaries)
+from analysis_engine import (analyze_stage, analyze_stage_chunks, analyze_stage_timeseries, summary_from_table,
+                             summary_details, IncrementalAnalyzer, DEFAULT_SHIFTS)
+from db_utils import iter_stage_csv_chunks
+from batch_ingest import detect_stage, ingest_stages_parallel
+from sn_index import get_sn_index
+from traceability import build_route_table, filter_routes, route_column
+from dtype_optimizer import optimize_stage_frame, format_memory_report
+from data_handle import session_memory_report
+from analysis_cache import AnalysisCache, analysis_key
+from rollup_cube import get_rollup_cube
+from background_jobs import JobCancelled, JobRunner
+import profiling
+from profiling import span, spans_table
+
+SEARCH_MODE_LABELS = {'contains': "부분 일치", 'prefix': "앞부분 일치", 'exact': "완전 일치"}
+TIME_BUCKET_LABELS = {'hour': "시간", 'shift': "교대", 'day': "일", 'week': "주 (ISO)", 'month': "월"}
+
+# 페이지 단위 표시: 화면으로는 현재 페이지 구간만 보낸다
+ROW_PAGE_SIZES = [100, 500, 1000, 5000]
+CELL_PAGE_SIZES = [5, 10, 20, 50]
+SN_PAGE_SIZES = [100, 500, 1000]
+
+def page_bounds(state_key, total, page_sizes, unit="행"):
+    """ 페이지 크기/번호 위젯을 그리고, 현재 페이지의 [start, stop) 구간을 반환 """
+    size_col, page_col, info_col = st.columns([1, 1, 2])
+    with size_col:
+        page_size = st.selectbox("페이지 크기", page_sizes, key=f"{state_key}_size")
+    page_count = max(1, math.ceil(total / page_size))
+    page_key = f"{state_key}_page"
+    # 데이터나 페이지 크기가 바뀌어 페이지 수가 줄면 마지막 페이지로 맞춘다
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+    with page_col:
+        page = st.number_input(f"페이지 (/{page_count:,})", min_value=1, max_value=page_count, value=1, step=1, key=page_key)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    with info_col:
+        st.caption(f"전체 {total:,}{unit} 중 {start + 1 if total else 0:,}~{stop:,}")
+    return start, stop
+
+def parse_shifts(text):
+    """ '주간=8, 야간=20' 형식의 교대 정의를 (이름, 시작 시각) 목록으로 변환 """
+    shifts = []
+    for part in text.split(','):
+        name, _, start = part.partition('=')
+        if not name.strip() or not start.strip():
+            raise ValueError(f"교대 정의 형식이 올바르지 않습니다: {part.strip()}")
+        shifts.append((name.strip(), float(start)))
+    return tuple(shifts)
+
+def get_time_rollup(analysis_key, granularity, shifts, start_date, end_date):
+    """ 선택 기간의 행을 시간 구간별로 집계 (분석 결과와 조건이 같으면 재실행 시 재사용) """
+    analysis_data = st.session_state.analysis_data[analysis_key]
+    params = (granularity, shifts, start_date, end_date)
+    entry = st.session_state.time_rollups.get(analysis_key)
+    if entry is not None and entry['source'] is analysis_data and entry['params'] == params:
+        return entry['rollup']
+
+    date_col = STAGES[analysis_key]['date_col']
+    df_raw = st.session_state.analysis_results[analysis_key]
+    if df_raw is None:
+        # 원본 행이 메모리에 없는 대용량 모드는 저장소/DB에서 선택 기간의 행만 읽는다
+        rows = load_source_rows(analysis_key, start_date, end_date, columns=analysis_columns(analysis_key))
+    else:
+        in_range = (df_raw[date_col] >= pd.Timestamp(start_date)) & (df_raw[date_col] < pd.Timestamp(end_date) + pd.Timedelta(days=1))
+        columns = [col for col in analysis_columns(analysis_key) + ['PassStatusNorm'] if col in df_raw.columns]
+        rows = df_raw.loc[in_range, columns]
+    rollup = analyze_stage_timeseries(rows, analysis_key, granularity, shifts) if rows is not None and not rows.empty else None
+    st.session_state.time_rollups[analysis_key] = {'source': analysis_data, 'params': params, 'rollup': rollup}
+    return rollup
+
+def load_source_rows(analysis_key, start_date, end_date, columns=None):
+    """ 원본 행을 메모리에 두지 않는 분석에서, 선택 기간의 행만 분석한 원본(저장소 또는 MES DB)에서 다시 읽는다 """
+    source = st.session_state.analysis_source.get(analysis_key, {})
+    if source.get('kind') == 'db':
+        return read_stage_from_db(get_db_pool(), analysis_key, start_date, end_date, source.get('jigs'), columns=columns)
+    return load_stage(analysis_key, start_date, end_date, columns=columns)
+
+def source_columns(analysis_key):
+    """ 원본 행을 메모리에 두지 않는 분석에서 원본(저장소 또는 MES DB)의 컬럼 목록 """
+    if st.session_state.analysis_source.get(analysis_key, {}).get('kind') == 'db':
+        return table_columns(get_db_pool(), analysis_key)
+    return stage_columns(analysis_key)
+
+def get_day_details(analysis_key, date_obj):
+    """ 요약 테이블로 연 분석에서 SNumber 목록이 필요할 때만, 그 날짜의 원본 행을 저장소/DB에서 읽어 집계 (분석이 같으면 재사용) """
+    analysis_data = st.session_state.analysis_data[analysis_key]
+    entry = st.session_state.day_details.get(analysis_key)
+    if entry is None or entry['source'] is not analysis_data:
+        entry = {'source': analysis_data, 'days': {}}
+        st.session_state.day_details[analysis_key] = entry
+    if date_obj not in entry['days']:
+        rows = load_source_rows(analysis_key, date_obj, date_obj, columns=analysis_columns(analysis_key))
+        # 요약 테이블과 같은 지그 키(문자열/숫자가 섞인 지그는 문자열)로 만들어야 셀 상세를 찾을 수 있다
+        entry['days'][date_obj] = summary_details(rows, analysis_key) if rows is not None else {}
+    return entry['days'][date_obj]
 
 def display_analysis_result(analysis_key, file_name, jig_col_name):
     """ session_state에 저장된 분석 결과를 Streamlit에 표시하는 함수 """
-    if st.session_state.analysis_results[analysis_key] is None:
+    if st.session_state.analysis_data[analysis_key] is None:
         st.error("데이터 로드에 실패했습니다. 파일 형식을 확인해주세요.")
         return
 
@@ -22,188 +121,585 @@ def display_analysis_result(analysis_key, file_name, jig_col_name):
     st.markdown(f"### '{file_name}' 분석 리포트")
 
     # --- 기본 필터링 (Jig, 날짜 범위) ---
-    st.subheader("기본 필터링")
-    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    with span('display.filters', stage=analysis_key):
+        st.subheader("기본 필터링")
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
     
-    with filter_col1:
-        jig_list = sorted(df_raw[jig_col_name].dropna().unique().tolist()) if jig_col_name in df_raw.columns else []
-        selected_jig = st.selectbox("PC(Jig) 선택", ["전체"] + jig_list, key=f"select_{analysis_key}")
+        with filter_col1:
+            if df_raw is None:
+                # 스트리밍 분석은 원본 행을 메모리에 두지 않으므로 집계 결과의 지그 목록을 쓴다
+                jig_list = sorted(summary_data)
+            else:
+                jig_list = sorted(df_raw[jig_col_name].dropna().unique().tolist()) if jig_col_name in df_raw.columns else []
+            selected_jig = st.selectbox("PC(Jig) 선택", ["전체"] + jig_list, key=f"select_{analysis_key}")
     
-    if not all_dates:
-        st.warning("분석할 데이터가 없습니다.")
-        return
+        if not all_dates:
+            st.warning("분석할 데이터가 없습니다.")
+            return
         
-    min_date, max_date = min(all_dates), max(all_dates)
-    with filter_col2:
-        start_date = st.date_input("시작 날짜", min_value=min_date, max_value=max_date, value=min_date, key=f"start_date_{analysis_key}")
-    with filter_col3:
-        end_date = st.date_input("종료 날짜", min_value=min_date, max_value=max_date, value=max_date, key=f"end_date_{analysis_key}")
-
-    if start_date > end_date:
-        st.error("시작 날짜는 종료 날짜보다 이전이어야 합니다.")
-        return
-
-    filtered_dates = [d for d in all_dates if start_date <= d <= end_date]
-    if not filtered_dates:
-        st.warning("선택된 날짜 범위에 해당하는 데이터가 없습니다.")
-        return
-
-    st.write(f"**분석 시간**: {st.session_state.analysis_time[analysis_key]}")
-    st.markdown("---")
+        min_date, max_date = min(all_dates), max(all_dates)
+        with filter_col2:
+            start_date = st.date_input("시작 날짜", min_value=min_date, max_value=max_date, value=min_date, key=f"start_date_{analysis_key}")
+        with filter_col3:
+            end_date = st.date_input("종료 날짜", min_value=min_date, max_value=max_date, value=max_date, key=f"end_date_{analysis_key}")
+
+        if start_date > end_date:
+            st.error("시작 날짜는 종료 날짜보다 이전이어야 합니다.")
+            return
+
+        filtered_dates = [d for d in all_dates if start_date <= d <= end_date]
+        if not filtered_dates:
+            st.warning("선택된 날짜 범위에 해당하는 데이터가 없습니다.")
+            return
+
+        st.write(f"**분석 시간**: {st.session_state.analysis_time[analysis_key]}")
+        dtype_report = st.session_state.dtype_reports.get(analysis_key)
+        if dtype_report is not None:
+            with st.expander(f"메모리 최적화 결과 (절감 {dtype_report['saved_bytes'].sum() / 1e6:,.1f} MB)"):
+                st.dataframe(format_memory_report(dtype_report), hide_index=True)
+        st.markdown("---")
 
     # --- 데이터 집계 ---
-    jigs_to_display = jig_list if selected_jig == "전체" else [selected_jig]
-    
-    daily_aggregated_data = {}
-    for date_obj in all_dates: # 전체 날짜에 대해 집계 데이터 미리 계산
-        daily_totals = {key: 0 for key in ['total_test', 'pass', 'false_defect', 'true_defect', 'fail']}
-        for jig in jigs_to_display:
-            data_point = summary_data.get(jig, {}).get(date_obj.strftime('%Y-%m-%d'))
-            if data_point:
-                for key in daily_totals:
-                    daily_totals[key] += data_point.get(key, 0)
-        daily_aggregated_data[date_obj] = daily_totals
+    with span('display.rollup', stage=analysis_key):
+        jigs_to_display = jig_list if selected_jig == "전체" else [selected_jig]
+        # 분석 결과가 바뀔 때만 만드는 (jig, 날짜, 지표) 큐브에서 선택 지그/기간을 잘라 온다
+        cube = get_rollup_cube(st.session_state.rollup_cubes, analysis_key, st.session_state.analysis_data[analysis_key])
+        cube_jigs = None if selected_jig == "전체" else jigs_to_display
+        daily_df = cube.daily_frame(cube_jigs, start_date, end_date)
 
     # --- 최종일 데이터 요약 (KPI 카드) ---
-    st.subheader(f"요약: {end_date.strftime('%Y-%m-%d')}")
+    with span('display.kpi', stage=analysis_key):
+        st.subheader(f"요약: {end_date.strftime('%Y-%m-%d')}")
     
-    last_day_data = daily_aggregated_data.get(end_date)
-    prev_date = end_date - timedelta(days=1)
-    prev_day_data = daily_aggregated_data.get(prev_date)
-
-    delta_false, delta_true = None, None
-    if last_day_data and prev_day_data:
-        delta_false = last_day_data['false_defect'] - prev_day_data['false_defect']
-        delta_true = last_day_data['true_defect'] - prev_day_data['true_defect']
-
-    kpi_cols = st.columns(5)
-    if last_day_data:
-        kpi_cols[0].metric("총 테스트 수", f"{last_day_data['total_test']:,}")
-        kpi_cols[1].metric("PASS", f"{last_day_data['pass']:,}")
-        kpi_cols[2].metric("FAIL", f"{last_day_data['fail']:,}")
-        kpi_cols[3].metric("가성불량", f"{last_day_data['false_defect']:,}", delta=f"{delta_false}" if delta_false is not None else None)
-        kpi_cols[4].metric("진성불량", f"{last_day_data['true_defect']:,}", delta=f"{delta_true}" if delta_true is not None else None)
-    st.markdown("---")
+        last_day_data = cube.day_total(cube_jigs, end_date)
+        prev_date = end_date - timedelta(days=1)
+        prev_day_data = cube.day_total(cube_jigs, prev_date)
+
+        delta_false, delta_true = None, None
+        if last_day_data and prev_day_data:
+            delta_false = last_day_data['false_defect'] - prev_day_data['false_defect']
+            delta_true = last_day_data['true_defect'] - prev_day_data['true_defect']
+
+        kpi_cols = st.columns(5)
+        if last_day_data:
+            kpi_cols[0].metric("총 테스트 수", f"{last_day_data['total_test']:,}")
+            kpi_cols[1].metric("PASS", f"{last_day_data['pass']:,}")
+            kpi_cols[2].metric("FAIL", f"{last_day_data['fail']:,}")
+            kpi_cols[3].metric("가성불량", f"{last_day_data['false_defect']:,}", delta=f"{delta_false}" if delta_false is not None else None)
+            kpi_cols[4].metric("진성불량", f"{last_day_data['true_defect']:,}", delta=f"{delta_true}" if delta_true is not None else None)
+        range_totals = cube.range_total(cube_jigs, start_date, end_date)
+        st.caption(
+            f"기간 합계 ({start_date} ~ {end_date}): 총 테스트 {range_totals['total_test']:,} / PASS {range_totals['pass']:,} / "
+            f"FAIL {range_totals['fail']:,} / 가성불량 {range_totals['false_defect']:,} / 진성불량 {range_totals['true_defect']:,}"
+        )
+        st.markdown("---")
 
 
     # --- 일별 요약 테이블 ---
-    st.subheader("일별 요약 테이블")
-    report_data = {'지표': ['총 테스트 수', 'PASS', '가성불량', '진성불량', 'FAIL']}
-    for date_obj in filtered_dates:
-        daily_totals = daily_aggregated_data.get(date_obj, {})
-        date_str_col = date_obj.strftime('%y%m%d')
-        report_data[date_str_col] = [
-            daily_totals.get('total_test', 0), daily_totals.get('pass', 0), daily_totals.get('false_defect', 0),
-            daily_totals.get('true_defect', 0), daily_totals.get('fail', 0)
-        ]
-    report_df = pd.DataFrame(report_data).set_index('지표')
-    st.dataframe(report_df)
+    with span('display.table', stage=analysis_key):
+        st.subheader("일별 요약 테이블")
+        report_df = daily_df.T
+        report_df.index = pd.Index(['총 테스트 수', 'PASS', '가성불량', '진성불량', 'FAIL'], name='지표')
+        report_df.columns = [date_obj.strftime('%y%m%d') for date_obj in daily_df.index]
+        st.dataframe(report_df)
 
     # --- 일별 추이 그래프 ---
-    st.subheader("일자별 불량 추이")
-    chart_mode_key = f'chart_mode_{analysis_key}'
-    if chart_mode_key not in st.session_state:
-        st.session_state[chart_mode_key] = 'bar'
-
-    graph_cols = st.columns(2)
-    with graph_cols[0]:
-        if st.button("꺾은선 그래프", key=f"line_chart_btn_{analysis_key}"):
-            st.session_state[chart_mode_key] = 'line'
-    with graph_cols[1]:
-        if st.button("막대 그래프", key=f"bar_chart_btn_{analysis_key}"):
+    with span('display.chart', stage=analysis_key):
+        st.subheader("기간별 불량 추이")
+        bucket_cols = st.columns(2)
+        with bucket_cols[0]:
+            granularity = st.selectbox("집계 단위", list(TIME_BUCKET_LABELS), index=list(TIME_BUCKET_LABELS).index('day'),
+                                       format_func=TIME_BUCKET_LABELS.get, key=f"granularity_{analysis_key}")
+        with bucket_cols[1]:
+            shift_text = st.text_input("교대 시작 시각 (이름=시)", value=", ".join(f"{name}={start}" for name, start in DEFAULT_SHIFTS),
+                                       disabled=granularity != 'shift', key=f"shifts_{analysis_key}")
+        chart_mode_key = f'chart_mode_{analysis_key}'
+        if chart_mode_key not in st.session_state:
             st.session_state[chart_mode_key] = 'bar'
+
+        graph_cols = st.columns(2)
+        with graph_cols[0]:
+            if st.button("꺾은선 그래프", key=f"line_chart_btn_{analysis_key}"):
+                st.session_state[chart_mode_key] = 'line'
+        with graph_cols[1]:
+            if st.button("막대 그래프", key=f"bar_chart_btn_{analysis_key}"):
+                st.session_state[chart_mode_key] = 'bar'
     
-    chart_data_list = [
-        {'date': date, '가성불량': data['false_defect'], '진성불량': data['true_defect'], 'FAIL': data['fail']}
-        for date, data in daily_aggregated_data.items() if start_date <= date <= end_date
-    ]
-
-    if chart_data_list:
-        chart_df = pd.DataFrame(chart_data_list)
-        chart_df_melted = chart_df.melt('date', var_name='불량 유형', value_name='수량')
-
-        common_chart = alt.Chart(chart_df_melted).encode(
-            x=alt.X('date:T', axis=alt.Axis(title='날짜')),#, format='%Y-%m-%d')),
-            y=alt.Y('수량:Q', axis=alt.Axis(title='불량 건수')),
-            color=alt.Color('불량 유형', legend=alt.Legend(title="불량 유형")),
-            tooltip=['date:T', '불량 유형', '수량']
-        ).properties(title='일자별 불량 건수 추이').interactive()
-
-        if st.session_state[chart_mode_key] == 'line':
-            st.altair_chart(common_chart.mark_line(point=True), use_container_width=True)
-        else: # 'bar'
-            st.altair_chart(common_chart.mark_bar(), use_container_width=True)
-    else:
-        st.info("그래프를 표시할 데이터가 없습니다.")
+        if granularity == 'day':
+            # 일 단위는 큐브의 일별 표를 그대로 사용
+            bucket_df = daily_df.reset_index()
+            bucket_df['bucket'] = pd.to_datetime(bucket_df['date'])
+            bucket_df['label'] = bucket_df['bucket'].dt.strftime('%Y-%m-%d')
+        else:
+            try:
+                shifts = parse_shifts(shift_text) if granularity == 'shift' else DEFAULT_SHIFTS
+                rollup = get_time_rollup(analysis_key, granularity, shifts, start_date, end_date)
+            except ValueError as e:
+                st.error(f"교대 설정 오류: {e}")
+                rollup = None
+            if rollup is None:
+                bucket_df = pd.DataFrame(columns=['bucket', 'label', 'false_defect', 'true_defect', 'fail'])
+            else:
+                if selected_jig != "전체":
+                    rollup = rollup[rollup['jig'] == selected_jig]
+                bucket_df = rollup.groupby(['bucket', 'label'], sort=True)[['false_defect', 'true_defect', 'fail']].sum().reset_index()
+
+        if not bucket_df.empty:
+            chart_df = bucket_df[['bucket', 'label', 'false_defect', 'true_defect', 'fail']].rename(
+                columns={'false_defect': '가성불량', 'true_defect': '진성불량', 'fail': 'FAIL'}
+            )
+            chart_df_melted = chart_df.melt(['bucket', 'label'], var_name='불량 유형', value_name='수량')
+
+            common_chart = alt.Chart(chart_df_melted).encode(
+                x=alt.X('bucket:T', axis=alt.Axis(title=TIME_BUCKET_LABELS[granularity])),
+                y=alt.Y('수량:Q', axis=alt.Axis(title='불량 건수')),
+                color=alt.Color('불량 유형', legend=alt.Legend(title="불량 유형")),
+                tooltip=[alt.Tooltip('label', title='구간'), '불량 유형', '수량']
+            ).properties(title=f'{TIME_BUCKET_LABELS[granularity]}별 불량 건수 추이').interactive()
+
+            if st.session_state[chart_mode_key] == 'line':
+                st.altair_chart(common_chart.mark_line(point=True), use_container_width=True)
+            else: # 'bar'
+                st.altair_chart(common_chart.mark_bar(), use_container_width=True)
+        else:
+            st.info("그래프를 표시할 데이터가 없습니다.")
 
-    st.markdown("---")
+        st.markdown("---")
 
     # --- 상세 내역 (날짜별 펼치기) ---
-    st.subheader("상세 내역 (일별)")
-    for date_obj in filtered_dates:
-        st.markdown(f"**{date_obj.strftime('%Y-%m-%d')}**")
-        
-        for jig in jigs_to_display:
-            data_point = summary_data.get(jig, {}).get(date_obj.strftime('%Y-%m-%d'))
-            if not data_point or data_point.get('total_test', 0) == 0:
-                continue
+    with span('display.details', stage=analysis_key):
+        st.subheader("상세 내역 (일별)")
+        # (날짜, 지그) 셀 목록은 건수만 보고 만들고, 현재 페이지의 셀만 화면에 그린다
+        detail_cells = []
+        for date_obj in filtered_dates:
+            for jig in jigs_to_display:
+                data_point = summary_data.get(jig, {}).get(date_obj.strftime('%Y-%m-%d'))
+                if data_point and data_point.get('total_test', 0) > 0:
+                    detail_cells.append((date_obj, jig, data_point))
+
+        cell_start, cell_stop = page_bounds(f"detail_cells_{analysis_key}", len(detail_cells), CELL_PAGE_SIZES, unit="개 (날짜, PC) 항목")
+        shown_date = None
+        for date_obj, jig, data_point in detail_cells[cell_start:cell_stop]:
+            if date_obj != shown_date:
+                if shown_date is not None:
+                    st.markdown("---")
+                st.markdown(f"**{date_obj.strftime('%Y-%m-%d')}**")
+                shown_date = date_obj
 
             st.markdown(f"**PC(Jig): {jig}**")
             categories = ['pass', 'false_defect', 'true_defect', 'fail']
             labels = ['PASS', '가성불량', '진성불량', 'FAIL']
-            
+        
             for cat, label in zip(categories, labels):
                 count = data_point.get(cat, 0)
                 if count > 0:
-                    sns_list = data_point.get(f'{cat}_sns', [])
                     with st.expander(f"{label} - {count}건", expanded=False):
+                        # 접힌 expander 내용도 화면으로 전송되므로, 목록 문자열은 요청할 때만 만든다
+                        show_key = f"show_sns_{analysis_key}_{date_obj:%Y%m%d}_{jig}_{cat}"
+                        if not st.checkbox(f"SNumber 목록 보기 ({count:,}개)", key=show_key):
+                            continue
+                        sns_list = data_point.get(f'{cat}_sns')
+                        if sns_list is None:
+                            # 요약 테이블로 연 분석은 목록이 없으므로 그 날짜의 원본 행만 다시 집계한다
+                            sns_list = get_day_details(analysis_key, date_obj).get(jig, {}).get(date_obj.strftime('%Y-%m-%d'), {}).get(f'{cat}_sns', [])
                         if sns_list:
-                            st.text("\n".join(sns_list))
+                            sn_start, sn_stop = page_bounds(show_key, len(sns_list), SN_PAGE_SIZES, unit="개")
+                            st.text("\n".join(sns_list[sn_start:sn_stop]))
                         else:
                             st.info("해당 내역이 없습니다.")
         st.markdown("---")
 
 
     # --- DB 원본 확인 및 상세 검색 기능 ---
-    st.subheader("DB 원본 상세 검색")
-    search_col1, search_col2, search_col3 = st.columns([1, 2, 1])
-    with search_col1:
-        snumber_query = st.text_input("SNumber 검색", key=f"snumber_search_{analysis_key}")
-    with search_col2:
-        all_columns = df_raw.columns.tolist()
-        selected_columns = st.multiselect("표시할 필드(열) 선택", all_columns, key=f"col_select_{analysis_key}")
-    with search_col3:
-        st.write("") 
-        st.write("") 
-        apply_button = st.button("필터 적용", key=f"apply_filter_{analysis_key}")
-
-    filter_state_key = f'applied_filters_{analysis_key}'
-    if apply_button:
-        st.session_state[filter_state_key] = {
-            'snumber': snumber_query,
-            'columns': selected_columns
-        }
+    with span('display.db_view', stage=analysis_key):
+        st.subheader("DB 원본 상세 검색")
+        search_col1, search_col2, search_col3 = st.columns([1, 2, 1])
+        with search_col1:
+            snumber_query = st.text_input("SNumber 검색", key=f"snumber_search_{analysis_key}")
+            search_mode = st.selectbox("검색 방식", list(SEARCH_MODE_LABELS), format_func=SEARCH_MODE_LABELS.get, key=f"snumber_mode_{analysis_key}")
+        # 원본 행이 메모리에 없으면(저장소/DB 분석) 원본 조회도 선택 기간의 행과 컬럼만 읽는다
+        from_store = df_raw is None
+        with search_col2:
+            all_columns = source_columns(analysis_key) if from_store else df_raw.columns.tolist()
+            selected_columns = st.multiselect("표시할 필드(열) 선택", all_columns, key=f"col_select_{analysis_key}")
+        with search_col3:
+            st.write("") 
+            st.write("") 
+            apply_button = st.button("필터 적용", key=f"apply_filter_{analysis_key}")
+
+        filter_state_key = f'applied_filters_{analysis_key}'
+        if apply_button:
+            st.session_state[filter_state_key] = {
+                'snumber': snumber_query,
+                'mode': search_mode,
+                'columns': selected_columns
+            }
     
-    applied_filters = st.session_state.get(filter_state_key, {'snumber': '', 'columns': []})
-
-    with st.expander("DB 원본 확인"):
-        df_display = df_raw.copy()
-        
-        if applied_filters['snumber']:
-            query = applied_filters['snumber']
-            if 'SNumber' in df_display.columns and pd.api.types.is_string_dtype(df_display['SNumber']):
-                df_display = df_display[df_display['SNumber'].str.contains(query, na=False, case=False)]
+        applied_filters = st.session_state.get(filter_state_key, {'snumber': '', 'mode': 'contains', 'columns': []})
+
+        with st.expander("DB 원본 확인"):
+            if from_store:
+                wanted_columns = applied_filters['columns'] or None
+                if wanted_columns and applied_filters['snumber'] and 'SNumber' not in wanted_columns:
+                    wanted_columns = ['SNumber'] + wanted_columns
+                df_display = load_source_rows(analysis_key, start_date, end_date, columns=wanted_columns)
+                if df_display is None:
+                    df_display = pd.DataFrame()
             else:
-                 try:
-                     df_display = df_display[df_display.apply(lambda row: query.lower() in str(row.values).lower(), axis=1)]
-                 except Exception:
-                     st.warning("SNumber 검색을 지원하지 않는 데이터 형식입니다.")
-
-        if applied_filters['columns']:
-            existing_cols = [col for col in applied_filters['columns'] if col in df_display.columns]
-            df_display = df_display[existing_cols]
+                df_display = df_raw
+        
+            if applied_filters['snumber']:
+                if 'SNumber' in df_display.columns:
+                    # 데이터셋마다 한 번 만든 SNumber 인덱스로 검색 (전체 행을 훑지 않음)
+                    sn_index = get_sn_index(st.session_state.sn_indexes, analysis_key, df_display)
+                    df_display = df_display.iloc[sn_index.search(applied_filters['snumber'], applied_filters.get('mode', 'contains'))]
+                else:
+                    st.warning("'SNumber' 컬럼이 없어 검색할 수 없습니다.")
+
+            if applied_filters['columns']:
+                existing_cols = [col for col in applied_filters['columns'] if col in df_display.columns]
+                df_display = df_display[existing_cols]
         
-        st.dataframe(df_display)
+            # 전체 행 대신 현재 페이지의 행만 화면으로 보낸다
+            row_start, row_stop = page_bounds(f"db_view_{analysis_key}", len(df_display), ROW_PAGE_SIZES)
+            st.dataframe(df_display.iloc[row_start:row_stop])
+
+
+# ==============================
+# MES DB 연결 (세션/재실행 간 공유)
+# ==============================
+@st.cache_resource
+def get_db_pool():
+    """ 환경 변수의 접속 정보로 연결 풀을 한 번만 만들어 재사용 """
+    config = load_db_config()
+    return ConnectionPool.from_config(config) if config else None
+
+@st.cache_data(ttl=600)
+def get_db_jigs(stage_key):
+    """ 공정 테이블의 지그 목록 (10분 캐시) """
+    try:
+        return list_stage_jigs(get_db_pool(), stage_key)
+    except Exception:
+        return []
+
+
+# ==============================
+# 증분 분석 (새 파일에 있는 날짜만 재계산)
+# ==============================
+def update_incremental_analysis(stage_key, df, file_name, base):
+    """ 기존 분석 결과(base)에 새 파일을 더하고, 새 파일에 있는 날짜의 셀만 다시 계산한 결과를 반환 """
+    df_prev = base['df_prev']
+    if base['analyzer'] is None:
+        # 처음 누적할 때만 기존 행으로 집계 상태를 만든다 (화면에 표시 중인 DataFrame은 바꾸지 않도록 얕은 복사본 사용)
+        analyzer = IncrementalAnalyzer(stage_key)
+        analyzer.update(df_prev.copy(deep=False))
+    else:
+        # 화면에 표시 중인 집계 상태를 바꾸지 않도록 복사본에 누적
+        analyzer = copy.deepcopy(base['analyzer'])
+
+    # 같은 날짜의 기존 행은 새 파일의 행으로 교체
+    affected = analyzer.update(df, mode='replace')
+    date_col = STAGES[stage_key]['date_col']
+    replaced = df_prev[date_col].dt.normalize().isin(pd.to_datetime(affected))
+    return {
+        'analyzer': analyzer,
+        'df': pd.concat([df_prev[~replaced], df], ignore_index=True),
+        'analysis': analyzer.result(),
+        'label': f"{base['label']}, {file_name}" if base['label'] else file_name,
+    }
+
+
+# ==============================
+# 대용량 업로드 (chunk 스트리밍)
+# ==============================
+def analyze_upload_streaming(job, stage_key, upload, digest, file_name):
+    """ 업로드 파일을 chunk 단위로 분석하며 각 chunk를 바로 저장소에 적재하고, 처리한 행 수를 job에 알린다 """
+    written = set()
+    rows_done = 0
+    unparsed = 0
+
+    def ingest_chunk(index, chunk):
+        nonlocal rows_done, unparsed
+        written.update(ingest_stage_frame(chunk, stage_key, digest, chunk=index))
+        rows_done += len(chunk)
+        # 분석기가 chunk를 전처리하면서 남긴, 해석하지 못한 날짜 행 수를 모은다
+        unparsed += chunk.attrs.get('date_unparsed', 0)
+        job.report(rows=rows_done)
+
+    job.report(phase='chunk 분석 및 적재')
+    try:
+        summary_data, all_dates, row_count = analyze_stage_chunks(
+            iter_stage_csv_chunks(upload, stage_key), stage_key, on_chunk=ingest_chunk
+        )
+    finally:
+        # 요약 테이블은 chunk마다가 아니라 적재가 끝난 뒤 날짜마다 한 번씩 계산 (취소돼도 적재된 날짜는 맞춰 둔다)
+        write_stage_summaries(stage_key, written)
+    # 원본 행은 메모리에 두지 않고, 원본 조회는 저장소에서 필요한 파티션만 읽는다
+    return {'kind': 'store', 'analyzer': None, 'df': None, 'analysis': (summary_data, all_dates),
+            'label': file_name, 'dtype_report': None, 'rows': row_count, 'unparsed': unparsed}
+
+
+# ==============================
+# 백그라운드 분석 (재실행이나 다른 위젯 조작과 상관없이 계속 실행)
+# ==============================
+JOB_POLL_SECONDS = 1.0
+
+@st.cache_resource
+def get_job_runner():
+    """ 세션/재실행 간 공유하는 백그라운드 분석 실행기 (프로세스에 하나) """
+    return JobRunner()
+
+@st.cache_resource
+def get_analysis_cache():
+    """ 세션 간 공유하는 분석 결과 캐시 (프로세스에 하나). 같은 파일은 한 번만 분석하고 결과 객체를 같이 쓴다 """
+    return AnalysisCache()
+
+def analyze_upload(job, stage_key, upload, digest, incremental_base=None, file_name=None):
+    """ 업로드 파일을 파싱/분석하고 저장소에 적재한 결과 dict (df, analysis, dtype_report, rows, unparsed) """
+    job.report(phase='파싱')
+    df = read_stage_csv_cached(upload, stage_key, digest=digest)
+    if df is None:
+        raise ValueError(f"{stage_key.upper()} 데이터 파일을 읽을 수 없습니다. 파일 형식을 확인해주세요.")
+
+    job.report(rows=len(df), phase='분석')
+    if incremental_base is not None:
+        result = update_incremental_analysis(stage_key, df, file_name, incremental_base)
+    else:
+        result = {'df': df, 'analysis': analyze_stage(df, stage_key)}
+
+    # 정리된 데이터를 공정/날짜 파티션으로 저장소에 적재
+    job.report(phase='저장소 적재')
+    written = ingest_stage_frame(df, stage_key, digest)
+    write_stage_summaries(stage_key, written)
+
+    job.report(phase='메모리 최적화')
+    result['dtype_report'] = optimize_stage_frame(result['df'], stage_key)
+    result.update(rows=len(df), unparsed=df.attrs.get('date_unparsed', 0))
+    return result
+
+def run_upload_analysis(job, stage_key, raw_bytes, file_name, streaming, incremental_base, cache):
+    """
+    백그라운드 작업: 업로드 파일을 파싱/분석하고 저장소에 적재한 뒤, session_state에 반영할 값을 dict로 반환.
+    다른 스레드에서 session_state를 건드리지 않도록 누적 분석에 필요한 이전 상태는 incremental_base로 받는다.
+    누적이 아닌 분석은 공유 캐시(cache)에서 같은 내용의 파일 결과를 찾아 재사용한다.
+    내용 해시는 여기서 한 번만 계산해 공유 캐시 키, 파싱 캐시, 저장소 적재에 같이 쓴다.
+    """
+    job.report(phase='내용 해시')
+    digest = content_hash(raw_bytes)
+    # bytes를 감싼 BytesIO는 쓰기 전까지 원본 bytes를 복사하지 않는다
+    upload = io.BytesIO(raw_bytes)
+    if streaming:
+        return analyze_upload_streaming(job, stage_key, upload, digest, file_name)
+
+    if incremental_base is not None:
+        # 누적 결과는 세션마다 이전 상태가 달라 공유하지 않는다
+        result = analyze_upload(job, stage_key, upload, digest, incremental_base, file_name)
+        result.update(kind='upload', cached=False)
+        return result
+
+    # 다른 세션이 같은 파일을 분석 중이면 그 결과를 기다리되, 그동안에도 취소 요청을 확인한다
+    shared, hit = cache.get_or_compute(analysis_key(digest, stage_key), lambda: analyze_upload(job, stage_key, upload, digest),
+                                       cancel_check=job.report)
+    if hit:
+        job.report(rows=shared['rows'], phase='공유 캐시')
+    # 공유 결과(df, analysis)는 다른 세션과 같은 객체이므로 읽기 전용으로 쓴다
+    return dict(shared, kind='upload', analyzer=None, label=file_name, cached=hit)
+
+def submit_upload_analysis(stage_key, streaming, incremental):
+    """ 분석 실행 버튼: 업로드 파일과 필요한 이전 상태를 넘겨 백그라운드 작업을 시작 """
+    uploaded_file = st.session_state.uploaded_files[stage_key]
+    # 업로드 객체는 재실행마다 바뀌므로 작업에는 (복사하지 않은) 바이트를 넘긴다
+    raw_bytes = uploaded_file.getvalue()
+    base = None
+    if not streaming and incremental and st.session_state.analysis_results[stage_key] is not None:
+        base = {
+            'analyzer': st.session_state.incremental_analyzers[stage_key],
+            'df_prev': st.session_state.analysis_results[stage_key],
+            'label': st.session_state.analysis_source[stage_key].get('label', ''),
+        }
+    st.session_state.analysis_jobs[stage_key] = get_job_runner().submit(
+        f"{stage_key.upper()} 분석 ({uploaded_file.name})", run_upload_analysis,
+        stage_key, raw_bytes, uploaded_file.name, streaming, base, get_analysis_cache(),
+    )
+
+def apply_upload_job(stage_key):
+    """ 끝난 분석 작업의 결과를 session_state에 반영하고 결과 메시지를 표시 """
+    job = st.session_state.analysis_jobs[stage_key]
+    st.session_state.analysis_jobs[stage_key] = None
+    # 작업 스레드에서 잰 구간(파싱/정리/날짜 변환/groupby)을 이번 재실행의 '성능' 표에 더한다
+    profiling.add_spans(job.spans)
+    try:
+        result = job.result()
+    except JobCancelled:
+        st.info(f"분석을 취소했습니다. (처리한 행 {job.rows:,})")
+        return
+    except Exception as e:
+        st.error(f"분석 중 오류 발생: {e}")
+        return
+
+    st.session_state.incremental_analyzers[stage_key] = result['analyzer']
+    st.session_state.analysis_results[stage_key] = result['df']
+    st.session_state.analysis_data[stage_key] = result['analysis']
+    st.session_state.analysis_time[stage_key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    st.session_state.analysis_source[stage_key] = {'kind': result['kind'], 'label': result['label']}
+    st.session_state.dtype_reports[stage_key] = result['dtype_report']
+    if result['kind'] == 'store':
+        st.success(f"분석 완료! {result['rows']:,}행을 저장소에 적재했습니다. ({job.elapsed:,.1f}초)")
+    elif result['cached']:
+        st.success("분석 완료! 같은 내용의 파일을 분석한 결과를 재사용했습니다.")
+    else:
+        st.success(f"분석 완료! 결과가 저장되었습니다. ({job.elapsed:,.1f}초)")
+    if result['unparsed']:
+        st.warning(f"날짜를 해석하지 못한 {result['unparsed']:,}행은 분석에서 제외했습니다.")
+
+def display_analysis_cache_stats():
+    """ 세션 간 공유 분석 캐시의 항목 수/메모리/적중률 표시 (세션 메모리 보고에는 공유 결과도 세션마다 포함됨) """
+    stats = get_analysis_cache().stats()
+    requests = stats['hits'] + stats['misses']
+    hit_rate = f"{stats['hits'] / requests:.0%}" if requests else "-"
+    st.caption(
+        f"공유 분석 캐시: {stats['entries']}개, {stats['bytes'] / 1e6:,.1f} / {stats['max_bytes'] / 1e6:,.0f} MB, "
+        f"적중 {stats['hits']:,}/{requests:,} ({hit_rate}), 제거 {stats['evictions']:,}"
+    )
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_job_progress(stage_key):
+    """ 실행 중인 분석 작업의 진행 상황과 취소 버튼. 이 영역만 주기적으로 다시 그리고, 끝나면 전체를 다시 실행 """
+    job = st.session_state.analysis_jobs.get(stage_key)
+    if job is None:
+        return
+    if job.done:
+        # 결과 반영(apply_upload_job)은 전체 재실행에서 한다
+        st.rerun()
+
+    st.info(f"{job.name} · {job.phase} · 처리한 행 {job.rows:,} · 경과 {job.elapsed:,.0f}초")
+    if job.cancel_requested:
+        st.caption("취소 요청됨: 현재 단계가 끝나면 멈춥니다.")
+    elif st.button("분석 취소", key=f"cancel_job_{stage_key}"):
+        job.cancel()
+        st.caption("취소 요청됨: 현재 단계가 끝나면 멈춥니다.")
+
+
+# ==============================
+# 전체 공정 일괄 업로드 (프로세스 풀 병렬 처리)
+# ==============================
+def display_batch_ingest():
+    """ 여러 공정 파일을 한 번에 받아 병렬로 분석하고, 끝나는 순서대로 session_state에 반영 """
+    with st.expander("전체 공정 일괄 업로드 (병렬 분석)"):
+        uploads = st.file_uploader("공정 파일들을 한 번에 선택하세요", type=["csv"], accept_multiple_files=True, key="batch_uploader")
+        if not uploads:
+            return
+
+        # 헤더 키워드로 공정을 판별 (같은 공정 파일이 여러 개면 마지막 파일 사용)
+        files, unknown = {}, []
+        for uploaded_file in uploads:
+            raw_bytes = uploaded_file.getvalue()
+            stage_key = detect_stage(raw_bytes)
+            if stage_key is None:
+                unknown.append(uploaded_file.name)
+            else:
+                files[stage_key] = (uploaded_file.name, raw_bytes)
+        st.write(", ".join(f"{name} → {key.upper()}" for key, (name, _) in files.items()))
+        if unknown:
+            st.warning(f"공정을 판별할 수 없는 파일: {', '.join(unknown)}")
+
+        if files and st.button("일괄 분석 실행", key="batch_analyze"):
+            progress = st.progress(0.0, text="병렬 분석 중...")
+            timing_rows = []
+            # 같은 내용의 파일을 이미 분석한 결과가 공유 캐시에 있으면 그대로 쓰고, 나머지만 병렬로 분석
+            cache = get_analysis_cache()
+            cache_keys = {key: analysis_key(content_hash(raw_bytes), key) for key, (_, raw_bytes) in files.items()}
+            hits, misses = [], {}
+            for key, (file_name, raw_bytes) in files.items():
+                shared = cache.get(cache_keys[key])
+                if shared is None:
+                    misses[key] = (file_name, raw_bytes)
+                else:
+                    hits.append(dict(shared, stage_key=key, file_name=file_name, error=None, timings={'wall': 0.0}))
+
+            def batch_results():
+                yield from hits
+                yield from ingest_stages_parallel(misses)
+
+            for done, result in enumerate(batch_results(), start=1):
+                key = result['stage_key']
+                if result['error'] is None and key in misses:
+                    cache.put(cache_keys[key], {
+                        'df': result['df'], 'analysis': result['analysis'], 'dtype_report': result['dtype_report'],
+                        'rows': len(result['df']), 'unparsed': result['df'].attrs.get('date_unparsed', 0),
+                    })
+                if result['error'] is None:
+                    st.session_state.incremental_analyzers[key] = None
+                    st.session_state.analysis_results[key] = result['df']
+                    st.session_state.analysis_data[key] = result['analysis']
+                    st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    st.session_state.analysis_source[key] = {'kind': 'upload', 'label': result['file_name']}
+                    st.session_state.dtype_reports[key] = result['dtype_report']
+                else:
+                    st.error(f"{key.upper()}: {result['error']}")
+                timings = result['timings']
+                timing_rows.append({
+                    '공정': key.upper(),
+                    '파일': result['file_name'],
+                    '파싱(s)': round(timings.get('parse', 0), 2),
+                    '분석(s)': round(timings.get('analyze', 0), 2),
+                    '저장(s)': round(timings.get('store', 0), 2),
+                    '압축(s)': round(timings.get('compact', 0), 2),
+                    '처리(s)': round(timings.get('total', 0), 2),
+                    '완료 시점(s)': round(timings['wall'], 2),
+                })
+                progress.progress(done / len(files), text=f"{key.upper()} 완료 ({done}/{len(files)})")
+            st.session_state.batch_timings = pd.DataFrame(timing_rows)
+
+        if st.session_state.get('batch_timings') is not None:
+            st.dataframe(st.session_state.batch_timings, hide_index=True)
+
+
+# ==============================
+# SNumber 공정 추적 (공정 간 조인)
+# ==============================
+ROUTE_CONDITION_LABELS = {None: "상관없음", 'pass': "최종 PASS", 'fail': "최종 FAIL", 'present': "진행함", 'missing': "진행 안 함"}
+
+def display_traceability():
+    """ 공정별 데이터를 SNumber로 이어 제품별 공정 이력을 만들고, 공정별 조건으로 걸러 보여주는 탭 """
+    st.header("SNumber 공정 추적")
+    source = st.radio("데이터 원본", ["현재 분석 결과", "저장소(Parquet)"], horizontal=True, key="route_source")
+
+    if st.button("추적 테이블 생성", key="build_route"):
+        with st.spinner("공정 데이터를 SNumber로 연결하는 중..."):
+            stage_frames = {}
+            for key, stage in STAGES.items():
+                if source == "현재 분석 결과":
+                    stage_frames[key] = st.session_state.analysis_results[key]
+                elif list_partitions(key):
+                    stage_frames[key] = load_stage(key, columns=['SNumber', stage['date_col'], stage['pass_col']])
+            used = [key.upper() for key, df in stage_frames.items() if df is not None]
+            if used:
+                st.session_state.route_table = build_route_table(stage_frames)
+                st.session_state.route_stages = used
+            else:
+                st.warning("연결할 공정 데이터가 없습니다. 먼저 공정별 분석을 실행해주세요.")
+
+    route = st.session_state.get('route_table')
+    if route is None:
+        return
+    st.write(f"**연결된 공정**: {', '.join(st.session_state.route_stages)} / **제품 수**: {len(route):,}")
+
+    # 공정별 조건 (예: PCB·Fw 최종 PASS + RfTx 최종 FAIL)
+    conditions = {}
+    condition_cols = st.columns(len(STAGES))
+    for col, key in zip(condition_cols, STAGES):
+        with col:
+            condition = st.selectbox(key.upper(), list(ROUTE_CONDITION_LABELS), format_func=ROUTE_CONDITION_LABELS.get, key=f"route_condition_{key}")
+        if condition is not None:
+            conditions[key] = condition
+
+    matched = filter_routes(route, conditions)
+    st.write(f"**조건에 맞는 제품**: {len(matched):,}개")
+    final_cols = [route_column(key, 'final') for key in STAGES if route_column(key, 'final') in matched.columns]
+    if final_cols:
+        st.dataframe(matched[final_cols].apply(lambda col: col.value_counts(dropna=False)).fillna(0).astype(int))
+    st.dataframe(matched.reset_index())
 
 
 # ==============================
@@ -215,45 +711,159 @@ def main():
     st.markdown("---")
 
     if 'analysis_results' not in st.session_state:
-        st.session_state.analysis_results = {k: None for k in ['pcb', 'fw', 'rftx', 'semi', 'func']}
+        st.session_state.analysis_results = {k: None for k in STAGES}
     if 'uploaded_files' not in st.session_state:
-        st.session_state.uploaded_files = {k: None for k in ['pcb', 'fw', 'rftx', 'semi', 'func']}
+        st.session_state.uploaded_files = {k: None for k in STAGES}
     if 'analysis_data' not in st.session_state:
-        st.session_state.analysis_data = {k: None for k in ['pcb', 'fw', 'rftx', 'semi', 'func']}
+        st.session_state.analysis_data = {k: None for k in STAGES}
     if 'analysis_time' not in st.session_state:
-        st.session_state.analysis_time = {k: None for k in ['pcb', 'fw', 'rftx', 'semi', 'func']}
+        st.session_state.analysis_time = {k: None for k in STAGES}
+    if 'analysis_source' not in st.session_state:
+        st.session_state.analysis_source = {k: {} for k in STAGES}
+    if 'incremental_analyzers' not in st.session_state:
+        st.session_state.incremental_analyzers = {k: None for k in STAGES}
+    if 'sn_indexes' not in st.session_state:
+        st.session_state.sn_indexes = {}
+    if 'dtype_reports' not in st.session_state:
+        st.session_state.dtype_reports = {k: None for k in STAGES}
+    if 'rollup_cubes' not in st.session_state:
+        st.session_state.rollup_cubes = {}
+    if 'time_rollups' not in st.session_state:
+        st.session_state.time_rollups = {}
+    if 'day_details' not in st.session_state:
+        st.session_state.day_details = {}
+    if 'analysis_jobs' not in st.session_state:
+        st.session_state.analysis_jobs = {k: None for k in STAGES}
+
+    # 성능 측정: 켜 두면 이번 재실행에서 기록된 구간(파싱, 정리, 날짜 변환, 집계, 화면 구간)을 '성능' 표로 보여준다
+    profile_on = st.sidebar.checkbox("성능 측정", key="profile_on")
+    profile_log = st.sidebar.checkbox("측정 결과를 로그 파일에 기록", key="profile_log", disabled=not profile_on)
+    if not profile_on:
+        render_app()
+        return
+
+    with profiling.collect(log=profile_log) as spans:
+        with span('rerun'):
+            render_app()
+    with st.expander("성능", expanded=True):
+        st.dataframe(pd.DataFrame(spans_table(spans)), hide_index=True)
+        if profile_log:
+            st.caption(f"로그 파일: {profiling.PROFILE_LOG}")
+
+
+def render_app():
+    """ 일괄 업로드, 공정별 탭, 공정 추적 탭을 그리는 함수 """
+    display_batch_ingest()
 
-    tabs = st.tabs(["파일 PCB 분석", "파일 Fw 분석", "파일 RfTx 분석", "파일 Semi 분석", "파일 Func 분석"])
+    with st.expander("세션 메모리 사용량"):
+        if st.button("메모리 측정", key="measure_session_memory"):
+            st.dataframe(session_memory_report(st.session_state), hide_index=True)
+        display_analysis_cache_stats()
+
+    # 탭 구성은 stages.py 레지스트리에서 가져온다 (공정을 추가하면 탭도 자동 추가)
+    tabs = st.tabs([stage['tab_label'] for stage in STAGES.values()] + ["SNumber 공정 추적"])
     tab_map = {
-        'pcb': {'tab': tabs[0], 'reader': read_csv_with_dynamic_header, 'analyzer': analyze_data, 'jig_col': 'PcbMaxIrPwr'},
-        'fw': {'tab': tabs[1], 'reader': read_csv_with_dynamic_header_for_Fw, 'analyzer': analyze_Fw_data, 'jig_col': 'FwPC'},
-        'rftx': {'tab': tabs[2], 'reader': read_csv_with_dynamic_header_for_RfTx, 'analyzer': analyze_RfTx_data, 'jig_col': 'RfTxPC'},
-        'semi': {'tab': tabs[3], 'reader': read_csv_with_dynamic_header_for_Semi, 'analyzer': analyze_Semi_data, 'jig_col': 'SemiAssyMaxSolarVolt'},
-        'func': {'tab': tabs[4], 'reader': read_csv_with_dynamic_header_for_Batadc, 'analyzer': analyze_Batadc_data, 'jig_col': 'BatadcPC'}
+        key: {'tab': tab, 'jig_col': stage['jig_cols'][0]}
+        for (key, stage), tab in zip(STAGES.items(), tabs)
     }
 
     for key, props in tab_map.items():
         with props['tab']:
             st.header(f"{key.upper()} 데이터 분석")
-            st.session_state.uploaded_files[key] = st.file_uploader(f"{key.upper()} 파일을 선택하세요", type=["csv"], key=f"uploader_{key}")
-            
-            if st.session_state.uploaded_files[key]:
-                if st.button(f"{key.upper()} 분석 실행", key=f"analyze_{key}"):
-                    try:
-                        df = props['reader'](st.session_state.uploaded_files[key])
-                        if df is not None:
-                            with st.spinner("데이터 분석 및 저장 중..."):
-                                st.session_state.analysis_results[key] = df
-                                st.session_state.analysis_data[key] = props['analyzer'](df)
-                                st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            st.success("분석 완료! 결과가 저장되었습니다.")
-                        else:
-                            st.error(f"{key.upper()} 데이터 파일을 읽을 수 없습니다. 파일 형식을 확인해주세요.")
-                    except Exception as e:
-                        st.error(f"분석 중 오류 발생: {e}")
-
-                if st.session_state.analysis_results[key] is not None:
-                    display_analysis_result(key, st.session_state.uploaded_files[key].name, props['jig_col'])
+            source = st.radio("데이터 원본", ["파일 업로드", "저장소(Parquet)", "MES DB"], horizontal=True, key=f"source_{key}")
+
+            if source == "파일 업로드":
+                st.session_state.uploaded_files[key] = st.file_uploader(f"{key.upper()} 파일을 선택하세요", type=["csv"], key=f"uploader_{key}")
+                
+                if st.session_state.uploaded_files[key]:
+                    streaming = st.checkbox(
+                        "대용량 모드 (chunk 단위로 읽어 메모리 사용량 제한, 원본은 저장소에서 조회)",
+                        key=f"streaming_{key}",
+                    )
+                    incremental = st.checkbox(
+                        "기존 분석에 누적 (새 파일에 있는 날짜만 재계산)",
+                        key=f"incremental_{key}",
+                        disabled=streaming or st.session_state.analysis_results[key] is None,
+                    )
+                    # 분석은 백그라운드에서 돌고, 재실행(다른 위젯 조작)과 상관없이 계속된다
+                    job_running = st.session_state.analysis_jobs[key] is not None
+                    if st.button(f"{key.upper()} 분석 실행", key=f"analyze_{key}", disabled=job_running):
+                        submit_upload_analysis(key, streaming, incremental)
+
+                job = st.session_state.analysis_jobs[key]
+                if job is not None and job.done:
+                    apply_upload_job(key)
+                elif job is not None:
+                    display_job_progress(key)
+            elif source == "MES DB":
+                pool = get_db_pool()
+                if pool is None:
+                    st.info("DB 접속 정보가 없습니다. MES_DB_HOST 등 환경 변수를 설정해주세요.")
+                else:
+                    db_col1, db_col2, db_col3 = st.columns(3)
+                    with db_col1:
+                        db_start = st.date_input("조회 시작 날짜", value=datetime.now().date() - timedelta(days=7), key=f"db_start_{key}")
+                    with db_col2:
+                        db_end = st.date_input("조회 종료 날짜", value=datetime.now().date(), key=f"db_end_{key}")
+                    with db_col3:
+                        db_jigs = st.multiselect("PC(Jig) 선택 (비우면 전체)", get_db_jigs(key), key=f"db_jigs_{key}")
+
+                    if st.button(f"{key.upper()} DB 분석 실행", key=f"analyze_db_{key}"):
+                        try:
+                            with st.spinner("DB에서 조건에 맞는 행을 chunk 단위로 읽어 분석하는 중..."):
+                                # 날짜/지그 조건은 SQL로 서버에서 거르고, 분석에 필요한 컬럼만 가져온다.
+                                # chunk는 집계 상태에 더한 뒤 바로 버리고, 원본 조회는 필요한 날짜만 DB에서 다시 읽는다
+                                chunks = iter_stage_chunks(pool, key, db_start, db_end, db_jigs, columns=analysis_columns(key))
+                                summary_data, all_dates, row_count = analyze_stage_chunks(chunks, key)
+                                if row_count:
+                                    st.session_state.analysis_results[key] = None
+                                    st.session_state.analysis_data[key] = (summary_data, all_dates)
+                                    st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                                    st.session_state.incremental_analyzers[key] = None
+                                    st.session_state.analysis_source[key] = {'kind': 'db', 'label': f"{STAGES[key]['table']} ({db_start} ~ {db_end})", 'jigs': db_jigs}
+                                    st.session_state.dtype_reports[key] = None
+                            if row_count:
+                                st.success("분석 완료! 결과가 저장되었습니다.")
+                            else:
+                                st.warning("조건에 맞는 DB 데이터가 없습니다.")
+                        except Exception as e:
+                            st.error(f"DB 조회 중 오류 발생: {e}")
+            else:
+                stored_dates = list_partitions(key)
+                if not stored_dates:
+                    st.info("저장소에 적재된 데이터가 없습니다. 먼저 파일을 업로드해 분석해주세요.")
+                else:
+                    store_col1, store_col2 = st.columns(2)
+                    with store_col1:
+                        store_start = st.date_input("적재 데이터 시작 날짜", min_value=stored_dates[0], max_value=stored_dates[-1], value=stored_dates[0], key=f"store_start_{key}")
+                    with store_col2:
+                        store_end = st.date_input("적재 데이터 종료 날짜", min_value=stored_dates[0], max_value=stored_dates[-1], value=stored_dates[-1], key=f"store_end_{key}")
+
+                    if st.button(f"{key.upper()} 저장소 분석 실행", key=f"analyze_store_{key}"):
+                        try:
+                            with st.spinner("저장소의 요약 테이블을 읽는 중..."):
+                                # 적재할 때 계산해 둔 (jig, 날짜)별 요약 행만 읽는다. 원본 행은 SNumber 목록/원본 조회 때만 읽음
+                                summary = load_stage_summaries(key, store_start, store_end)
+                                if summary is not None:
+                                    st.session_state.analysis_results[key] = None
+                                    st.session_state.analysis_data[key] = summary_from_table(summary)
+                                    st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                                    st.session_state.incremental_analyzers[key] = None
+                                    st.session_state.analysis_source[key] = {'kind': 'store', 'label': f"{STAGES[key]['table']} ({store_start} ~ {store_end})"}
+                                    st.session_state.dtype_reports[key] = None
+                            if summary is not None:
+                                st.success("분석 완료! 결과가 저장되었습니다.")
+                            else:
+                                st.warning("선택한 날짜 범위에 적재된 데이터가 없습니다.")
+                        except Exception as e:
+                            st.error(f"분석 중 오류 발생: {e}")
+
+            if st.session_state.analysis_data[key] is not None:
+                with span('display_analysis_result', stage=key):
+                    display_analysis_result(key, st.session_state.analysis_source[key]['label'], props['jig_col'])
+
+    with tabs[-1]:
+        display_traceability()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -8,16 +8,37 @@ import re
 warnings.filterwarnings('ignore')
 
 # csv 업로드 및 데이터 처리 유틸리티 함수를 담은 db_utils 모듈 임포트
-from db_utils import process_uploaded_csv
+from db_utils import process_uploaded_csv, to_stage_datetime
+from stages import STAGES
+from sn_index import get_sn_index
+from data_handle import DataHandle, enable_copy_on_write, session_memory_report
+import profiling
+from profiling import profiled, span, spans_table
+from background_jobs import JobCancelled, JobRunner
+from analysis_cache import AnalysisCache, analysis_key
+from parsed_cache import content_hash
+
+# 세션에는 적재한 원본 하나만 두고 필터/검색 결과는 행 위치로만 보관하므로, 파생 DataFrame이 원본을 공유하도록 한다
+enable_copy_on_write()
+
+PASS_COLS = ['PcbPass', 'FwPass', 'RfTxPass', 'SemiAssyPass', 'BatadcPass']
+# 실행 중인 분석 작업의 진행 상황을 다시 그리는 주기 (초)
+JOB_POLL_SECONDS = 1.0
+# 다른 세션이 같은 파일을 읽는 중일 때 그 결과를 기다리는 최대 시간 (초)
+CACHE_WAIT_SECONDS = 120
 
 # analyze_data 함수: CSV 파일에서 읽어온 DataFrame을 분석합니다.
-def analyze_data(df, date_col_name, jig_col_name):
+@profiled('analyze_data')
+def analyze_data(df, date_col_name, jig_col_name, progress=None, notices=None):
     """
     주어진 DataFrame을 날짜와 지그(Jig) 기준으로 분석합니다.
     Args:
         df (pd.DataFrame): 분석할 원본 DataFrame.
         date_col_name (str): 날짜/시간 정보가 있는 컬럼명.
         jig_col_name (str): 지그(PC) 정보가 있는 컬럼명.
+        progress (callable): 지그마다, 그리고 끝나기 직전에 지금까지 처리한 행 수로 호출 (예: job.report).
+            예외를 발생시키면 분석을 멈춥니다 (취소).
+        notices (list): 주어지면 경고를 화면에 표시하지 않고 메시지를 여기에 모읍니다 (화면이 없는 작업 스레드용).
     Returns:
         tuple: 분석 결과 요약 데이터, 모든 날짜 목록, 실제로 사용된 지그 컬럼명.
     """
@@ -25,8 +46,8 @@ def analyze_data(df, date_col_name, jig_col_name):
     if df.empty:
         return {}, [], jig_col_name
 
-    # PassStatusNorm 컬럼 생성
-    df_copy = df.copy()
+    # PassStatusNorm 컬럼 생성 (Copy-on-Write이므로 얕은 복사에 컬럼을 더해도 원본은 바뀌지 않음)
+    df_copy = df.copy(deep=False)
     
     # 다양한 Pass 컬럼에 대해 PassStatusNorm 생성
     pass_col_found = False
@@ -48,7 +69,11 @@ def analyze_data(df, date_col_name, jig_col_name):
     
     if not pass_col_found:
         # Pass 컬럼이 없는 경우, 분석을 계속할 수 없으므로 빈 결과를 반환
-        st.warning("Pass 상태를 나타내는 컬럼이 없습니다. 다음 컬럼 중 하나가 필요합니다: PcbPass, FwPass, RfTxPass, SemiAssyPass, BatadcPass")
+        message = "Pass 상태를 나타내는 컬럼이 없습니다. 다음 컬럼 중 하나가 필요합니다: PcbPass, FwPass, RfTxPass, SemiAssyPass, BatadcPass"
+        if notices is not None:
+            notices.append(message)
+        else:
+            st.warning(message)
         return {}, [], jig_col_name
 
     summary_data = {}
@@ -62,13 +87,17 @@ def analyze_data(df, date_col_name, jig_col_name):
     # 지그(PC) 컬럼이 존재하고 데이터가 있는 경우에만 그룹 분석 실행
     if used_jig_col_name in df_copy.columns and not df_copy[used_jig_col_name].isnull().all():
         if 'SNumber' in df_copy.columns and date_col_name in df_copy.columns and not df_copy[date_col_name].dt.date.dropna().empty:
+            rows_done = 0
             for jig, group in df_copy.groupby(used_jig_col_name):
+                if progress is not None:
+                    progress(rows_done)
+                rows_done += len(group)
                 # 날짜 열이 datetime 타입인지 확인하고, 아니면 변환
                 if not pd.api.types.is_datetime64_any_dtype(group[date_col_name]):
                     group.loc[:, date_col_name] = pd.to_datetime(group[date_col_name], errors='coerce')
                 
                 # 유효한 날짜 데이터만 필터링
-                group = group.dropna(subset=[date_col_name]).copy()
+                group = group.dropna(subset=[date_col_name])
 
                 if group.empty:
                     continue
@@ -125,11 +154,95 @@ def analyze_data(df, date_col_name, jig_col_name):
                     }
     
     all_dates = sorted(list(df_copy[date_col_name].dt.date.dropna().unique()))
+    if progress is not None:
+        progress(len(df_copy))
     
     return summary_data, all_dates, used_jig_col_name
 
 
+@st.cache_resource
+def get_job_runner():
+    """ 세션/재실행 간 공유하는 백그라운드 분석 실행기 (프로세스에 하나) """
+    return JobRunner()
+
+@st.cache_resource
+def get_analysis_cache():
+    """ 세션 간 공유하는 분석 결과 캐시 (프로세스에 하나). 같은 파일/조건은 한 번만 읽고 분석한다 """
+    return AnalysisCache()
+
+def load_upload(uploaded_file, digest, key, date_col_name):
+    """
+    업로드 파일을 읽어 날짜 컬럼을 변환한 원본 DataHandle과 해석하지 못한 날짜 행 수를 반환.
+    같은 내용(digest)의 파일을 다른 세션이 이미 읽었으면 그 원본을 같이 쓴다 (원본은 읽기 전용).
+    """
+    def load():
+        df_all_data = process_uploaded_csv(uploaded_file, key)
+        if df_all_data is None or df_all_data.empty:
+            return None
+        # 날짜 컬럼을 datetime으로 변환 (파일 로드 시 처리될 수 있으나 안전을 위해 다시 확인)
+        df_all_data[f"{date_col_name}_dt"] = to_stage_datetime(df_all_data[date_col_name], STAGES[key]['date_format'])
+        return {'handle': DataHandle(df_all_data), 'unparsed': df_all_data.attrs.get('date_unparsed', 0)}
+
+    # 화면을 그리는 스레드에서 기다리므로 무한정 막히지 않도록 시간 제한을 둔다
+    loaded, _ = get_analysis_cache().get_or_compute(analysis_key(digest, key, view='base'), load, timeout=CACHE_WAIT_SECONDS)
+    return loaded
+
+def run_analysis_job(job, df, date_col_name, jig_col_name, cache, cache_key):
+    """
+    백그라운드 작업: analyze_data 결과와 경고 메시지를 {'analysis', 'notices'}로 공유 캐시에 넣고 반환.
+    session_state나 st.* 화면 함수는 쓰지 않고, 지그마다 job.report로 진행 상황을 알리며 취소 요청을 확인한다.
+    """
+    job.report(rows=0, phase=f"분석 ({len(df):,}행 중)")
+    notices = []
+    analysis = analyze_data(df, date_col_name, jig_col_name,
+                            progress=lambda rows: job.report(rows=rows), notices=notices)
+    result = {'analysis': analysis, 'notices': notices}
+    cache.put(cache_key, result)
+    return result
+
+def show_analysis_notices(result):
+    """ 분석 중 모은 경고 메시지를 화면에 표시 (결과를 반영하는 메인 스레드에서 호출) """
+    for message in result['notices']:
+        st.warning(message)
+
+def apply_analysis_job(key):
+    """ 끝난 분석 작업의 결과를 session_state에 반영하고 결과 메시지를 표시 """
+    job = st.session_state.analysis_jobs[key]
+    st.session_state.analysis_jobs[key] = None
+    # 작업 스레드에서 잰 구간을 이번 재실행의 '성능' 표에 더한다
+    profiling.add_spans(job.spans)
+    try:
+        result = job.result()
+    except JobCancelled:
+        st.info("분석을 취소했습니다.")
+        return
+    except Exception as e:
+        st.error(f"분석 중 오류 발생: {e}")
+        return
+    st.session_state.analysis_data[key] = result['analysis']
+    st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    st.session_state['last_analyzed_key'] = key
+    st.success(f"분석 완료! 결과가 저장되었습니다. ({job.elapsed:,.1f}초)")
+    show_analysis_notices(result)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def display_job_progress(key):
+    """ 실행 중인 분석 작업의 진행 상황과 취소 버튼. 이 영역만 주기적으로 다시 그리고, 끝나면 전체를 다시 실행 """
+    job = st.session_state.analysis_jobs.get(key)
+    if job is None:
+        return
+    if job.done:
+        st.rerun()
+    st.info(f"{job.name} · {job.phase} · {job.rows:,}행 · 경과 {job.elapsed:,.0f}초")
+    if job.cancel_requested:
+        st.caption("취소 요청됨")
+    elif st.button("분석 취소", key=f"cancel_job_{key}"):
+        job.cancel()
+        st.caption("취소 요청됨")
+
+
 def display_analysis_result(analysis_key, table_name, date_col_name, selected_jig=None, used_jig_col=None):
+    # analysis_results에는 원본 DataFrame 대신 필터 조건에 맞는 행 위치만 가진 DataHandle이 들어 있다
     if st.session_state.analysis_results[analysis_key] is None:
         st.warning("분석할 파일이 업로드되지 않았습니다.")
         return
@@ -196,22 +309,24 @@ def display_analysis_result(analysis_key, table_name, date_col_name, selected_ji
 
         # 상세 내역 표시
         st.markdown("#### 상세 내역")
-        df_filtered = st.session_state.analysis_results[analysis_key]
+        view = st.session_state.analysis_results[analysis_key]
         
         # used_jig_col이 '__total_group__'인 경우 필터링을 건너뜁니다.
         if used_jig_col == '__total_group__':
-            jig_filtered_df = df_filtered.copy()
-        elif used_jig_col not in df_filtered.columns:
+            jig_view = view
+        elif used_jig_col not in view.columns:
             st.warning(f"데이터프레임에 '{used_jig_col}' 컬럼이 없어 상세 내역을 표시할 수 없습니다.")
             continue
         else:
-            # 현재 지그에 해당하는 데이터만 필터링
-            jig_filtered_df = df_filtered[df_filtered[used_jig_col] == jig].copy()
+            # 현재 지그에 해당하는 행 위치만 남김
+            jig_view = view.filter(view.column(used_jig_col) == jig)
         
         # SNumber가 유효한지 확인
-        if 'SNumber' not in jig_filtered_df.columns:
+        if 'SNumber' not in view.columns:
             st.warning("'SNumber' 컬럼이 없어 상세 내역을 표시할 수 없습니다.")
             continue
+        # 상세 내역에 필요한 컬럼만 꺼낸다
+        jig_filtered_df = jig_view.frame(['SNumber', 'PassStatusNorm'] + PASS_COLS)
         jig_filtered_df = jig_filtered_df[jig_filtered_df['SNumber'].notna()]
         
         # PassStatusNorm이 존재하는지 확인
@@ -292,169 +407,188 @@ def main():
     st.markdown("---")
 
     # 세션 상태 초기화
+    if 'stage_data' not in st.session_state:
+        st.session_state.stage_data = {k: None for k in STAGES}
     if 'analysis_results' not in st.session_state:
-        st.session_state.analysis_results = {
-            'pcb': None, 'fw': None, 'rftx': None, 'semi': None, 'func': None
-        }
+        st.session_state.analysis_results = {k: None for k in STAGES}
     if 'analysis_data' not in st.session_state:
-        st.session_state.analysis_data = {
-            'pcb': None, 'fw': None, 'rftx': None, 'semi': None, 'func': None
-        }
+        st.session_state.analysis_data = {k: None for k in STAGES}
     if 'analysis_time' not in st.session_state:
-        st.session_state.analysis_time = {
-            'pcb': None, 'fw': None, 'rftx': None, 'semi': None, 'func': None
-        }
+        st.session_state.analysis_time = {k: None for k in STAGES}
     if 'last_analyzed_key' not in st.session_state:
         st.session_state['last_analyzed_key'] = None
     if 'jig_col_mapping' not in st.session_state:
-        st.session_state['jig_col_mapping'] = {
-            'pcb': 'PcbMaxIrPwr',
-            'fw': 'FwPC',
-            'rftx': 'RfTxPC',
-            'semi': 'SemiAssyMaxBatVolt',
-            'func': 'BatadcPC',
-        }
+        st.session_state['jig_col_mapping'] = {k: stage['jig_cols'][0] for k, stage in STAGES.items()}
     if 'date_col_mapping' not in st.session_state:
-        st.session_state['date_col_mapping'] = {
-            'pcb': 'PcbStartTime',
-            'fw': 'FwStamp',
-            'rftx': 'RfTxStamp',
-            'semi': 'SemiAssyStartTime',
-            'func': 'BatadcStamp',
-        }
+        st.session_state['date_col_mapping'] = {k: stage['date_col'] for k, stage in STAGES.items()}
     if 'show_line_chart' not in st.session_state:
         st.session_state.show_line_chart = {}
     if 'show_bar_chart' not in st.session_state:
         st.session_state.show_bar_chart = {}
     if 'snumber_search' not in st.session_state:
-        st.session_state.snumber_search = {
-            'pcb': {'results': pd.DataFrame(), 'show': False},
-            'fw': {'results': pd.DataFrame(), 'show': False},
-            'rftx': {'results': pd.DataFrame(), 'show': False},
-            'semi': {'results': pd.DataFrame(), 'show': False},
-            'func': {'results': pd.DataFrame(), 'show': False},
-        }
+        st.session_state.snumber_search = {k: {'results': None, 'show': False} for k in STAGES}
     if 'original_db_view' not in st.session_state:
-        st.session_state.original_db_view = {
-            'pcb': {'results': pd.DataFrame(), 'show': False},
-            'fw': {'results': pd.DataFrame(), 'show': False},
-            'rftx': {'results': pd.DataFrame(), 'show': False},
-            'semi': {'results': pd.DataFrame(), 'show': False},
-            'func': {'results': pd.DataFrame(), 'show': False},
-        }
+        st.session_state.original_db_view = {k: {'results': None, 'show': False} for k in STAGES}
     if 'selected_cols' not in st.session_state:
-        st.session_state.selected_cols = {
-            'pcb': [], 'fw': [], 'rftx': [], 'semi': [], 'func': []
-        }
+        st.session_state.selected_cols = {k: [] for k in STAGES}
+    if 'sn_indexes' not in st.session_state:
+        st.session_state.sn_indexes = {}
+    if 'analysis_jobs' not in st.session_state:
+        st.session_state.analysis_jobs = {k: None for k in STAGES}
+
+    with st.expander("세션 메모리 사용량"):
+        if st.button("메모리 측정", key="measure_session_memory"):
+            st.dataframe(session_memory_report(st.session_state), hide_index=True)
+        stats = get_analysis_cache().stats()
+        st.caption(f"공유 분석 캐시: {stats['entries']}개, {stats['bytes'] / 1e6:,.1f} / {stats['max_bytes'] / 1e6:,.0f} MB, "
+                   f"적중 {stats['hits']:,} / 요청 {stats['hits'] + stats['misses']:,}")
+
+    # 성능 측정: 켜 두면 이번 재실행에서 기록된 구간을 '성능' 표로 보여준다
+    profile_on = st.sidebar.checkbox("성능 측정", key="profile_on")
+    profile_log = st.sidebar.checkbox("측정 결과를 로그 파일에 기록", key="profile_log", disabled=not profile_on)
+    if not profile_on:
+        render_tabs()
+        return
+
+    with profiling.collect(log=profile_log) as spans:
+        with span('rerun'):
+            render_tabs()
+    with st.expander("성능", expanded=True):
+        st.dataframe(pd.DataFrame(spans_table(spans)), hide_index=True)
+        if profile_log:
+            st.caption(f"로그 파일: {profiling.PROFILE_LOG}")
 
+
+def render_tabs():
+    """ 공정별 탭(파일 업로드, 분석, 데이터 조회)을 그리는 함수 """
     # --- 탭별 분석 기능 ---
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["파일 PCB 분석", "파일 Fw 분석", "파일 RfTx 분석", "파일 Semi 분석", "파일 Func 분석"])
+    tabs = st.tabs([stage['tab_label'] for stage in STAGES.values()])
     
+    # 탭별 설정은 stages.py 레지스트리에서 가져온다
     tabs_config = {
-        'pcb': {
-            'header': "파일 PCB (Pcb_Process)",
-            'date_col': 'PcbStartTime',
-            'jig_col': 'PcbMaxIrPwr',
-            'pass_col': 'PcbPass'
-        },
-        'fw': {
-            'header': "파일 Fw (Fw_Process)",
-            'date_col': 'FwStamp',
-            'jig_col': 'FwPC',
-            'pass_col': 'FwPass'
-        },
-        'rftx': {
-            'header': "파일 RfTx (RfTx_Process)",
-            'date_col': 'RfTxStamp',
-            'jig_col': 'RfTxPC',
-            'pass_col': 'RfTxPass'
-        },
-        'semi': {
-            'header': "파일 Semi (SemiAssy_Process)",
-            'date_col': 'SemiAssyStartTime',
-            'jig_col': 'SemiAssyMaxBatVolt',
-            'pass_col': 'SemiAssyPass'
-        },
-        'func': {
-            'header': "파일 Func (Func_Process)",
-            'date_col': 'BatadcStamp',
-            'jig_col': 'BatadcPC',
-            'pass_col': 'BatadcPass'
+        key: {
+            'header': stage['header'],
+            'date_col': stage['date_col'],
+            'jig_col': stage['jig_cols'][0],
+            'pass_col': stage['pass_col']
         }
+        for key, stage in STAGES.items()
     }
 
     # 탭 순회 및 UI 렌더링
-    for key, tab_content in zip(['pcb', 'fw', 'rftx', 'semi', 'func'], [tab1, tab2, tab3, tab4, tab5]):
+    for key, tab_content in zip(STAGES, tabs):
         with tab_content:
             st.header(tabs_config[key]['header'])
             
             uploaded_file = st.file_uploader("CSV 파일 업로드", type=["csv"], key=f"uploader_{key}")
             
+            # PC (Jig) 선택 기능 추가
+            jig_col_name = tabs_config[key]['jig_col']
+            date_col_name = tabs_config[key]['date_col']
+
             if uploaded_file:
-                df_all_data = process_uploaded_csv(uploaded_file, key)
-                
-                if df_all_data is not None and not df_all_data.empty:
-                    st.success("파일이 성공적으로 로드되었습니다.")
-                    st.session_state.analysis_results[key] = df_all_data.copy()
-                    
-                    # 모든 컬럼 목록을 세션 상태에 저장
-                    st.session_state.selected_cols[key] = df_all_data.columns.tolist()
-                else:
-                    st.warning("유효한 데이터를 불러오지 못했습니다. 올바른 형식의 파일인지 확인해주세요.")
-                    st.session_state.analysis_results[key] = None
+                # 파일 내용이 바뀌었을 때만 다시 읽는다 (재실행마다 원본을 새로 만들지 않음).
+                # 내용 해시는 업로드(file_id)가 바뀐 재실행에서만 계산한다 (위젯 조작마다 큰 파일 전체를 해시하지 않음)
+                upload_id = (getattr(uploaded_file, 'file_id', None), uploaded_file.name, uploaded_file.size)
+                stage_data = st.session_state.stage_data[key]
+                if stage_data is None or stage_data['upload_id'] != upload_id:
+                    digest = content_hash(uploaded_file.getvalue())
+                    if stage_data is not None and stage_data['digest'] == digest:
+                        # 같은 내용의 파일을 다시 올린 경우: 읽어 둔 원본과 분석 결과를 그대로 쓴다
+                        stage_data['upload_id'] = upload_id
+                    else:
+                        try:
+                            loaded = load_upload(uploaded_file, digest, key, date_col_name)
+                        except TimeoutError as e:
+                            # 다른 세션이 같은 파일을 아직 읽는 중. 다음 재실행에서는 보통 공유 캐시에 있다
+                            st.warning(f"{e} 잠시 후 다시 시도해주세요.")
+                        else:
+                            if loaded is not None:
+                                st.success("파일이 성공적으로 로드되었습니다.")
+                                if loaded['unparsed']:
+                                    st.warning(f"날짜를 해석하지 못한 {loaded['unparsed']:,}행이 있습니다.")
+                                # 이후로는 원본 DataFrame을 수정하지 않고, 모든 필터/검색은 행 위치로 표현한다
+                                base = loaded['handle']
+                                st.session_state.stage_data[key] = {'upload_id': upload_id, 'digest': digest, 'handle': base}
+                                st.session_state.analysis_results[key] = base
+                                st.session_state.analysis_data[key] = None
+                                st.session_state.snumber_search[key]['results'] = None
+                                st.session_state.original_db_view[key]['results'] = None
+                        
+                                # 모든 컬럼 목록을 세션 상태에 저장
+                                st.session_state.selected_cols[key] = base.columns.tolist()
+                            else:
+                                st.warning("유효한 데이터를 불러오지 못했습니다. 올바른 형식의 파일인지 확인해주세요.")
+                                st.session_state.stage_data[key] = None
+                                st.session_state.analysis_results[key] = None
             
-            if st.session_state.analysis_results[key] is not None:
-                df_to_analyze = st.session_state.analysis_results[key].copy()
-                
-                # PC (Jig) 선택 기능 추가
-                jig_col_name = tabs_config[key]['jig_col']
-                date_col_name = tabs_config[key]['date_col']
-                
-                # 날짜 컬럼을 datetime으로 변환 (파일 로드 시 처리될 수 있으나 안전을 위해 다시 확인)
-                df_to_analyze[f"{date_col_name}_dt"] = pd.to_datetime(df_to_analyze[date_col_name], errors='coerce')
+            if st.session_state.stage_data[key] is not None and st.session_state.analysis_results[key] is not None:
+                df_to_analyze = st.session_state.stage_data[key]['handle']
+                date_values = df_to_analyze.column(f"{date_col_name}_dt")
                 
                 # jig_col_name이 데이터프레임에 있는지 확인
                 if jig_col_name in df_to_analyze.columns:
-                    unique_pc = df_to_analyze[jig_col_name].dropna().unique()
+                    unique_pc = df_to_analyze.column(jig_col_name).dropna().unique()
                     pc_options = ['모든 PC'] + sorted(list(unique_pc))
                     selected_pc = st.selectbox("PC (Jig) 선택", pc_options, key=f"pc_select_{key}")
                 else:
                     st.warning(f"'{jig_col_name}' 컬럼이 없어 PC 선택 기능을 사용할 수 없습니다. '모든 PC'로 설정됩니다.")
                     selected_pc = '모든 PC'
 
-                df_dates = df_to_analyze[f"{date_col_name}_dt"].dt.date.dropna()
-                min_date = df_dates.min() if not df_dates.empty else date.today()
-                max_date = df_dates.max() if not df_dates.dropna().empty else date.today()
+                min_date = date_values.min().date() if date_values.notna().any() else date.today()
+                max_date = date_values.max().date() if date_values.notna().any() else date.today()
                 selected_dates = st.date_input("날짜 범위 선택", value=(min_date, max_date), key=f"dates_{key}")
                 
-                if st.button("분석 실행", key=f"analyze_{key}"):
-                    with st.spinner("데이터 분석 및 저장 중..."):
-                        if len(selected_dates) == 2:
-                            start_date, end_date = selected_dates
-                            df_filtered = df_to_analyze[
-                                (df_to_analyze[f"{date_col_name}_dt"].dt.date >= start_date) &
-                                (df_to_analyze[f"{date_col_name}_dt"].dt.date <= end_date)
-                            ].copy()
-                            
-                            if selected_pc != '모든 PC':
-                                df_filtered = df_filtered[df_filtered[jig_col_name] == selected_pc].copy()
-                        else:
-                            st.warning("날짜 범위를 올바르게 선택해주세요.")
-                            df_filtered = pd.DataFrame()
-                        
-                        st.session_state.analysis_results[key] = df_filtered
-                        st.session_state.analysis_data[key] = analyze_data(df_filtered, f"{date_col_name}_dt", jig_col_name)
+                # 분석은 백그라운드에서 돌고, 재실행(다른 위젯 조작)과 상관없이 계속된다
+                job_running = st.session_state.analysis_jobs[key] is not None
+                if st.button("분석 실행", key=f"analyze_{key}", disabled=job_running):
+                    start_date = end_date = None
+                    if len(selected_dates) == 2:
+                        start_date, end_date = selected_dates
+                        # 날짜/PC 조건은 원본 행에 대한 mask로 만들고, 결과는 행 위치만 보관
+                        mask = (date_values >= pd.Timestamp(start_date)) & \
+                               (date_values < pd.Timestamp(end_date) + pd.Timedelta(days=1))
+                        if selected_pc != '모든 PC':
+                            mask &= df_to_analyze.column(jig_col_name) == selected_pc
+                        df_filtered = df_to_analyze.filter(mask)
+                    else:
+                        st.warning("날짜 범위를 올바르게 선택해주세요.")
+                        df_filtered = df_to_analyze.take([])
+                    
+                    st.session_state.analysis_results[key] = df_filtered
+                    # 같은 파일/조건을 다른 세션이 이미 분석했으면 그 결과를 쓰고, 없으면 백그라운드에서 집계한다
+                    cache = get_analysis_cache()
+                    cache_key = analysis_key(st.session_state.stage_data[key]['digest'], key,
+                                             start=start_date, end=end_date, jig=selected_pc)
+                    cached = cache.get(cache_key)
+                    st.session_state.analysis_data[key] = cached['analysis'] if cached is not None else None
+                    if cached is not None:
                         st.session_state.analysis_time[key] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                         st.session_state['last_analyzed_key'] = key
-                    st.success("분석 완료! 결과가 저장되었습니다.")
+                        st.success("분석 완료! 같은 파일/조건의 분석 결과를 재사용했습니다.")
+                        show_analysis_notices(cached)
+                    else:
+                        # 분석에 필요한 컬럼만 꺼내 집계한다
+                        analysis_cols = ['SNumber', f"{date_col_name}_dt", jig_col_name] + PASS_COLS
+                        st.session_state.analysis_jobs[key] = get_job_runner().submit(
+                            f"{key.upper()} 분석", run_analysis_job,
+                            df_filtered.frame(analysis_cols), f"{date_col_name}_dt", jig_col_name, cache, cache_key,
+                        )
+
+                job = st.session_state.analysis_jobs[key]
+                if job is not None and job.done:
+                    apply_analysis_job(key)
+                elif job is not None:
+                    display_job_progress(key)
 
                 # 분석 결과가 존재하면 항상 표시
                 if st.session_state.analysis_results[key] is not None:
                     if st.session_state.analysis_results[key].empty:
                         st.warning("선택한 조건에 맞는 데이터가 없습니다.")
                     else:
-                        display_analysis_result(key, tabs_config[key]['header'], f"{date_col_name}_dt",
-                                                selected_jig=selected_pc if selected_pc != '모든 PC' else None)
+                        with span('display_analysis_result', stage=key):
+                            display_analysis_result(key, tabs_config[key]['header'], f"{date_col_name}_dt",
+                                                    selected_jig=selected_pc if selected_pc != '모든 PC' else None)
                 
                 st.markdown("---")
                 st.markdown(f"#### {tabs_config[key]['header'].split()[1]} 데이터 조회")
@@ -478,37 +612,39 @@ def main():
                             with st.spinner("데이터에서 SNumber 검색 중..."):
                                 df_source = st.session_state.analysis_results.get(key)
                                 if df_source is not None and not df_source.empty:
-                                    filtered_df = df_source[
-                                        df_source['SNumber'].fillna('').astype(str).str.contains(snumber_query, case=False, na=False)
-                                    ]
+                                    # SNumber 인덱스는 원본에 한 번만 만들고, 검색 결과 중 현재 분석 범위의 행만 남긴다
+                                    sn_index = get_sn_index(st.session_state.sn_indexes, key, df_source.base)
+                                    filtered_df = df_source.intersect(sn_index.search(snumber_query))
                                     if not filtered_df.empty:
                                         st.success(f"'{snumber_query}'에 대한 {len(filtered_df)}건의 검색 결과를 찾았습니다.")
-                                        st.session_state.snumber_search[key]['results'] = filtered_df.copy()
+                                        st.session_state.snumber_search[key]['results'] = filtered_df
                                     else:
                                         st.warning(f"'{snumber_query}'에 대한 검색 결과가 없습니다.")
-                                        st.session_state.snumber_search[key]['results'] = pd.DataFrame()
+                                        st.session_state.snumber_search[key]['results'] = None
                                 else:
                                     st.warning("먼저 CSV 파일을 업로드하고 분석을 실행해주세요.")
-                                    st.session_state.snumber_search[key]['results'] = pd.DataFrame()
+                                    st.session_state.snumber_search[key]['results'] = None
                         else:
                             st.warning("SNumber를 입력해주세요.")
-                            st.session_state.snumber_search[key]['results'] = pd.DataFrame()
+                            st.session_state.snumber_search[key]['results'] = None
 
                 with col_view_btn:
                     if st.button("업로드된 파일 원본 조회", key=f"view_last_db_{key}"):
                         st.session_state.original_db_view[key]['show'] = True
                         if st.session_state.analysis_results[key] is not None:
                             st.success(f"{tabs_config[key]['header'].split()[1]} 탭의 원본 데이터를 조회합니다.")
-                            st.session_state.original_db_view[key]['results'] = st.session_state.analysis_results[key].copy()
+                            st.session_state.original_db_view[key]['results'] = st.session_state.analysis_results[key]
                         else:
                             st.warning("먼저 '분석 실행' 버튼을 눌러 데이터를 분석해주세요.")
-                            st.session_state.original_db_view[key]['results'] = pd.DataFrame()
+                            st.session_state.original_db_view[key]['results'] = None
 
-                if st.session_state.snumber_search[key]['show'] and not st.session_state.snumber_search[key]['results'].empty:
-                    st.dataframe(st.session_state.snumber_search[key]['results'][selected_display_cols].reset_index(drop=True))
+                search_results = st.session_state.snumber_search[key]['results']
+                if st.session_state.snumber_search[key]['show'] and search_results is not None and not search_results.empty:
+                    st.dataframe(search_results.frame(selected_display_cols).reset_index(drop=True))
 
-                if st.session_state.original_db_view[key]['show'] and not st.session_state.original_db_view[key]['results'].empty:
-                    st.dataframe(st.session_state.original_db_view[key]['results'][selected_display_cols].reset_index(drop=True))
+                db_view = st.session_state.original_db_view[key]['results']
+                if st.session_state.original_db_view[key]['show'] and db_view is not None and not db_view.empty:
+                    st.dataframe(db_view.frame(selected_display_cols).reset_index(drop=True))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
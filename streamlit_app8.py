@@ -4,11 +4,12 @@ from datetime import datetime, timedelta
 import io
 
 # 각 CSV 분석 모듈 불러오기 (기존 코드 유지)
-from csv2 import read_csv_with_dynamic_header, analyze_data
-from csv_Fw import read_csv_with_dynamic_header_for_Fw, analyze_Fw_data
-from csv_RfTx import read_csv_with_dynamic_header_for_RfTx, analyze_RfTx_data
-from csv_Semi import read_csv_with_dynamic_header_for_Semi, analyze_Semi_data
-from csv_Batadc import read_csv_with_dynamic_header_for_Batadc, analyze_Batadc_data
+from csv2 import analyze_data
+from csv_Fw import analyze_Fw_data
+from csv_RfTx import analyze_RfTx_data
+from csv_Semi import analyze_Semi_data
+from csv_Batadc import analyze_Batadc_data
+from parsed_cache import read_stage_csv_cached
 
 def display_analysis_result(analysis_key, file_name, jig_col_name):
     """ session_state에 저장된 분석 결과를 Streamlit에 표시하는 함수 """
@@ -209,27 +210,22 @@ def display_analysis_result(analysis_key, file_name, jig_col_name):
 
 
 # ==============================
-# 파일 읽기 (Cache 적용)
+# 파일 읽기 (디스크 캐시 적용: 같은 파일은 재파싱하지 않음)
 # ==============================
-@st.cache_data
 def read_pcb_data(uploaded_file):
-    return read_csv_with_dynamic_header(uploaded_file)
+    return read_stage_csv_cached(uploaded_file, 'pcb')
 
-@st.cache_data
 def read_fw_data(uploaded_file):
-    return read_csv_with_dynamic_header_for_Fw(uploaded_file)
+    return read_stage_csv_cached(uploaded_file, 'fw')
 
-@st.cache_data
 def read_rftx_data(uploaded_file):
-    return read_csv_with_dynamic_header_for_RfTx(uploaded_file)
+    return read_stage_csv_cached(uploaded_file, 'rftx')
 
-@st.cache_data
 def read_semi_data(uploaded_file):
-    return read_csv_with_dynamic_header_for_Semi(uploaded_file)
+    return read_stage_csv_cached(uploaded_file, 'semi')
 
-@st.cache_data
 def read_batadc_data(uploaded_file):
-    return read_csv_with_dynamic_header_for_Batadc(uploaded_file)
+    return read_stage_csv_cached(uploaded_file, 'func')
 
 
 # ==============================
@@ -0,0 +1,85 @@
+#
+# test_analysis_cache.py
+# AnalysisCache.get_or_compute에서 같은 키를 기다리는 스레드의 동작(결과 공유, 시간 초과, 취소)을 확인합니다.
+
+import threading
+import time
+
+import pytest
+
+import analysis_cache
+from analysis_cache import AnalysisCache
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(analysis_cache, 'WAIT_POLL_SECONDS', 0.01)
+
+
+def start_slow_compute(cache, key, value, seconds):
+    """다른 스레드에서 seconds초 걸리는 계산을 시작하고, 계산이 pending에 올라갈 때까지 기다린다"""
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        time.sleep(seconds)
+        return value
+
+    thread = threading.Thread(target=cache.get_or_compute, args=(key, compute))
+    thread.start()
+    started.wait()
+    return thread
+
+
+def test_waiters_share_value_too_large_to_keep():
+    cache = AnalysisCache(max_bytes=0)
+    value = ['x' * 100]
+    thread = start_slow_compute(cache, 'k', value, 0.1)
+    calls = []
+    result, hit = cache.get_or_compute('k', lambda: calls.append(1) or ['again'])
+    thread.join()
+    assert result is value and hit
+    assert calls == []
+    assert cache.stats()['entries'] == 0
+
+
+def test_wait_times_out():
+    cache = AnalysisCache()
+    thread = start_slow_compute(cache, 'k', 1, 0.3)
+    with pytest.raises(TimeoutError):
+        cache.get_or_compute('k', lambda: 2, timeout=0.05)
+    thread.join()
+
+
+def test_cancel_check_stops_wait():
+    class Cancelled(Exception):
+        pass
+
+    def cancel_check():
+        raise Cancelled()
+
+    cache = AnalysisCache()
+    thread = start_slow_compute(cache, 'k', 1, 0.3)
+    with pytest.raises(Cancelled):
+        cache.get_or_compute('k', lambda: 2, cancel_check=cancel_check)
+    thread.join()
+
+
+def test_waiter_computes_after_failure():
+    cache = AnalysisCache()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError()
+
+    def run_failing():
+        with pytest.raises(ValueError):
+            cache.get_or_compute('k', fail)
+
+    thread = threading.Thread(target=run_failing)
+    thread.start()
+    started.wait()
+    assert cache.get_or_compute('k', lambda: 3) == (3, False)
+    thread.join()
@@ -0,0 +1,101 @@
+#
+# test_db_source.py
+# db_source의 SQL 생성(build_stage_query)과 chunk 조회(iter_stage_chunks)를 SQLite 대체 DB로 확인합니다.
+
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from analysis_engine import analyze_stage, analyze_stage_chunks
+from db_source import ConnectionPool, build_stage_query, iter_stage_chunks, read_stage_from_db
+
+FW_ROWS = [
+    # (SNumber, FwStamp, FwPC, FwPass)
+    ('SN001', '2024-01-01 08:00:00', 'PC01', 'O'),
+    ('SN002', '2024-01-01 09:30:00', 'PC02', 'X'),
+    ('SN002', '2024-01-01 09:40:00', 'PC02', 'O'),
+    ('SN003', '2024-01-02 00:00:00', 'PC01', 'X'),
+    ('SN004', '2024-01-02 23:59:59', 'PC03', 'O'),
+    ('SN005', '2024-01-03 00:00:00', 'PC01', 'O'),
+    ('SN006', '2024-01-03 12:00:00', 'PC02', 'X'),
+    ('SN007', '2024-01-04 00:00:00', 'PC01', 'O'),
+]
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / 'mes.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE Fw_Process (SNumber TEXT, FwStamp TEXT, FwPC TEXT, FwPass TEXT, FwNote TEXT)')
+    conn.executemany('INSERT INTO Fw_Process VALUES (?, ?, ?, ?, NULL)', FW_ROWS)
+    conn.commit()
+    conn.close()
+    pool = ConnectionPool.from_config({'dialect': 'sqlite', 'path': path})
+    yield pool
+    pool.close()
+
+
+def test_query_without_filters_selects_whole_table():
+    sql, params = build_stage_query('fw', 'sqlite')
+    assert sql == 'SELECT * FROM "Fw_Process"'
+    assert params == []
+
+
+def test_query_date_bounds_include_whole_end_day():
+    sql, params = build_stage_query('fw', 'sqlite', date(2024, 1, 1), date(2024, 1, 3))
+    assert sql == 'SELECT * FROM "Fw_Process" WHERE "FwStamp" >= ? AND "FwStamp" < ?'
+    # 종료 날짜는 포함이므로 다음 날 0시 미만으로 비교
+    assert params == ['2024-01-01 00:00:00', '2024-01-04 00:00:00']
+
+
+def test_query_date_bounds_use_stage_date_format():
+    _, params = build_stage_query('semi', 'sqlite', date(2024, 1, 31), date(2024, 1, 31))
+    assert params == ['20240131000000', '20240201000000']
+
+
+def test_query_jig_in_list():
+    sql, params = build_stage_query('fw', 'sqlite', end_date=date(2024, 1, 2), jigs=['PC01', 'PC03'])
+    assert sql.endswith('WHERE "FwStamp" < ? AND "FwPC" IN (?, ?)')
+    assert params == ['2024-01-03 00:00:00', 'PC01', 'PC03']
+
+
+def test_query_mysql_placeholders_and_quoting():
+    sql, params = build_stage_query('fw', 'mysql', date(2024, 1, 1), jigs=['PC01'], columns=['SNumber', 'Odd`Name'])
+    assert sql == 'SELECT `SNumber`, `Odd``Name` FROM `Fw_Process` WHERE `FwStamp` >= %s AND `FwPC` IN (%s)'
+    assert params == ['2024-01-01 00:00:00', 'PC01']
+
+
+def test_query_sqlite_quoting_escapes_double_quotes():
+    sql, _ = build_stage_query('fw', 'sqlite', columns=['Odd"Name'])
+    assert sql == 'SELECT "Odd""Name" FROM "Fw_Process"'
+
+
+def test_iter_chunks_respects_chunksize(pool):
+    chunks = list(iter_stage_chunks(pool, 'fw', chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+    assert list(chunks[0].columns) == ['SNumber', 'FwStamp', 'FwPC', 'FwPass', 'FwNote']
+
+
+def test_iter_chunks_filters_dates_and_jigs(pool):
+    chunks = iter_stage_chunks(pool, 'fw', date(2024, 1, 2), date(2024, 1, 3), ['PC01'], chunksize=1)
+    rows = pd.concat(list(chunks), ignore_index=True)
+    assert rows['SNumber'].tolist() == ['SN003', 'SN005']
+
+
+def test_iter_chunks_skips_columns_missing_from_table(pool):
+    chunks = list(iter_stage_chunks(pool, 'fw', columns=['SNumber', 'FwStamp', 'NoSuchColumn']))
+    assert list(chunks[0].columns) == ['SNumber', 'FwStamp']
+
+
+def test_iter_chunks_without_rows_yields_nothing(pool):
+    assert list(iter_stage_chunks(pool, 'fw', date(2025, 1, 1), date(2025, 1, 31))) == []
+    assert read_stage_from_db(pool, 'fw', date(2025, 1, 1), date(2025, 1, 31)) is None
+
+
+def test_streamed_analysis_matches_whole_read(pool):
+    expected = analyze_stage(read_stage_from_db(pool, 'fw'), 'fw')
+    summary_data, all_dates, row_count = analyze_stage_chunks(iter_stage_chunks(pool, 'fw', chunksize=2), 'fw')
+    assert row_count == len(FW_ROWS)
+    assert (summary_data, all_dates) == expected
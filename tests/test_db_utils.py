@@ -0,0 +1,65 @@
+#
+# test_db_utils.py
+# db_utils.clean_string_series(열 단위 문자열 연산)가 clean_string_format(셀 단위)과 같은 결과를 내는지
+# 규칙 경계에 걸리는 무작위 입력으로 확인합니다.
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from db_utils import clean_string_columns, clean_string_format, clean_string_series
+
+# 규칙 경계에 걸리는 조각들을 섞어서 값을 만든다
+FRAGMENTS = ['=', '"', '""', '="', ' ', '\t', 'A', '가', '0', '1.5', 'O', 'X', '']
+
+
+def random_value(rng):
+    kind = rng.random()
+    if kind < 0.05:
+        return np.nan
+    if kind < 0.08:
+        return None
+    if kind < 0.12:
+        return rng.randint(-5, 5)
+    if kind < 0.15:
+        return rng.choice([1.5, 0.1, 1e20, -0.0])
+    return ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 6)))
+
+
+def normalized(series):
+    """None/NaN 등 결측값 표현 차이만 없앤 object Series"""
+    return series.astype(object).where(series.notna(), np.nan)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_series_matches_cell_by_cell(seed):
+    rng = random.Random(seed)
+    # 긴 Series 하나와, 빈 Series를 포함한 짧은 Series 여러 개
+    lengths = [20000] + [rng.randint(0, 30) for _ in range(100)]
+    for length in lengths:
+        series = pd.Series([random_value(rng) for _ in range(length)], dtype=object)
+        pd.testing.assert_series_equal(normalized(clean_string_series(series)), normalized(series.map(clean_string_format)))
+
+
+def test_numeric_series_matches_cell_by_cell():
+    rng = random.Random(0)
+    for _ in range(50):
+        numeric = pd.Series([rng.choice([1, 2.5, np.nan, 20240101120000]) for _ in range(10)])
+        pd.testing.assert_series_equal(normalized(clean_string_series(numeric)), normalized(numeric.map(clean_string_format)))
+
+
+def test_columns_match_cell_by_cell():
+    df = pd.DataFrame({
+        'sn': pd.Series(['="00000001"', '"PC1"', ' O ', None, '="', '""'], dtype=object),
+        'pass': pd.Series(['O', 'X', '=" X"', np.nan, 'o', ''], dtype=object),
+        'value': [1.0, 2.5, np.nan, 4.0, 5.0, 6.0],
+    })
+    expected = df.copy()
+    for col in ['sn', 'pass']:
+        expected[col] = expected[col].map(clean_string_format)
+    cleaned = clean_string_columns(df.copy())
+    for col in ['sn', 'pass']:
+        pd.testing.assert_series_equal(normalized(cleaned[col]), normalized(expected[col]))
+    pd.testing.assert_series_equal(cleaned['value'], df['value'])
@@ -0,0 +1,94 @@
+#
+# test_incremental_analyzer.py
+# IncrementalAnalyzer/analyze_stage_chunks로 파일이나 chunk를 하나씩 더한 결과가
+# 합친 DataFrame을 analyze_stage로 한 번에 분석한 결과와 같은지 확인합니다.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_engine import IncrementalAnalyzer, analyze_stage, analyze_stage_chunks
+
+
+def fw_file(rng, rows, days):
+    """Fw 공정 파일 하나. SNumber/지그/Pass에 결측값과 정리 전 값(' o')이 섞여 있다"""
+    return pd.DataFrame({
+        'SNumber': [f'SN{x:04d}' if x % 50 else None for x in rng.integers(0, 300, rows)],
+        'FwStamp': [f'2024-02-{day:02d} {hour:02d}:{minute:02d}:00'
+                    for day, hour, minute in zip(rng.choice(days, rows), rng.integers(0, 24, rows), rng.integers(0, 60, rows))],
+        'FwPC': rng.choice(['PC01', 'PC02', ' ', None], rows),
+        'FwPass': rng.choice(['O', 'X', ' o', None], rows),
+    })
+
+
+def semi_file(rng, rows, blank_rows):
+    """Semi 공정 파일. 앞쪽 blank_rows행은 지그 후보 컬럼이 모두 비어 있고, 첫 후보 컬럼은 더 뒤에서야 값이 나온다"""
+    df = pd.DataFrame({
+        'SNumber': [f'SN{x:04d}' for x in rng.integers(0, 400, rows)],
+        'SemiAssyStartTime': [f'202402{day:02d}{hour:02d}3000' for day, hour in zip(rng.integers(27, 30, rows), rng.integers(0, 24, rows))],
+        'SemiAssyMaxSolarVolt': pd.Series(rng.choice(['S1', 'S2'], rows), dtype=object),
+        'BatadcPC': pd.Series(rng.choice(['B1', 'B2', 'B3'], rows), dtype=object),
+        'SemiAssyPass': rng.choice(['O', 'X'], rows),
+    })
+    df.loc[:blank_rows, ['SemiAssyMaxSolarVolt', 'BatadcPC']] = None
+    df.loc[:blank_rows + rows // 3, 'SemiAssyMaxSolarVolt'] = None
+    return df
+
+
+def split(rng, df, pieces):
+    cuts = np.sort(rng.choice(np.arange(1, len(df)), size=pieces - 1, replace=False))
+    bounds = [0, *cuts, len(df)]
+    return [df.iloc[lo:hi].copy() for lo, hi in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('pin_jig_col', [False, True])
+def test_append_files_one_at_a_time(pin_jig_col):
+    rng = np.random.default_rng(1)
+    files = [fw_file(rng, 3000, [1, 2, 3]), fw_file(rng, 1500, [3, 4]), fw_file(rng, 1000, [4, 5])]
+    analyzer = IncrementalAnalyzer('fw', pin_jig_col=pin_jig_col)
+    for df in files:
+        analyzer.update(df.copy(), mode='append')
+    assert analyzer.result() == analyze_stage(pd.concat(files, ignore_index=True), 'fw')
+
+
+def test_overlapping_reupload_replaces_its_dates():
+    rng = np.random.default_rng(2)
+    first, second = fw_file(rng, 3000, [1, 2, 3]), fw_file(rng, 2000, [3, 4])
+    analyzer = IncrementalAnalyzer('fw')
+    analyzer.update(first.copy())
+    analyzer.update(second.copy())
+    # 3일을 다시 올린 파일: 그 날짜의 기존 행(첫 파일과 두 번째 파일의 3일)을 모두 교체하고, 4일은 그대로 둔다
+    reupload = fw_file(rng, 800, [3])
+    analyzer.update(reupload.copy())
+
+    kept = pd.concat([first, second], ignore_index=True)
+    kept = kept[~kept['FwStamp'].str.startswith('2024-02-03')]
+    assert analyzer.result() == analyze_stage(pd.concat([kept, reupload], ignore_index=True), 'fw')
+    assert [day.day for day in analyzer.all_dates] == [1, 2, 3, 4]
+
+
+def test_append_same_file_twice_counts_rows_twice():
+    rng = np.random.default_rng(3)
+    df = fw_file(rng, 1000, [1, 2])
+    analyzer = IncrementalAnalyzer('fw')
+    analyzer.update(df.copy(), mode='append')
+    analyzer.update(df.copy(), mode='append')
+    assert analyzer.result() == analyze_stage(pd.concat([df, df], ignore_index=True), 'fw')
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_chunks_pick_the_same_jig_column_as_whole_frame(seed):
+    rng = np.random.default_rng(seed)
+    df = semi_file(rng, 1500, int(rng.integers(0, 600)))
+    expected = analyze_stage(df.copy(), 'semi')
+    summary_data, all_dates, row_count = analyze_stage_chunks(split(rng, df, int(rng.integers(2, 8))), 'semi')
+    assert row_count == len(df)
+    assert (summary_data, all_dates) == expected
+
+
+def test_chunks_without_any_jig_values_use_default_jig():
+    rng = np.random.default_rng(9)
+    df = semi_file(rng, 600, 600)
+    assert df[['SemiAssyMaxSolarVolt', 'BatadcPC']].isna().all().all()
+    summary_data, all_dates, _ = analyze_stage_chunks(split(rng, df, 4), 'semi')
+    assert (summary_data, all_dates) == analyze_stage(df.copy(), 'semi')
@@ -0,0 +1,96 @@
+#
+# test_rollup_cube.py
+# RollupCube의 누적합 조회가 (jig, 날짜) 표를 groupby로 직접 더한 값과 같은지 확인합니다.
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_engine import SUMMARY_METRICS
+from rollup_cube import build_rollup_cube, get_rollup_cube
+
+FIRST_DAY = date(2024, 2, 25)
+
+
+@pytest.fixture(scope='module')
+def cells():
+    """(jig, 날짜)별 지표 표. 모든 지그가 모든 날짜에 있지는 않다 (빈 칸은 0으로 취급)"""
+    rng = np.random.default_rng(7)
+    days = [FIRST_DAY + timedelta(days=offset) for offset in range(12) if offset not in (3, 4)]
+    rows = []
+    for jig in ['PC01', 'PC02', 'PC03', 'PC10']:
+        for day in days:
+            if rng.random() < 0.3:
+                continue
+            row = dict(zip(SUMMARY_METRICS, rng.integers(0, 50, len(SUMMARY_METRICS)).tolist()))
+            rows.append({'jig': jig, 'date': day, **row})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope='module')
+def cube(cells):
+    summary_data = {}
+    for row in cells.to_dict('records'):
+        summary_data.setdefault(row['jig'], {})[row['date'].strftime('%Y-%m-%d')] = {metric: row[metric] for metric in SUMMARY_METRICS}
+    return build_rollup_cube(summary_data, sorted(cells['date'].unique()))
+
+
+def expected_total(cells, jigs=None, start=None, end=None):
+    selected = cells
+    if jigs is not None:
+        selected = selected[selected['jig'].isin(jigs)]
+    if start is not None:
+        selected = selected[selected['date'] >= start]
+    if end is not None:
+        selected = selected[selected['date'] <= end]
+    # 지그별 groupby 합을 다시 더한 값 (선택된 칸이 없으면 0)
+    summed = selected.groupby('jig')[SUMMARY_METRICS].sum().sum()
+    return {metric: int(summed.get(metric, 0)) for metric in SUMMARY_METRICS}
+
+
+JIG_CHOICES = [None, ['PC01'], ['PC02', 'PC10'], ['PC01', 'PC02', 'PC03', 'PC10'], ['NOPE'], ['PC03', 'NOPE'], []]
+
+
+@pytest.mark.parametrize('jigs', JIG_CHOICES)
+def test_range_total_matches_groupby(cells, cube, jigs):
+    days = [None] + [FIRST_DAY + timedelta(days=offset) for offset in range(-1, 13)]
+    for start in days:
+        for end in days:
+            assert cube.range_total(jigs, start, end) == expected_total(cells, jigs, start, end), (jigs, start, end)
+
+
+def test_empty_and_single_day_ranges(cells, cube):
+    zero = dict.fromkeys(SUMMARY_METRICS, 0)
+    # 시작이 종료보다 늦은 범위, 분석 기간 밖, 데이터가 없는 날짜
+    assert cube.range_total(None, FIRST_DAY + timedelta(days=5), FIRST_DAY + timedelta(days=1)) == zero
+    assert cube.range_total(None, date(2023, 1, 1), date(2023, 1, 31)) == zero
+    assert cube.range_total(None, FIRST_DAY + timedelta(days=3), FIRST_DAY + timedelta(days=4)) == zero
+
+    day = FIRST_DAY + timedelta(days=6)  # 2024-03-02 (윤년 2월 29일 이후)
+    assert cube.range_total(['PC02'], day, day) == expected_total(cells, ['PC02'], day, day)
+    assert cube.day_total(['PC02'], day) == expected_total(cells, ['PC02'], day, day)
+    assert cube.day_total(None, FIRST_DAY + timedelta(days=3)) is None
+
+
+def test_unknown_jigs_are_ignored(cells, cube):
+    assert cube.range_total(['NOPE']) == dict.fromkeys(SUMMARY_METRICS, 0)
+    assert cube.range_total(['PC01', 'NOPE']) == expected_total(cells, ['PC01'])
+
+
+def test_daily_frame_matches_groupby(cells, cube):
+    start, end = FIRST_DAY + timedelta(days=1), FIRST_DAY + timedelta(days=8)
+    frame = cube.daily_frame(['PC01', 'PC03'], start, end)
+    selected = cells[cells['jig'].isin(['PC01', 'PC03']) & (cells['date'] >= start) & (cells['date'] <= end)]
+    expected = selected.groupby('date')[SUMMARY_METRICS].sum().reindex(frame.index, fill_value=0)
+    pd.testing.assert_frame_equal(frame, expected, check_dtype=False, check_names=False)
+    assert list(frame.index) == [day for day in sorted(cells['date'].unique()) if start <= day <= end]
+
+
+def test_get_rollup_cube_rebuilds_only_for_new_analysis(cube):
+    cache = {}
+    analysis = ({'PC01': {'2024-01-01': dict.fromkeys(SUMMARY_METRICS, 1)}}, [date(2024, 1, 1)])
+    first = get_rollup_cube(cache, 'fw', analysis)
+    assert get_rollup_cube(cache, 'fw', analysis) is first
+    assert get_rollup_cube(cache, 'fw', (dict(analysis[0]), analysis[1])) is not first
@@ -0,0 +1,88 @@
+#
+# test_sn_index.py
+# SNumberIndex 검색 결과가 기존 필터(str.contains(case=False) 등)와 같은 행을 고르는지, get_sn_index 재사용 조건이 맞는지 확인합니다.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sn_index import SNumberIndex, get_sn_index
+
+ALPHABET = list('ABCab0123')
+
+
+def random_snumbers(rng, count, missing=0.05):
+    """짧은 글자 집합으로 만든 길이 1~8의 SNumber (겹치는 부분 문자열이 많도록). 일부는 결측값"""
+    values = [''.join(rng.choice(ALPHABET, rng.integers(1, 9))) for _ in range(count)]
+    series = pd.Series(values, dtype=object)
+    series[rng.random(count) < missing] = None
+    return series
+
+
+def baseline_rows(series, query, mode):
+    text = series.astype('string').str.upper()
+    key = query.strip().upper()
+    if mode == 'exact':
+        matched = text == key
+    elif mode == 'prefix':
+        matched = text.str.startswith(key)
+    else:
+        matched = series.astype('string').str.contains(query.strip(), case=False, regex=False)
+    return np.flatnonzero(matched.fillna(False).to_numpy())
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_contains_matches_str_contains(seed):
+    rng = np.random.default_rng(seed)
+    series = random_snumbers(rng, 2000)
+    index = SNumberIndex(series)
+    # 3-gram을 못 만드는 1~2글자 검색어와 3-gram 후보 확인이 필요한 긴 검색어를 모두 시험
+    queries = [''.join(rng.choice(ALPHABET, rng.integers(1, 6))) for _ in range(60)]
+    for query in queries:
+        np.testing.assert_array_equal(index.search(query, 'contains'), baseline_rows(series, query, 'contains'), err_msg=query)
+
+
+@pytest.mark.parametrize('mode', ['prefix', 'exact'])
+def test_prefix_and_exact_match_baseline(mode):
+    rng = np.random.default_rng(42)
+    series = random_snumbers(rng, 2000)
+    index = SNumberIndex(series)
+    queries = [''.join(rng.choice(ALPHABET, rng.integers(1, 5))) for _ in range(60)]
+    queries += [value for value in series.dropna().sample(20, random_state=0)]
+    for query in queries:
+        np.testing.assert_array_equal(index.search(query, mode), baseline_rows(series, query, mode), err_msg=query)
+
+
+def test_search_ignores_case_and_surrounding_spaces():
+    series = pd.Series(['SN-abc-001', 'sn-ABC-002', 'XY-001', None])
+    index = SNumberIndex(series)
+    assert index.search('abc').tolist() == [0, 1]
+    assert index.search('  Sn-AbC-002 ', 'exact').tolist() == [1]
+    assert index.search('sn', 'prefix').tolist() == [0, 1]
+    assert index.search('   ').tolist() == []
+    with pytest.raises(ValueError):
+        index.search('SN', 'regex')
+
+
+def test_get_sn_index_reuses_and_rebuilds():
+    cache = {}
+    df = pd.DataFrame({'SNumber': ['A1', 'B2', 'C3']})
+    index = get_sn_index(cache, 'fw', df)
+    assert get_sn_index(cache, 'fw', df) is index
+    # 같은 값, 같은 순서의 다른 객체는 다시 만들지 않는다
+    assert get_sn_index(cache, 'fw', df.copy()) is index
+
+    # 같은 값이라도 순서가 다르면 행 위치가 달라지므로 다시 만든다
+    reordered = df.iloc[::-1].reset_index(drop=True)
+    rebuilt = get_sn_index(cache, 'fw', reordered)
+    assert rebuilt is not index
+    assert rebuilt.search('A1', 'exact').tolist() == [2]
+
+
+def test_get_sn_index_does_not_trust_recycled_objects():
+    cache = {}
+    get_sn_index(cache, 'fw', pd.DataFrame({'SNumber': ['A1', 'B2']}))
+    # 처음 DataFrame은 사라졌으므로 약한 참조가 끊겨, 같은 id를 받은 새 객체라도 지문으로 확인한다
+    assert cache['fw']['frame']() is None
+    other = pd.DataFrame({'SNumber': ['B2', 'A1']})
+    assert get_sn_index(cache, 'fw', other).search('A1', 'exact').tolist() == [1]
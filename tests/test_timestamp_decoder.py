@@ -0,0 +1,105 @@
+#
+# test_timestamp_decoder.py
+# 고정 자리 디코더(decode_fixed)와 decode_timestamps가 pd.to_datetime(format=..., errors='coerce')와 같은 시각을 만드는지 확인합니다.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from timestamp_decoder import decode_fixed, decode_timestamps, detect_format, fixed_layout
+
+SEMI_FORMAT = '%Y%m%d%H%M%S'
+DASH_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def baseline(texts, date_format):
+    return pd.to_datetime(pd.Series(texts, dtype=object), format=date_format, errors='coerce').to_numpy(dtype='datetime64[ns]')
+
+
+def assert_same(actual, expected):
+    np.testing.assert_array_equal(np.asarray(actual, dtype='datetime64[ns]'), expected)
+
+
+def test_fixed_layout():
+    assert fixed_layout(SEMI_FORMAT) == (14, {'Y': (0, 4), 'm': (4, 2), 'd': (6, 2), 'H': (8, 2), 'M': (10, 2), 'S': (12, 2)}, [])
+    width, fields, separators = fixed_layout(DASH_FORMAT)
+    assert width == 19
+    assert separators == [(4, '-'), (7, '-'), (10, ' '), (13, ':'), (16, ':')]
+    # 고정 자리가 아닌 지시자나 날짜가 빠진 형식은 decode_fixed를 쓰지 않는다
+    assert fixed_layout('%Y-%m-%d %H:%M:%S.%f') is None
+    assert fixed_layout('%H:%M:%S') is None
+
+
+@pytest.mark.parametrize('year', [1900, 2000, 2023, 2024, 2100])
+def test_leap_days(year):
+    texts = np.array([f'{year}0228000000', f'{year}0229000000', f'{year}0301000000'], dtype=object)
+    assert_same(decode_fixed(texts, fixed_layout(SEMI_FORMAT)), baseline(texts, SEMI_FORMAT))
+
+
+def test_month_lengths():
+    texts = np.array([f'2024-{month:02d}-{day:02d} 12:00:00' for month in range(1, 13) for day in (28, 29, 30, 31, 32)], dtype=object)
+    assert_same(decode_fixed(texts, fixed_layout(DASH_FORMAT)), baseline(texts, DASH_FORMAT))
+
+
+def test_fixed_rejects_bad_fields():
+    texts = np.array(['2024-13-01 00:00:00', '2024-00-10 00:00:00', '2024-01-01 24:00:00', '2024-01-01 00:60:00',
+                      '2024/01/01 00:00:00', '2024-01-01 00:00:00x', '2024-01-01 0:00:00', '２０２４-01-01 00:00:00', ''], dtype=object)
+    assert np.isnat(decode_fixed(texts, fixed_layout(DASH_FORMAT))).all()
+
+
+def test_random_values_match_pandas():
+    rng = np.random.default_rng(0)
+    count = 5000
+    texts = np.array([
+        f'{y:04d}-{m:02d}-{d:02d} {h:02d}:{mi:02d}:{s:02d}'
+        for y, m, d, h, mi, s in zip(rng.integers(1990, 2040, count), rng.integers(0, 14, count), rng.integers(0, 33, count),
+                                     rng.integers(0, 25, count), rng.integers(0, 61, count), rng.integers(0, 61, count))
+    ], dtype=object)
+    series = pd.Series(texts)
+    decoded, info = decode_timestamps(series, DASH_FORMAT)
+    assert_same(decoded, baseline(texts, DASH_FORMAT))
+    assert info['unparsed'] == int(np.isnat(baseline(texts, DASH_FORMAT)).sum())
+
+
+def test_second_sixty_and_short_fields_fall_back_to_same_format():
+    texts = ['2024-12-31 23:59:60', '2024-1-5 9:30:00']
+    decoded, info = decode_timestamps(pd.Series(texts), DASH_FORMAT)
+    assert_same(decoded, baseline(texts, DASH_FORMAT))
+    assert info['unparsed'] == 0
+
+
+def test_fixed_format_does_not_guess_other_formats():
+    texts = ['20240101123000', '12/01/2024', '2024-03-05 07:00:00', '20240101', 'bad', None]
+    decoded, info = decode_timestamps(pd.Series(texts, dtype=object), SEMI_FORMAT)
+    assert_same(decoded, baseline(texts, SEMI_FORMAT))
+    assert info['unparsed'] == 4
+
+
+def test_numeric_input_with_gaps():
+    series = pd.Series([20240101123045, None, 20240229000000, 20230229000000, 20240301235959], dtype='Int64')
+    decoded, info = decode_timestamps(series, SEMI_FORMAT)
+    expected = baseline(['20240101123045', None, '20240229000000', '20230229000000', '20240301235959'], SEMI_FORMAT)
+    assert_same(decoded, expected)
+    assert info['unparsed'] == 1
+
+
+def test_float_input_counts_non_integral_as_unparsed():
+    series = pd.Series([20240101123045.0, np.nan, 20240101123045.5, np.inf])
+    decoded, info = decode_timestamps(series, SEMI_FORMAT)
+    assert decoded.iloc[0] == pd.Timestamp('2024-01-01 12:30:45')
+    assert decoded.iloc[1:].isna().all()
+    assert info['unparsed'] == 2
+
+
+def test_repeated_values_decode_through_uniques():
+    texts = ['2024-01-01 08:00:00'] * 300 + ['2024-01-02 08:00:00'] * 300 + ['2024-02-30 08:00:00'] * 10
+    decoded, info = decode_timestamps(pd.Series(texts), DASH_FORMAT)
+    assert info['unique'] == 3
+    assert info['unparsed'] == 10
+    assert_same(decoded, baseline(texts, DASH_FORMAT))
+
+
+def test_detect_format():
+    assert detect_format(np.array(['20240101123045', '20240102000000'], dtype=object)) == SEMI_FORMAT
+    assert detect_format(np.array(['2024/01/01 12:30:45'], dtype=object)) == '%Y/%m/%d %H:%M:%S'
+    assert detect_format(np.array(['not a date'], dtype=object)) is None
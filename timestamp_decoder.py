@@ -0,0 +1,242 @@
+#
+# timestamp_decoder.py
+# 공정 날짜/시간 컬럼을 datetime64로 바꾸는 디코더입니다.
+#   - 형식을 모르면 표본 몇백 개로 후보 형식(KNOWN_FORMATS)을 한 번 판정합니다. 행마다 형식을 추론하지 않습니다.
+#   - '%Y-%m-%d %H:%M:%S'처럼 자리 수가 고정된 형식은 문자 코드 배열을 자리별로 잘라 NumPy 연산으로 한 번에 해석합니다.
+#     자리 수가 맞지 않는 행('2024-1-5 9:30:00' 등)만 pandas로 다시 해석하므로 pd.to_datetime보다 잃는 행이 없습니다.
+#   - 같은 시각 문자열이 많이 반복되면 고유 문자열만 해석하고 그 결과(고유 문자열 -> 시각)를 행에 펼칩니다.
+#   - 값이 있었는데 해석하지 못한 행 수를 함께 돌려줍니다.
+
+import numpy as np
+import pandas as pd
+
+# 표본 판정에서 시도하는 형식 (앞에 있을수록 우선)
+KNOWN_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y.%m.%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y%m%d%H%M%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%Y%m%d',
+)
+SAMPLE_SIZE = 500
+# 표본의 고유 값 비율이 이보다 낮으면 고유 문자열만 해석해 펼친다
+UNIQUE_RATIO = 0.5
+
+# 고정 자리 형식에서 쓸 수 있는 지시자: 자리 수, 허용 범위
+_FIELDS = {
+    'Y': (4, 1678, 2261),  # datetime64[ns]로 나타낼 수 있는 범위
+    'm': (2, 1, 12),
+    'd': (2, 1, 31),
+    'H': (2, 0, 23),
+    'M': (2, 0, 59),
+    'S': (2, 0, 59),
+}
+_MONTH_DAYS = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def fixed_layout(date_format):
+    """
+    날짜 형식을 고정 자리 배치로 바꾸는 함수.
+    Args:
+        date_format (str): strftime 형식 (예: '%Y%m%d%H%M%S').
+    Returns:
+        tuple: (전체 자리 수, {지시자: (시작, 자리 수)}, [(위치, 구분 문자)]).
+               %Y %m %d %H %M %S 외의 지시자가 있으면 None.
+    """
+    fields, separators = {}, []
+    pos, i = 0, 0
+    while i < len(date_format):
+        char = date_format[i]
+        if char == '%':
+            if i + 1 >= len(date_format):
+                return None
+            code = date_format[i + 1]
+            if code not in _FIELDS or code in fields:
+                return None
+            width = _FIELDS[code][0]
+            fields[code] = (pos, width)
+            pos += width
+            i += 2
+        else:
+            separators.append((pos, char))
+            pos += 1
+            i += 1
+    if not {'Y', 'm', 'd'} <= set(fields):
+        return None
+    return pos, fields, separators
+
+
+def decode_fixed(texts, layout):
+    """
+    고정 자리 문자열 배열을 datetime64[ns]로 해석하는 함수. 자리 수, 구분 문자, 값 범위, 날짜(2월 30일 등)가 맞지 않으면 NaT.
+    Args:
+        texts (np.ndarray): 문자열 배열 (결측값은 빈 문자열).
+        layout (tuple): fixed_layout의 반환값.
+    Returns:
+        np.ndarray: datetime64[ns] 배열.
+    """
+    width, fields, separators = layout
+    # 한 자리 더 잡아 두면 더 긴 문자열은 마지막 자리가 0이 아니게 되어 걸러진다
+    try:
+        raw = np.asarray(texts, dtype=f'S{width + 1}')
+    except UnicodeEncodeError:
+        # ASCII가 아닌 문자가 섞인 값은 날짜일 수 없으므로 빈 문자열로 바꿔 NaT로 만든다
+        texts = np.array([text if str(text).isascii() else '' for text in texts], dtype=object)
+        raw = np.asarray(texts, dtype=f'S{width + 1}')
+    chars = raw.view(np.uint8).reshape(len(texts), width + 1)
+    valid = chars[:, width] == 0
+    # (자리, 행) 순서로 바꿔 자리별로 꺼낸다. 숫자가 아닌 문자는 0~9 밖의 값이 된다
+    digits = chars[:, :width].T - np.uint8(ord('0'))
+    for pos, char in separators:
+        valid &= chars[:, pos] == ord(char)
+
+    values = {}
+    for code, (start, size) in fields.items():
+        value = np.zeros(len(texts), dtype=np.int64)
+        for pos in range(start, start + size):
+            valid &= digits[pos] <= 9
+            value = value * 10 + digits[pos]
+        low, high = _FIELDS[code][1:]
+        valid &= (value >= low) & (value <= high)
+        values[code] = value
+
+    year, month, day = values['Y'], values['m'], values['d']
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    valid &= day <= _MONTH_DAYS[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+
+    # 그레고리력 날짜 -> 1970-01-01부터의 일 수 (3월을 한 해의 시작으로 두는 정수 계산)
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    days = era * 146097 + year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year - 719468
+
+    zeros = np.zeros(len(texts), dtype=np.int64)
+    seconds = days * 86400 + values.get('H', zeros) * 3600 + values.get('M', zeros) * 60 + values.get('S', zeros)
+    result = (seconds * 1_000_000_000).view('datetime64[ns]')
+    result[~valid] = np.datetime64('NaT')
+    return result
+
+
+def _parse_pandas(texts, date_format, fallback):
+    """
+    pandas로 date_format 해석. 형식을 모르고(None) fallback이면 해석되지 않은 값을 값마다 형식 추론으로 한 번 더 시도.
+    형식이 정해진 값은 다른 형식으로 추론하지 않습니다 (일/월을 추측해 엉뚱한 날짜가 되므로 unparsed로 셉니다).
+    """
+    texts = pd.Series(texts, dtype=object).replace('', None)
+    values = pd.to_datetime(texts, format=date_format, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    if fallback and date_format is None:
+        retry = np.isnat(values) & texts.notna().to_numpy()
+        if retry.any():
+            values[retry] = pd.to_datetime(texts[retry], format='mixed', errors='coerce').to_numpy(dtype='datetime64[ns]')
+    return values
+
+
+def _parse(texts, date_format, fallback=True):
+    """
+    문자열 배열을 date_format으로 해석 (고정 자리면 decode_fixed, 아니면 pandas, 형식이 없으면 pandas 추론).
+    고정 자리로 해석되지 않은 값은 같은 형식으로 pandas가 다시 해석합니다 (한 자리 월/시, 60초 등).
+    형식이 없을 때만 fallback이면 값마다 형식 추론까지 시도합니다.
+    형식 판정(detect_format)에서는 형식별 적중 수를 비교해야 하므로 fallback=False로 부릅니다.
+    """
+    layout = fixed_layout(date_format) if date_format is not None else None
+    if layout is None:
+        return _parse_pandas(texts, date_format, fallback)
+    values = decode_fixed(texts, layout)
+    # 한 자리 월/시처럼 자리 수만 다른 값은 같은 형식으로 pandas가 해석할 수 있다
+    retry = np.isnat(values) & (texts != '')
+    if retry.any():
+        values[retry] = _parse_pandas(texts[retry], date_format, fallback)
+    return values
+
+
+def detect_format(texts, formats=KNOWN_FORMATS):
+    """
+    표본 문자열에서 가장 많이 해석되는 형식을 고르는 함수.
+    Args:
+        texts (np.ndarray): 결측값을 뺀 표본 문자열 배열.
+        formats (tuple): 시도할 형식 목록 (앞에 있을수록 우선).
+    Returns:
+        str: 형식. 어느 형식으로도 해석되지 않으면 None.
+    """
+    if len(texts) == 0:
+        return None
+    best_format, best_count = None, 0
+    for date_format in formats:
+        count = int(np.count_nonzero(~np.isnat(_parse(texts, date_format, fallback=False))))
+        if count > best_count:
+            best_format, best_count = date_format, count
+        if count == len(texts):
+            break
+    return best_format
+
+
+def _sample(texts, size):
+    """전체에서 고르게 size개를 뽑은 표본"""
+    if len(texts) <= size:
+        return texts
+    return texts[np.linspace(0, len(texts) - 1, size).astype(np.int64)]
+
+
+def _integer_texts(series):
+    """
+    숫자 컬럼을 정수 문자열(string dtype)로 바꾸는 함수.
+    정수가 아닌 값(20240101.5, inf 등)은 날짜가 아니므로 해석되지 않는 표식('?')으로 남겨 unparsed로 셉니다.
+    """
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype('Int64').astype('string')
+    numbers = series.astype('Float64')
+    integral = (numbers % 1 == 0).fillna(False)
+    texts = pd.Series(pd.NA, index=series.index, dtype='string', name=series.name)
+    texts[numbers.notna()] = '?'
+    texts[integral] = numbers[integral].astype('Int64').astype('string')
+    return texts
+
+
+def decode_timestamps(series, date_format=None, sample_size=SAMPLE_SIZE):
+    """
+    날짜/시간 컬럼을 datetime64[ns] Series로 바꾸는 함수.
+    Args:
+        series (pd.Series): 날짜 컬럼 (문자열, 또는 %Y%m%d%H%M%S 같은 형식이 숫자로 읽힌 값).
+        date_format (str): 날짜 형식. None이면 표본으로 판정하고, 판정되지 않으면 pandas 자동 추론.
+        sample_size (int): 형식 판정(전체에서 고르게)과 반복 정도 확인(앞쪽 연속 구간)에 쓸 표본 수.
+    Returns:
+        tuple: (datetime64[ns] Series, 정보 dict {'format', 'unique', 'unparsed'}).
+               unparsed는 값이 있었는데 해석하지 못한 행 수, unique는 고유 문자열만 해석했으면 그 수(아니면 None).
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        # 숫자로 읽힌 20240101123045 등은 정수 문자열로 바꿔 해석
+        series = _integer_texts(series)
+    present = series.notna().to_numpy()
+    texts = series.to_numpy(dtype=object, na_value='')
+
+    present_texts = texts[present]
+    if date_format is None:
+        date_format = detect_format(_sample(present_texts, sample_size))
+
+    unique = None
+    # 같은 시각은 붙어 있으므로 반복 정도는 앞쪽 연속 구간으로 본다
+    head = present_texts[:sample_size]
+    if len(head) and len(pd.unique(head)) < len(head) * UNIQUE_RATIO:
+        # 반복이 많은 컬럼: 고유 문자열 -> 시각 대응표를 만들고 행 위치로 펼친다
+        codes, uniques = pd.factorize(texts)
+        values = _parse(np.asarray(uniques, dtype=object), date_format)[codes]
+        unique = len(uniques)
+    else:
+        values = _parse(texts, date_format)
+
+    values[~present] = np.datetime64('NaT')
+    result = pd.Series(values, index=series.index, name=series.name)
+    info = {
+        'format': date_format,
+        'unique': unique,
+        'unparsed': int(np.count_nonzero(present & np.isnat(values))),
+    }
+    return result, info
+
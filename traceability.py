@@ -0,0 +1,136 @@
+#
+# traceability.py
+# 공정별 데이터(pcb, fw, rftx, semi, func)를 SNumber로 이어 붙여 제품별 공정 이력(route table)을 만듭니다.
+# 모든 공정의 SNumber를 한 번에 정수 코드로 바꾸고(해시), 공정마다 (코드, 시각) 정렬로
+# SNumber별 첫/마지막 테스트 시각, 최종 Pass 상태, 테스트 횟수를 구하므로 수백만 대에서도 반복문이 없습니다.
+# 예: "PCB와 Fw는 통과했지만 RfTx에서 불량인 제품" = filter_routes(route, {'pcb': 'pass', 'fw': 'pass', 'rftx': 'fail'})
+
+import numpy as np
+import pandas as pd
+
+from analysis_engine import normalize_pass_status
+from db_utils import to_stage_datetime
+from stages import STAGES, get_stage
+
+ROUTE_FIELDS = ['first', 'last', 'final', 'tests']
+ROUTE_CONDITIONS = ('pass', 'fail', 'missing', 'present')
+
+
+def route_column(stage_key, field):
+    """route table의 컬럼명 (예: route_column('fw', 'final') -> 'fw_final')"""
+    return f"{stage_key}_{field}"
+
+
+def _stage_rows(df, stage_key):
+    """공정 DataFrame에서 SNumber, 시각, 정규화한 Pass 상태 배열을 꺼내는 함수 (시각이나 SNumber가 없는 행 제외)"""
+    stage = get_stage(stage_key)
+    if stage is None:
+        raise ValueError(f"알 수 없는 공정입니다: {stage_key}")
+    missing_columns = [col for col in ['SNumber', stage['date_col'], stage['pass_col']] if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"필수 컬럼이 없습니다: {missing_columns}")
+
+    times = to_stage_datetime(df[stage['date_col']], stage['date_format'])
+    valid = (df['SNumber'].notna() & times.notna()).to_numpy()
+    status = normalize_pass_status(df[stage['pass_col']])
+    return (
+        df['SNumber'][valid],
+        times.to_numpy().astype('datetime64[ns]')[valid],
+        status[valid],
+    )
+
+
+def _stage_route_columns(unit_codes, times, status, unit_count, stage_key):
+    """
+    공정 하나의 행을 제품(SNumber 코드)별로 요약해 route table 컬럼을 만드는 함수.
+    시각 순으로 한 번 정렬한 뒤, 코드마다 처음/마지막으로 나온 행을 해시(duplicated)로 찾습니다.
+    """
+    status_codes, status_values = pd.factorize(status)
+    # 같은 시각이면 파일에서 뒤에 나온 행이 마지막이 되도록 안정 정렬
+    order = np.argsort(times.view('int64'), kind='stable')
+    unit_codes, times, status_codes = unit_codes[order], times[order], status_codes[order]
+
+    codes = pd.Series(unit_codes)
+    firsts = np.flatnonzero(~codes.duplicated(keep='first').to_numpy())
+    lasts = np.flatnonzero(~codes.duplicated(keep='last').to_numpy())
+
+    first = np.full(unit_count, np.datetime64('NaT'), dtype='datetime64[ns]')
+    last = first.copy()
+    final = np.full(unit_count, -1, dtype=np.int64)
+    tests = np.zeros(unit_count, dtype=np.int64)
+    # 이 공정 기록이 없는 제품은 NaT/결측 상태/결측 횟수로 남는다
+    first[unit_codes[firsts]] = times[firsts]
+    last[unit_codes[lasts]] = times[lasts]
+    final[unit_codes[lasts]] = status_codes[lasts]
+    tests[:] = np.bincount(unit_codes, minlength=unit_count)
+
+    present = final >= 0
+    return {
+        route_column(stage_key, 'first'): first,
+        route_column(stage_key, 'last'): last,
+        route_column(stage_key, 'final'): pd.Categorical.from_codes(final, categories=pd.Index(status_values)),
+        route_column(stage_key, 'tests'): pd.arrays.IntegerArray(tests, ~present),
+    }
+
+
+def build_route_table(stage_frames):
+    """
+    공정별 DataFrame을 SNumber로 조인해 제품별 공정 이력 테이블을 만드는 함수.
+    모든 공정의 SNumber를 한 번의 해시(pd.factorize)로 정수 코드로 바꾼 뒤, 공정마다 코드 기준으로
+    정렬해 요약하므로 문자열 키로 조인하지 않습니다.
+    최종 상태는 가장 늦은 테스트의 Pass 값이며, 같은 시각이면 파일에서 뒤에 나온 행을 씁니다.
+    Args:
+        stage_frames (dict): 공정 키 -> 공정 DataFrame. 없는 공정은 빼고 넘기면 됩니다. 원본은 바꾸지 않습니다.
+    Returns:
+        pd.DataFrame: SNumber 인덱스(정렬), STAGES 순서의 {공정}_first/_last/_final/_tests 컬럼.
+            어떤 공정에 기록이 없는 SNumber는 그 공정 컬럼이 결측값입니다.
+    """
+    stage_rows = {
+        stage_key: _stage_rows(stage_frames[stage_key], stage_key)
+        for stage_key in STAGES if stage_frames.get(stage_key) is not None
+    }
+    if not stage_rows:
+        return pd.DataFrame(index=pd.Index([], name='SNumber'))
+
+    all_units = pd.concat([sns for sns, _, _ in stage_rows.values()], ignore_index=True)
+    unit_codes, units = pd.factorize(all_units, sort=True)
+
+    columns = {}
+    start = 0
+    for stage_key, (sns, times, status) in stage_rows.items():
+        codes = unit_codes[start:start + len(sns)]
+        start += len(sns)
+        columns.update(_stage_route_columns(codes, times, status, len(units), stage_key))
+
+    return pd.DataFrame(columns, index=pd.Index(units, name='SNumber'))
+
+
+def filter_routes(route, conditions):
+    """
+    공정별 조건에 맞는 SNumber만 남기는 함수.
+    Args:
+        route (pd.DataFrame): build_route_table 결과.
+        conditions (dict): 공정 키 -> 'pass'(최종 O), 'fail'(최종 X), 'missing'(기록 없음), 'present'(기록 있음).
+    Returns:
+        pd.DataFrame: 모든 조건을 만족하는 행.
+    """
+    mask = pd.Series(True, index=route.index)
+    for stage_key, condition in conditions.items():
+        if condition not in ROUTE_CONDITIONS:
+            raise ValueError(f"알 수 없는 조건입니다: {condition}")
+        final_col = route_column(stage_key, 'final')
+        if final_col not in route.columns:
+            # 데이터가 없는 공정은 모든 제품이 '기록 없음'
+            if condition != 'missing':
+                mask &= False
+            continue
+        final = route[final_col]
+        if condition == 'pass':
+            mask &= final.eq('O').fillna(False).astype(bool)
+        elif condition == 'fail':
+            mask &= final.eq('X').fillna(False).astype(bool)
+        elif condition == 'missing':
+            mask &= final.isna()
+        else:
+            mask &= final.notna()
+    return route[mask]